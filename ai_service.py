@@ -1,43 +1,119 @@
 """
 AI服务模块 - 简化标签系统后的版本
 """
+import copy
+import functools
 import json
+import threading
+import time
 import uuid
-from typing import List, Dict, Any
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from openai import OpenAI
 
 from models import Task, AIJob, AIJobStatus, DaySchedule, TaskScheduleItem
 from database import db
 from tag_service import TagService
+from model_router import model_router
+from prompt_cache import prompt_cache
+from config import current_settings
+from time_slots import MINUTES_PER_DAY, format_hhmm, parse_hhmm
+from dependency_graph import topological_order
+from indexes import PRIORITY_RANK
 
 # 配置 OpenAI 客户端
 client = OpenAI(
-    api_key="sk-zmyrpclntmuvmufqjclmjczurrexkvzsfcrxthcwzgyffktd",
-    base_url="https://api.siliconflow.cn/v1",
+    api_key=current_settings.OPENAI_API_KEY,
+    base_url=current_settings.OPENAI_BASE_URL,
 )
 
 class AIService:
+    # 日期 -> (日期桶数据版本, 当天任务版本号)，超出上限时淘汰最久未使用的日期
+    _task_version_cache: "OrderedDict[Any, tuple]" = OrderedDict()
+    _task_version_lock = threading.Lock()
+
+    @staticmethod
+    def _chat_completion(model: str, probe: Optional[int] = None, **kwargs):
+        """调用模型并把延迟和成败反馈给模型路由（probe 为路由返回的探测令牌）"""
+        started = time.perf_counter()
+        try:
+            response = client.chat.completions.create(model=model, **kwargs)
+        except Exception:
+            model_router.record(model, time.perf_counter() - started, False, probe)
+            raise
+        model_router.record(model, time.perf_counter() - started, True, probe)
+        return response
+
     @staticmethod
     async def process_task_planning(job_id: str, prompt: str, max_tasks: int):
         """后台处理 AI 任务规划"""
         try:
-            # 获取当前时间信息
             now = datetime.now()
-            current_date_str = now.strftime("%Y年%m月%d日 %H:%M")
-            weekday_names = ["星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日"]
-            current_weekday = weekday_names[now.weekday()]
             
             # 分析任务类型
             task_type = AIService._analyze_task_type(prompt)
-            current_guidance = AIService._get_type_specific_guidance(task_type)
             
-            response = client.chat.completions.create(
-                model="Qwen/Qwen2.5-7B-Instruct",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": f"""你是一个专业的任务分解和项目管理专家。你需要为用户的目标生成一个项目主题和具体的子任务。
+            # 优先复用相似目标的规划结果，任务日期会按当前时间重新计算
+            cached = None
+            if current_settings.PROMPT_CACHE_ENABLED:
+                cached = prompt_cache.lookup(prompt, task_type, min_tasks=max_tasks)
+            
+            if cached:
+                cached_plan, similarity = cached
+                project_theme = cached_plan.project_theme
+                ai_tasks = copy.deepcopy(cached_plan.tasks)
+                print(f"♻️ 命中相似规划缓存: \"{cached_plan.prompt}\" (相似度 {similarity:.2f})")
+            else:
+                project_theme, ai_tasks = AIService._request_task_plan(prompt, max_tasks, task_type, now)
+                if current_settings.PROMPT_CACHE_ENABLED:
+                    prompt_cache.store(prompt, task_type, project_theme, copy.deepcopy(ai_tasks))
+
+            # 创建任务
+            deduplicated = []
+            created_tasks = AIService._create_tasks_from_ai_result(
+                ai_tasks, project_theme, max_tasks, now, deduplicated
+            )
+
+            # 更新AI作业状态
+            job = db.get_ai_job(job_id)
+            job.status = AIJobStatus.COMPLETED
+            job.result = [task.dict() for task in created_tasks]
+            job.deduplicated = deduplicated
+            db.update_ai_job(job_id, job)
+            
+            print(f"✅ AI任务规划完成")
+            print(f"   项目主题: {project_theme}")
+            print(f"   生成任务: {len(created_tasks)} 个")
+            if deduplicated:
+                print(f"   重复任务: {len(deduplicated)} 个")
+
+        except Exception as e:
+            error_msg = f"AI任务规划失败: {str(e)}"
+            print(error_msg)
+            job = db.get_ai_job(job_id)
+            job.status = AIJobStatus.FAILED
+            job.error = error_msg
+            db.update_ai_job(job_id, job)
+
+    @staticmethod
+    def _request_task_plan(prompt: str, max_tasks: int, task_type: str, now: datetime) -> tuple:
+        """调用AI生成项目主题和任务列表"""
+        # 获取当前时间信息
+        current_date_str = now.strftime("%Y年%m月%d日 %H:%M")
+        weekday_names = ["星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日"]
+        current_weekday = weekday_names[now.weekday()]
+        
+        current_guidance = AIService._get_type_specific_guidance(task_type)
+        
+        model, probe = model_router.route("task_planning", prompt_chars=len(prompt), max_tasks=max_tasks)
+        response = AIService._chat_completion(
+            model,
+            probe,
+            messages=[
+                {
+                    "role": "system",
+                    "content": f"""你是一个专业的任务分解和项目管理专家。你需要为用户的目标生成一个项目主题和具体的子任务。
 
 当前时间：{current_date_str} {current_weekday}
 任务数量限制：严格生成 {max_tasks} 个任务（不多不少）
@@ -98,48 +174,27 @@ class AIService:
 ✅ 正确示例："每天晚上20:00-20:30背诵30个法语单词，使用Anki软件复习"
 
 请生成严格符合以上要求的项目主题和 {max_tasks} 个子任务。""",
-                    },
-                    {"role": "user", "content": f"请为以下目标生成项目主题和分解任务：{prompt}"},
-                ],
-                temperature=0.6,
-                max_tokens=1500,
-            )
-
-            # 解析 AI 返回的内容
-            content = response.choices[0].message.content
-            print(f"AI原始返回内容: {content[:200]}...")
-            
-            ai_result = AIService._parse_ai_response(content, max_tasks)
-            
-            # 提取项目主题和任务列表
-            project_theme = ai_result.get("project_theme", "AI规划项目")
-            ai_tasks = ai_result.get("tasks", [])
-            
-            if len(ai_tasks) == 0:
-                raise Exception("AI未能生成有效的任务列表")
-
-            # 创建任务
-            created_tasks = AIService._create_tasks_from_ai_result(
-                ai_tasks, project_theme, max_tasks, now
-            )
-
-            # 更新AI作业状态
-            job = db.get_ai_job(job_id)
-            job.status = AIJobStatus.COMPLETED
-            job.result = [task.dict() for task in created_tasks]
-            db.update_ai_job(job_id, job)
-            
-            print(f"✅ AI任务规划完成")
-            print(f"   项目主题: {project_theme}")
-            print(f"   生成任务: {len(created_tasks)} 个")
+                },
+                {"role": "user", "content": f"请为以下目标生成项目主题和分解任务：{prompt}"},
+            ],
+            temperature=0.6,
+            max_tokens=1500,
+        )
 
-        except Exception as e:
-            error_msg = f"AI任务规划失败: {str(e)}"
-            print(error_msg)
-            job = db.get_ai_job(job_id)
-            job.status = AIJobStatus.FAILED
-            job.error = error_msg
-            db.update_ai_job(job_id, job)
+        # 解析 AI 返回的内容
+        content = response.choices[0].message.content
+        print(f"AI原始返回内容: {content[:200]}...")
+        
+        ai_result = AIService._parse_ai_response(content, max_tasks)
+        
+        # 提取项目主题和任务列表
+        project_theme = ai_result.get("project_theme", "AI规划项目")
+        ai_tasks = ai_result.get("tasks", [])
+        
+        if len(ai_tasks) == 0:
+            raise Exception("AI未能生成有效的任务列表")
+        
+        return project_theme, ai_tasks
 
     @staticmethod
     def _analyze_task_type(prompt: str) -> str:
@@ -215,12 +270,18 @@ class AIService:
         return ai_result
 
     @staticmethod
-    def _create_tasks_from_ai_result(ai_tasks: List[dict], project_theme: str, max_tasks: int, base_time: datetime) -> List[Task]:
-        """从AI结果创建任务"""
+    def _create_tasks_from_ai_result(ai_tasks: List[dict], project_theme: str, max_tasks: int, base_time: datetime,
+                                     deduplicated: List[dict] = None) -> List[Task]:
+        """从AI结果创建任务，整个规划一次性批量写入；每一步依赖上一步（被去重的步骤由已有任务代替），
+        与已有任务近似重复的任务会被跳过或合并（记录到 deduplicated）"""
         # 严格限制任务数量
         ai_tasks = ai_tasks[:max_tasks]
         
         created_tasks = []
+        merges: Dict[str, List[tuple]] = {}  # merge 模式下要合并到已有任务的 (优先级, 截止时间, 预计工时)
+        previous_step_id = None
+        if deduplicated is None:
+            deduplicated = []
         
         for i, task_data in enumerate(ai_tasks):
             try:
@@ -269,6 +330,23 @@ class AIService:
                 
                 estimated_hours = max(0.5, min(6.0, float(estimated_hours)))
                 
+                # 检查是否与已有任务近似重复
+                duplicate = AIService._find_duplicate_task(original_name, description)
+                if duplicate:
+                    existing_task, similarity = duplicate
+                    action = "merged" if current_settings.AI_DEDUP_MODE == "merge" else "skipped"
+                    if action == "merged":
+                        merges.setdefault(existing_task.id, []).append((priority, due_date, estimated_hours))
+                    deduplicated.append({
+                        "name": task_name,
+                        "action": action,
+                        "similarity": round(similarity, 3),
+                        "existing_task_id": existing_task.id,
+                        "existing_task_name": existing_task.name,
+                    })
+                    previous_step_id = existing_task.id
+                    continue
+                
                 # 创建任务对象（不再需要标签相关字段）
                 new_task = Task(
                     id=str(uuid.uuid4()),
@@ -278,13 +356,10 @@ class AIService:
                     priority=priority,
                     estimated_hours=estimated_hours,
                     due_date=due_date,
+                    depends_on=[previous_step_id] if previous_step_id else [],
                 )
-                
-                # 保存到数据库
-                db.create_task(new_task)
                 created_tasks.append(new_task)
-                
-                print(f"创建任务 {i+1}/{max_tasks}: {new_task.name}")
+                previous_step_id = new_task.id
                 
             except Exception as task_error:
                 print(f"处理任务 {i+1} 时出错: {task_error}")
@@ -297,12 +372,43 @@ class AIService:
                     priority="medium",
                     estimated_hours=2.0,
                     due_date=base_time + timedelta(days=i+1, hours=18),
+                    depends_on=[previous_step_id] if previous_step_id else [],
                 )
-                db.create_task(fallback_task)
                 created_tasks.append(fallback_task)
+                previous_step_id = fallback_task.id
+
+        # 整个规划（新任务和对已有任务的合并）一次写入，读者不会看到只创建了一半的规划
+        db.create_tasks(created_tasks, {
+            task_id: functools.partial(AIService._merge_duplicates, merges=task_merges)
+            for task_id, task_merges in merges.items()
+        })
+        print(f"创建任务 {len(created_tasks)}/{max_tasks} 个，重复 {len(deduplicated)} 个")
 
         return created_tasks
 
+    @staticmethod
+    def _find_duplicate_task(name: str, description: str):
+        """在已有的未完成任务中查找近似重复项"""
+        if current_settings.AI_DEDUP_MODE not in ("skip", "merge"):
+            return None
+        
+        matches = db.find_similar_tasks(
+            name, description,
+            threshold=current_settings.AI_DEDUP_SIMILARITY_THRESHOLD,
+            limit=1
+        )
+        return matches[0] if matches else None
+
+    @staticmethod
+    def _merge_duplicates(existing_task: Task, merges: List[tuple]) -> None:
+        """merge 模式下把重复的规划步骤合并到已有任务：提升优先级、提前截止时间、取较大的预计工时"""
+        for priority, due_date, estimated_hours in merges:
+            if PRIORITY_RANK.get(priority, 1) > PRIORITY_RANK.get(existing_task.priority, 1):
+                existing_task.priority = priority
+            if existing_task.due_date is None or due_date < existing_task.due_date:
+                existing_task.due_date = due_date
+            existing_task.estimated_hours = max(existing_task.estimated_hours or 0, estimated_hours)
+
     @staticmethod
     async def process_day_schedule(job_id: str, date_str: str, task_ids: List[str] = None, force_regenerate: bool = False):
         """后台处理AI日程安排"""
@@ -398,6 +504,101 @@ class AIService:
             job.error = str(e)
             db.update_ai_job(job_id, job)
 
+    @staticmethod
+    def get_schedule_status(target_date) -> dict:
+        """获取指定日期保存的AI安排，以及安排生成后当天任务是否发生变化"""
+        date_str = target_date.isoformat()
+        schedule = db.get_day_schedule(date_str)
+        if not schedule:
+            return {
+                "date": date_str,
+                "has_schedule": False,
+                "schedule": None,
+                "tasks_changed": False
+            }
+        
+        # 检查任务是否发生变化
+        return {
+            "date": date_str,
+            "has_schedule": True,
+            "schedule": schedule,
+            "tasks_changed": schedule.task_version != AIService.get_date_task_version(target_date)
+        }
+
+    @staticmethod
+    def get_schedules_between(start_date, end_date) -> List[dict]:
+        """获取日期范围内保存的AI安排（按日期升序），以及安排生成后各日任务是否发生变化"""
+        results = []
+        for date_str, schedule in db.get_day_schedules_between(start_date.isoformat(), end_date.isoformat()):
+            results.append({
+                "date": date_str,
+                "schedule": schedule,
+                "tasks_changed": schedule.task_version != AIService.get_date_task_version(schedule.date)
+            })
+        return results
+
+    @staticmethod
+    def find_free_slots(target_date, duration: int, after: str = None, before: str = None,
+                        limit: int = 10) -> dict:
+        """查找指定日期 [after, before) 内不短于 duration 分钟的连续空闲时间段（避开已保存的日程安排）"""
+        if duration <= 0:
+            raise ValueError("duration 必须大于0")
+        window_start = parse_hhmm(after or current_settings.SCHEDULE_DAY_START)
+        window_end = parse_hhmm(before or current_settings.SCHEDULE_DAY_END)
+        if window_start >= window_end:
+            raise ValueError("after 必须早于 before")
+        
+        slots = db.get_day_slots(target_date.isoformat()).free_slots(duration, window_start, window_end, limit)
+        return {
+            "date": target_date,
+            "duration": duration,
+            "slots": [
+                {"start_time": format_hhmm(start), "end_time": format_hhmm(end), "minutes": end - start}
+                for start, end in slots
+            ]
+        }
+
+    @staticmethod
+    def check_schedule_conflicts(slots) -> List[dict]:
+        """检查候选时间段与已保存日程安排中的条目是否重叠，返回每个时间段的冲突条目"""
+        results = []
+        for slot in slots:
+            start, end = parse_hhmm(slot.start_time), parse_hhmm(slot.end_time)
+            if start >= end:
+                raise ValueError(f"结束时间必须晚于开始时间: {slot.start_time}-{slot.end_time}")
+            conflicts = db.get_day_slots(slot.date.isoformat()).conflicts(start, end)
+            results.append({
+                "date": slot.date,
+                "start_time": slot.start_time,
+                "end_time": slot.end_time,
+                "conflicts": [
+                    {"task_id": task_id, "start_time": format_hhmm(item_start), "end_time": format_hhmm(item_end)}
+                    for item_start, item_end, task_id in conflicts
+                ]
+            })
+        return results
+
+    @staticmethod
+    def get_date_task_version(target_date) -> str:
+        """指定日期任务集合的版本号；按日期桶的数据版本缓存，当天任务未变化时不重新计算；
+        缓存的日期数不超过一次日程范围查询加预生成窗口的天数"""
+        cache = AIService._task_version_cache
+        bucket_version = db.get_date_version(target_date)
+        with AIService._task_version_lock:
+            cached = cache.get(target_date)
+            if cached is not None and cached[0] == bucket_version:
+                cache.move_to_end(target_date)
+                return cached[1]
+        
+        task_version = AIService._generate_task_version(db.get_tasks_for_date(target_date))
+        max_entries = current_settings.DATE_RANGE_MAX_DAYS + current_settings.SCHEDULE_PREFETCH_DAYS_AHEAD + 1
+        with AIService._task_version_lock:
+            cache[target_date] = (bucket_version, task_version)
+            cache.move_to_end(target_date)
+            while len(cache) > max_entries:
+                cache.popitem(last=False)
+        return task_version
+
     @staticmethod
     def _generate_task_version(tasks: List[Task]) -> str:
         """根据任务列表生成版本号"""
@@ -411,10 +612,50 @@ class AIService:
         version_string = "|".join(task_info)
         return hashlib.md5(version_string.encode()).hexdigest()
 
+    @staticmethod
+    def order_tasks_for_day(tasks: List[Task]) -> List[Task]:
+        """当天任务的建议顺序：前置任务在前，其余按优先级从高到低、截止时间从早到晚"""
+        return topological_order(
+            tasks,
+            lambda task: task.id,
+            lambda task: task.depends_on,
+            lambda task: (-PRIORITY_RANK.get(task.priority, 1), task.due_date is None,
+                          task.due_date.timestamp() if task.due_date else 0)
+        )
+
+    @staticmethod
+    def _order_schedule_items(schedule_items: List[TaskScheduleItem], dependencies: Dict[str, List[str]]) -> List[TaskScheduleItem]:
+        """让AI安排满足依赖关系：AI给出的时间顺序已满足依赖时原样返回；
+        否则按拓扑顺序依次填入原有的时间段起点（保留各任务时长，与上一项重叠时顺延）"""
+        by_start = sorted(schedule_items, key=lambda item: parse_hhmm(item.start_time))
+        ordered = topological_order(
+            by_start,
+            lambda item: item.task_id,
+            lambda item: dependencies.get(item.task_id, ()),
+            lambda item: parse_hhmm(item.start_time)
+        )
+        if all(item is original for item, original in zip(ordered, by_start)):
+            return schedule_items
+        
+        reordered = []
+        previous_end = 0
+        for slot, item in zip(by_start, ordered):
+            length = parse_hhmm(item.end_time) - parse_hhmm(item.start_time)
+            start = max(parse_hhmm(slot.start_time), previous_end)
+            end = min(start + length, MINUTES_PER_DAY)
+            reordered.append(item.model_copy(update={
+                "start_time": format_hhmm(start),
+                "end_time": format_hhmm(end),
+                "duration": (end - start) / 60,
+            }))
+            previous_end = end
+        return reordered
+
     @staticmethod
     async def _generate_day_schedule(tasks: List[Task], target_date) -> dict:
         """生成日程安排 - 修复版本"""
         # 准备任务信息供AI分析
+        task_ids = {task.id for task in tasks}
         tasks_info = []
         for task in tasks:
             task_info = {
@@ -424,7 +665,8 @@ class AIService:
                 "priority": task.priority,
                 "due_date": task.due_date.isoformat() if task.due_date else None,
                 "estimated_hours": task.estimated_hours or 2.0,
-                "is_overdue": task.due_date and task.due_date < datetime.now() if task.due_date else False
+                "is_overdue": task.due_date and task.due_date < datetime.now() if task.due_date else False,
+                "depends_on": [task_id for task_id in task.depends_on if task_id in task_ids],
                 # 修复：移除对 task_tags 的引用
                 # "task_tags": task.task_tags or [],  # 删除这行
             }
@@ -435,8 +677,10 @@ class AIService:
         weekday_names = ["星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日"]
         target_weekday = weekday_names[target_date.weekday()]
         
-        response = client.chat.completions.create(
-            model="Qwen/Qwen2.5-7B-Instruct",
+        model, probe = model_router.route("day_schedule", task_count=len(tasks))
+        response = AIService._chat_completion(
+            model,
+            probe,
             messages=[
                 {
                     "role": "system",
@@ -452,6 +696,7 @@ class AIService:
                     4. 任务时长：根据预计时长合理分配，避免过度紧凑
                     5. 休息时间：任务间预留15-30分钟休息
                     6. 逾期任务：已逾期任务最优先处理
+                    7. 依赖关系：depends_on 中的前置任务必须安排在该任务之前
                     
                     请返回JSON格式：
                     {{
@@ -499,9 +744,7 @@ class AIService:
                 end_time = item["end_time"]
                 
                 # 计算持续时间
-                start_hour, start_min = map(int, start_time.split(':'))
-                end_hour, end_min = map(int, end_time.split(':'))
-                duration = (end_hour * 60 + end_min - start_hour * 60 - start_min) / 60
+                duration = (parse_hhmm(end_time) - parse_hhmm(start_time)) / 60
                 total_hours += duration
                 
                 schedule_item = TaskScheduleItem(
@@ -515,6 +758,12 @@ class AIService:
                 )
                 schedule_items.append(schedule_item)
         
+        dependencies = {task.id: task.depends_on for task in tasks}
+        ordered_items = AIService._order_schedule_items(schedule_items, dependencies)
+        if ordered_items is not schedule_items:
+            schedule_items = ordered_items
+            total_hours = sum(item.duration for item in schedule_items)
+        
         return {
             "schedule_items": schedule_items,
             "suggestions": ai_result.get("suggestions", []),
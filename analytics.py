@@ -0,0 +1,239 @@
+"""
+统计分析模块 - 按列存储的任务属性和向量化的分组统计
+每个任务占各列数组中的一行（截止时间为 int64 秒数，优先级为整数编码，预计工时为浮点数），
+统计查询只扫描需要的列，不访问任务对象；安装 numpy 时以零拷贝视图做向量化运算，否则逐行累加
+"""
+import logging
+import math
+from array import array
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from indexes import TaskIndex
+from recurrence import is_recurring_master
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+except ImportError:  # 未安装 numpy 时退回逐行累加
+    np = None
+
+# 统计查询的执行方式（随统计结果返回，便于确认部署环境是否走向量化路径）
+ENGINE = "numpy" if np is not None else "python"
+if np is None:
+    logger.warning("未安装 numpy，统计分析使用逐行累加（100 万任务每次查询约 0.1-0.4 秒），建议 pip install numpy")
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+SECONDS_PER_DAY = 86400
+MISSING = -(2 ** 63)  # 整数列的空值
+OVERDUE_BUCKET_EDGES = (1, 3, 7, 14, 30)  # 逾期天数分段：<1、1-3、3-7、7-14、14-30、30 天以上
+
+
+def _epoch_seconds(value: Optional[datetime]) -> int:
+    """时间转为秒数（按本地时钟，与 due_date.date() 的日期划分一致）"""
+    if value is None:
+        return MISSING
+    return int((value.replace(tzinfo=None) - _EPOCH).total_seconds())
+
+
+def _epoch_day(value: Optional[date]) -> int:
+    """日期转为天数"""
+    return MISSING if value is None else value.toordinal() - _EPOCH_ORDINAL
+
+
+def _from_epoch_day(day: int) -> date:
+    return date.fromordinal(day + _EPOCH_ORDINAL)
+
+
+def _week_of(day: int) -> int:
+    """天数所在的周（按周一开始；1970-01-01 为周四）"""
+    return (day + 3) // 7
+
+
+def _week_start(week: int) -> date:
+    return _from_epoch_day(week * 7 - 3)
+
+
+class TaskColumns(TaskIndex):
+    """任务属性列：任务ID -> 行号，删除的行进入空闲列表供复用（alive 列标记有效行）。
+    重复任务按日期展开实例，不进入列存储"""
+
+    def __init__(self):
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._priority_codes: Dict[str, int] = {}
+        self._priority_names: List[str] = []
+        self._init_columns()
+
+    def _init_columns(self) -> None:
+        self.alive = array("b")
+        self.completed = array("b")
+        self.priority = array("h")  # 优先级编码，见 priority_name()
+        self.due = array("q")  # 截止时间（秒）
+        self.plan_day = array("q")  # 计划日期，没有时为截止日期（天）
+        self.hours = array("d")  # 预计工时，未估计为 NaN
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def priority_name(self, code: int) -> str:
+        return self._priority_names[code]
+
+    def _priority_code(self, priority: str) -> int:
+        code = self._priority_codes.get(priority)
+        if code is None:
+            code = self._priority_codes[priority] = len(self._priority_names)
+            self._priority_names.append(priority)
+        return code
+
+    def add(self, task) -> None:
+        """加入列存储（已存在时覆盖原行）"""
+        if is_recurring_master(task):
+            self.discard(task.id)
+            return
+
+        due_day = _epoch_day(task.due_date.date()) if task.due_date else MISSING
+        values = (
+            1,
+            1 if task.completed else 0,
+            self._priority_code(task.priority or "medium"),
+            _epoch_seconds(task.due_date),
+            _epoch_day(task.scheduled_date) if task.scheduled_date else due_day,
+            math.nan if task.estimated_hours is None else float(task.estimated_hours),
+        )
+        columns = (self.alive, self.completed, self.priority, self.due, self.plan_day, self.hours)
+
+        row = self._rows.get(task.id)
+        if row is None:
+            row = self._rows[task.id] = self._free.pop() if self._free else len(self.alive)
+        if row == len(self.alive):
+            for column, value in zip(columns, values):
+                column.append(value)
+        else:
+            for column, value in zip(columns, values):
+                column[row] = value
+
+    def discard(self, task_id: str) -> None:
+        """移出列存储，行号留待复用"""
+        row = self._rows.pop(task_id, None)
+        if row is not None:
+            self.alive[row] = 0
+            self._free.append(row)
+
+    def clear(self) -> None:
+        """清空列存储"""
+        self._rows.clear()
+        self._free.clear()
+        self._init_columns()
+
+    # ===== 统计查询（调用方持有数据库锁，numpy 视图存在期间列不能扩容） =====
+    def _views(self):
+        return (np.frombuffer(self.alive, dtype=np.bool_),
+                np.frombuffer(self.completed, dtype=np.bool_),
+                np.frombuffer(self.priority, dtype=np.int16),
+                np.frombuffer(self.due, dtype=np.int64),
+                np.frombuffer(self.plan_day, dtype=np.int64),
+                np.frombuffer(self.hours, dtype=np.float64))
+
+    def completion_by_week(self, start: date, end: date) -> List[Tuple[date, str, int, int]]:
+        """截止日期在 [start, end] 内的任务按 (所在周, 优先级) 分组，
+        返回 [(周一日期, 优先级, 任务数, 已完成数)]，按周和优先级编码升序"""
+        low, high = _epoch_day(start) * SECONDS_PER_DAY, (_epoch_day(end) + 1) * SECONDS_PER_DAY
+        groups = len(self._priority_names)
+        if not self._rows:
+            return []
+
+        if np is not None:
+            alive, completed, priority, due, _, _ = self._views()
+            mask = alive & (due >= low) & (due < high)
+            # 周数限定在查询范围内，(周, 优先级) 直接作为 bincount 的下标，不需要排序
+            first_week = _week_of(_epoch_day(start))
+            keys = (_week_of(due[mask] // SECONDS_PER_DAY) - first_week) * groups + priority[mask]
+            totals = np.bincount(keys, minlength=(_week_of(_epoch_day(end)) - first_week + 1) * groups)
+            done = np.bincount(keys, weights=completed[mask], minlength=len(totals))
+            present = np.flatnonzero(totals)
+            counts = zip((present + first_week * groups).tolist(), totals[present].tolist(), done[present].tolist())
+        else:
+            grouped: Dict[int, List[int]] = {}
+            for alive, completed, priority, due in zip(self.alive, self.completed, self.priority, self.due):
+                if alive and low <= due < high:
+                    bucket = grouped.setdefault(_week_of(due // SECONDS_PER_DAY) * groups + priority, [0, 0])
+                    bucket[0] += 1
+                    bucket[1] += completed
+            counts = ((key, total, done) for key, (total, done) in sorted(grouped.items()))
+
+        return [(_week_start(key // groups), self._priority_names[key % groups], int(total), int(done))
+                for key, total, done in counts]
+
+    def load_by_day(self, start: date, end: date) -> List[Tuple[date, int, float, int]]:
+        """未完成任务按计划日期（没有时为截止日期）统计 [start, end] 内每天的负载，
+        返回 [(日期, 任务数, 预计工时合计, 未估计工时的任务数)]，包含没有任务的日期"""
+        first, last = _epoch_day(start), _epoch_day(end)
+        days = last - first + 1
+        if np is not None and self._rows:
+            alive, completed, _, _, plan_day, hours = self._views()
+            mask = alive & ~completed & (plan_day >= first) & (plan_day <= last)
+            offsets = plan_day[mask] - first
+            day_hours = hours[mask]
+            unestimated = np.isnan(day_hours)
+            counts = np.bincount(offsets, minlength=days).tolist()
+            totals = np.bincount(offsets, weights=np.where(unestimated, 0.0, day_hours), minlength=days).tolist()
+            missing = np.bincount(offsets, weights=unestimated, minlength=days).tolist()
+        else:
+            counts, totals, missing = [0] * days, [0.0] * days, [0] * days
+            for alive, completed, plan_day, task_hours in zip(self.alive, self.completed, self.plan_day, self.hours):
+                if alive and not completed and first <= plan_day <= last:
+                    offset = plan_day - first
+                    counts[offset] += 1
+                    if math.isnan(task_hours):
+                        missing[offset] += 1
+                    else:
+                        totals[offset] += task_hours
+
+        return [(_from_epoch_day(first + offset), int(counts[offset]), float(totals[offset]), int(missing[offset]))
+                for offset in range(days)]
+
+    def overdue_aging(self, now: datetime, edges=OVERDUE_BUCKET_EDGES) -> List[Tuple[int, Dict[str, int], float]]:
+        """截止时间早于 now 的未完成任务按逾期天数分段（分段边界为 edges，单位天），
+        返回每段的 (任务数, 按优先级的任务数, 预计工时合计)"""
+        buckets = len(edges) + 1
+        groups = len(self._priority_names)
+        now_seconds = _epoch_seconds(now)
+        if np is not None and self._rows:
+            alive, completed, priority, due, _, hours = self._views()
+            mask = alive & ~completed & (due != MISSING) & (due < now_seconds)
+            ages = (now_seconds - due[mask]) // SECONDS_PER_DAY
+            bucket_of = np.searchsorted(np.asarray(edges), ages, side="right")
+            by_priority = np.bincount(bucket_of * groups + priority[mask], minlength=buckets * groups)
+            by_priority = by_priority.reshape(buckets, groups).tolist()
+            overdue_hours = hours[mask]
+            totals = np.bincount(bucket_of, weights=np.nan_to_num(overdue_hours), minlength=buckets).tolist()
+        else:
+            by_priority = [[0] * groups for _ in range(buckets)]
+            totals = [0.0] * buckets
+            for alive, completed, priority, due, task_hours in zip(
+                    self.alive, self.completed, self.priority, self.due, self.hours):
+                if alive and not completed and due != MISSING and due < now_seconds:
+                    bucket = bisect_right(edges, (now_seconds - due) // SECONDS_PER_DAY)
+                    by_priority[bucket][priority] += 1
+                    if not math.isnan(task_hours):
+                        totals[bucket] += task_hours
+
+        return [
+            (int(sum(counts)),
+             {self._priority_names[code]: int(count) for code, count in enumerate(counts) if count},
+             float(totals[bucket]))
+            for bucket, counts in enumerate(by_priority)
+        ]
+
+
+def bucket_label(edges, bucket: int) -> Tuple[int, Optional[int], str]:
+    """逾期分段的 (最少天数, 最多天数（不含）, 标签)"""
+    low = edges[bucket - 1] if bucket > 0 else 0
+    if bucket == len(edges):
+        return low, None, f"{low}天以上"
+    high = edges[bucket]
+    return low, high, f"{low}-{high}天" if low else f"{high}天内"
@@ -1,35 +1,304 @@
 """
 API路由模块 - 修复标签系统后的版本
 """
+import hashlib
 import uuid
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import List
-from datetime import datetime
+from calendar import monthrange
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from datetime import date, datetime, timedelta
 
 from models import (
     Task, TaskCreate, TaskUpdate, AITaskRequest, AIDayScheduleRequest,
-    TaskStatsResponse, TagsResponse, AIJob, AIJobStatus
+    TaskStatsResponse, TagsResponse, AIJob, AIJobStatus, TaskStatus, TaskFilter,
+    TaskBulkUpdate, TaskBulkDelete, TaskBatchGet, ScheduleConflictRequest
 )
 from task_service import TaskService
 from ai_service import AIService
 from tag_service import TagService
+from schedule_prefetch_service import SchedulePrefetchService
+from archive_service import ArchiveService
+from model_router import model_router
+from task_serializer import dumps, parse_fields
+from prompt_cache import prompt_cache
 from database import db
+from config import current_settings
 
 # 创建路由器
 task_router = APIRouter(prefix="/tasks", tags=["tasks"])
 ai_router = APIRouter(prefix="/ai", tags=["ai"])
+archive_router = APIRouter(prefix="/archive", tags=["archive"])
+analytics_router = APIRouter(prefix="/analytics", tags=["analytics"])
 general_router = APIRouter(tags=["general"])
 
+FIELDS_QUERY = Query(None, description="字段投影，逗号分隔，如 id,name,priority,due_date（始终包含 id）")
+
+def _parse_fields_or_400(fields: Optional[str]):
+    """解析字段投影参数，非法字段返回400"""
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _etag(scope: str, version: int, *parts) -> str:
+    """由数据版本和影响响应内容的参数生成强 ETag"""
+    digest = hashlib.md5("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:12]
+    return f'"{scope}-{version}-{digest}"'
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+    """If-None-Match 与当前 ETag 一致时返回 304（不重新计算和序列化）"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+def _tasks_json_response(tasks, headers: dict = None, fields=None) -> Response:
+    """任务列表响应：拼接逐任务缓存的JSON字节（或按投影字段编码），跳过 response_model 校验"""
+    return Response(
+        content=db.encoded_cache.encode_many(tasks, fields),
+        media_type="application/json",
+        headers=headers
+    )
+
 # ===== 任务相关路由 =====
 @task_router.post("", response_model=Task)
 async def create_task(task: TaskCreate):
     """创建新任务"""
-    return TaskService.create_task(task)
+    try:
+        return TaskService.create_task(task)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@task_router.post("/bulk", response_model=List[Task])
+async def create_tasks_bulk(tasks: List[TaskCreate]):
+    """批量创建任务，整批原子写入"""
+    if len(tasks) > current_settings.BULK_MAX_TASKS:
+        raise HTTPException(status_code=400, detail=f"单次最多创建{current_settings.BULK_MAX_TASKS}个任务")
+    try:
+        return TaskService.create_tasks(tasks)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@task_router.post("/bulk-update")
+async def bulk_update_tasks(request: TaskBulkUpdate):
+    """按ID列表或筛选条件批量更新任务，返回逐个任务的结果"""
+    if request.ids is not None and len(request.ids) > current_settings.BULK_MAX_TASKS:
+        raise HTTPException(status_code=400, detail=f"单次最多更新{current_settings.BULK_MAX_TASKS}个任务")
+    try:
+        return TaskService.bulk_update_tasks(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@task_router.post("/bulk-delete")
+async def bulk_delete_tasks(request: TaskBulkDelete):
+    """按ID列表或筛选条件批量删除任务，返回逐个任务的结果"""
+    if request.ids is not None and len(request.ids) > current_settings.BULK_MAX_TASKS:
+        raise HTTPException(status_code=400, detail=f"单次最多删除{current_settings.BULK_MAX_TASKS}个任务")
+    try:
+        return TaskService.bulk_delete_tasks(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@task_router.post("/batch-get")
+async def batch_get_tasks(request: TaskBatchGet, fields: Optional[str] = FIELDS_QUERY):
+    """按ID批量读取任务，返回找到的任务（按请求顺序）和不存在的任务ID"""
+    if len(request.ids) > current_settings.BATCH_GET_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"单次最多读取{current_settings.BATCH_GET_MAX_IDS}个任务")
+    projection = _parse_fields_or_400(fields)
+    
+    tasks, missing = TaskService.get_tasks(request.ids)
+    content = (
+        b'{"tasks":' + db.encoded_cache.encode_many(tasks, projection)
+        + b',"missing":' + dumps(missing) + b"}"
+    )
+    return Response(content=content, media_type="application/json")
+
+@task_router.post("/import")
+async def import_tasks(request: Request, format: str = Query("jsonl", pattern="^(jsonl|csv)$")):
+    """流式批量导入任务（请求体为 JSONL 或带表头的 CSV），返回逐行错误和导入速度"""
+    return await TaskService.import_tasks(request.stream(), format)
 
 @task_router.get("", response_model=List[Task])
-async def get_all_tasks():
-    """获取所有任务"""
-    return TaskService.get_all_tasks()
+async def get_all_tasks(
+    request: Request,
+    status: Optional[TaskStatus] = None,
+    priority: Optional[str] = None,
+    completed: Optional[bool] = None,
+    due_from: Optional[datetime] = None,
+    due_to: Optional[datetime] = None,
+    sort: Optional[str] = Query(None, description="排序字段，逗号分隔，前缀 - 表示降序，如 -priority,due_date"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = FIELDS_QUERY,
+):
+    """获取任务列表，支持筛选、多字段排序、游标分页（下一页游标在 X-Next-Cursor 响应头中）和字段投影；
+    响应带 ETag，If-None-Match 命中时返回 304"""
+    etag = _etag("tasks", db.get_version("tasks"), request.url.query)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    
+    projection = _parse_fields_or_400(fields)
+    task_filter = TaskFilter(
+        status=status, priority=priority, completed=completed, due_from=due_from, due_to=due_to
+    )
+    if task_filter.is_empty() and sort is None and limit is None and cursor is None:
+        return _tasks_json_response(TaskService.get_all_tasks(), {"ETag": etag}, projection)
+    
+    try:
+        tasks, next_cursor = TaskService.query_tasks(task_filter, sort, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    headers = {"ETag": etag}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return _tasks_json_response(tasks, headers, projection)
+
+@task_router.get("/by-tags")
+async def get_tasks_by_tags(tags: str = "", fields: Optional[str] = FIELDS_QUERY):
+    """根据多个标签筛选任务，支持AND逻辑"""
+    projection = _parse_fields_or_400(fields)
+    if not tags:
+        return _tasks_json_response(TaskService.get_all_tasks(), fields=projection)
+    
+    # 解析标签字符串（逗号分隔）
+    tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    
+    if not tag_list:
+        return _tasks_json_response(TaskService.get_all_tasks(), fields=projection)
+    
+    return _tasks_json_response(TaskService.get_tasks_by_tags(tag_list), fields=projection)
+
+@task_router.get("/by-tag/{tag}")
+async def get_tasks_by_tag(tag: str, fields: Optional[str] = FIELDS_QUERY):
+    """根据单个标签获取任务（兼容旧接口）"""
+    projection = _parse_fields_or_400(fields)
+    return _tasks_json_response(TaskService.get_tasks_by_tag(tag), fields=projection)
+
+@task_router.get("/calendar/{year}/{month}")
+async def get_calendar_tasks(request: Request, year: int, month: int, fields: Optional[str] = FIELDS_QUERY):
+    """获取指定月份的任务日历数据；ETag 取该月各日期桶的最大数据版本"""
+    if not 1 <= year <= 9999 or not 1 <= month <= 12:
+        raise HTTPException(status_code=400, detail="年份或月份无效")
+    
+    first_day = date(year, month, 1)
+    last_day = date(year, month, monthrange(year, month)[1])
+    etag = _etag("calendar", db.get_dates_version(first_day, last_day), year, month, fields)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    
+    projection = _parse_fields_or_400(fields)
+    calendar_data = TaskService.get_calendar_tasks(year, month)
+    return Response(
+        content=db.encoded_cache.encode_calendar(calendar_data, projection),
+        media_type="application/json",
+        headers={"ETag": etag}
+    )
+
+@task_router.get("/due")
+async def get_tasks_due(
+    due_from: Optional[datetime] = None,
+    due_to: Optional[datetime] = None,
+    within_hours: Optional[float] = Query(None, gt=0, description="从 due_from（默认当前时间）起若干小时内到期"),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    fields: Optional[str] = FIELDS_QUERY,
+):
+    """按截止时间范围查询未完成任务（按截止时间升序），如 within_hours=72 获取未来72小时内到期的任务"""
+    projection = _parse_fields_or_400(fields)
+    if within_hours is not None:
+        if due_to is not None:
+            raise HTTPException(status_code=400, detail="within_hours 和 due_to 不能同时指定")
+        due_from = due_from or datetime.now()
+        due_to = due_from + timedelta(hours=within_hours)
+    if due_from is not None and due_to is not None and due_from > due_to:
+        raise HTTPException(status_code=400, detail="due_from 不能晚于 due_to")
+    
+    return _tasks_json_response(TaskService.get_tasks_due_between(due_from, due_to, limit), fields=projection)
+
+@task_router.get("/next-up")
+async def get_next_up_tasks(k: int = Query(10, ge=1, le=100), fields: Optional[str] = FIELDS_QUERY):
+    """最紧急的 k 个未完成任务：紧急度综合优先级和距截止时间（截止时间 - 优先级提前量）"""
+    projection = _parse_fields_or_400(fields)
+    return _tasks_json_response(TaskService.get_next_up_tasks(k), fields=projection)
+
+@task_router.get("/ready")
+async def get_ready_tasks(limit: Optional[int] = Query(None, ge=1, le=500), fields: Optional[str] = FIELDS_QUERY):
+    """可开始的未完成任务（前置任务都已完成），按截止时间升序"""
+    projection = _parse_fields_or_400(fields)
+    return _tasks_json_response(TaskService.get_ready_tasks(limit), fields=projection)
+
+@task_router.get("/search")
+async def search_tasks(
+    q: str = Query(..., min_length=1, description="搜索词，空格分隔的词须同时命中；以 * 结尾按前缀匹配"),
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = FIELDS_QUERY,
+):
+    """全文检索任务名称和描述，按相关度（BM25）排序；命中总数在 X-Total-Count 响应头中，
+    命中过多时为估算值（X-Total-Count-Estimated: true）"""
+    projection = _parse_fields_or_400(fields)
+    tasks, total, exact = TaskService.search_tasks(q, limit)
+    headers = {"X-Total-Count": str(total)}
+    if not exact:
+        headers["X-Total-Count-Estimated"] = "true"
+    return _tasks_json_response(tasks, headers, projection)
+
+@task_router.get("/changes")
+async def get_task_changes(
+    since: int = Query(..., description="客户端上次同步得到的 version"),
+    fields: Optional[str] = FIELDS_QUERY,
+):
+    """增量同步：返回指定版本之后新建或更新的任务和已删除任务的ID（墓碑）；
+    版本过旧时 full_resync 为 true，changes 为全部任务"""
+    projection = _parse_fields_or_400(fields)
+    version, changed, deleted = db.get_changes(since)
+    full_resync = changed is None
+    if full_resync:
+        changed = TaskService.get_all_tasks()
+    
+    content = (
+        b'{"version":' + dumps(version)
+        + b',"full_resync":' + dumps(full_resync)
+        + b',"changes":' + db.encoded_cache.encode_many(changed, projection)
+        + b',"deleted":' + dumps(deleted) + b"}"
+    )
+    return Response(content=content, media_type="application/json")
+
+@task_router.get("/calendar-counts")
+async def get_calendar_counts(request: Request, start: date, end: date):
+    """日历热力图：日期范围内（可跨多个月，最长 DATE_RANGE_MAX_DAYS 天）每天未完成任务的计数，
+    按截止/计划和优先级分组，不返回任务详情"""
+    if start > end:
+        raise HTTPException(status_code=400, detail="start 不能晚于 end")
+    if (end - start).days + 1 > current_settings.DATE_RANGE_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"单次最多查询{current_settings.DATE_RANGE_MAX_DAYS}天")
+    
+    etag = _etag("calendar-counts", db.get_dates_version(start, end), start, end)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    
+    return Response(
+        content=dumps(TaskService.get_calendar_counts(start, end)),
+        media_type="application/json",
+        headers={"ETag": etag}
+    )
+
+@task_router.get("/export")
+async def export_tasks(format: str = Query("ndjson", pattern="^(ndjson|json)$")):
+    """流式导出所有任务（NDJSON 或分块 JSON 数组），不在内存中构建完整列表"""
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(
+        TaskService.export_tasks(format),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=tasks.{format}"}
+    )
 
 @task_router.get("/{task_id}", response_model=Task)
 async def get_task(task_id: str):
@@ -42,7 +311,10 @@ async def get_task(task_id: str):
 @task_router.put("/{task_id}", response_model=Task)
 async def update_task(task_id: str, task_update: TaskUpdate):
     """更新任务"""
-    task = TaskService.update_task(task_id, task_update)
+    try:
+        task = TaskService.update_task(task_id, task_update)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
     return task
@@ -55,29 +327,17 @@ async def delete_task(task_id: str):
         raise HTTPException(status_code=404, detail="任务不存在")
     return {"message": "任务已删除"}
 
-@task_router.get("/by-tags")
-async def get_tasks_by_tags(tags: str = ""):
-    """根据多个标签筛选任务，支持AND逻辑"""
-    if not tags:
-        return TaskService.get_all_tasks()
-    
-    # 解析标签字符串（逗号分隔）
-    tag_list = [tag.strip() for tag in tags.split(",") if tag.strip()]
-    
-    if not tag_list:
-        return TaskService.get_all_tasks()
-    
-    return TaskService.get_tasks_by_tags(tag_list)
-
-@task_router.get("/by-tag/{tag}")
-async def get_tasks_by_tag(tag: str):
-    """根据单个标签获取任务（兼容旧接口）"""
-    return TaskService.get_tasks_by_tag(tag)
+@task_router.post("/{task_id}/occurrences/{occurrence_date}/complete", response_model=Task)
+async def complete_task_occurrence(task_id: str, occurrence_date: date):
+    """完成重复任务在指定日期的实例（该日不再展开）"""
+    try:
+        task = TaskService.complete_occurrence(task_id, occurrence_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not task:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return task
 
-@task_router.get("/calendar/{year}/{month}")
-async def get_calendar_tasks(year: int, month: int):
-    """获取指定月份的任务日历数据"""
-    return TaskService.get_calendar_tasks(year, month)
 
 # ===== AI相关路由 =====
 @ai_router.post("/plan-tasks/async")
@@ -133,6 +393,47 @@ async def ai_schedule_day_async(request: AIDayScheduleRequest, background_tasks:
     
     return {"job_id": job_id, "status": "processing"}
 
+@ai_router.get("/schedules")
+async def get_day_schedules(start: date, end: date):
+    """获取日期范围内保存的AI安排（按日期升序），tasks_changed 表示安排生成后当天任务是否变化"""
+    if start > end:
+        raise HTTPException(status_code=400, detail="start 不能晚于 end")
+    if (end - start).days + 1 > current_settings.DATE_RANGE_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"单次最多查询{current_settings.DATE_RANGE_MAX_DAYS}天")
+    
+    return {
+        "start": start,
+        "end": end,
+        "schedules": AIService.get_schedules_between(start, end)
+    }
+
+@ai_router.get("/free-slots")
+async def get_free_slots(
+    date: date,
+    duration: int = Query(..., gt=0, le=1440, description="需要的连续分钟数"),
+    after: Optional[str] = Query(None, description="时间窗口起点 HH:MM，默认 SCHEDULE_DAY_START"),
+    before: Optional[str] = Query(None, description="时间窗口终点 HH:MM，默认 SCHEDULE_DAY_END"),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """查找指定日期时间窗口内的连续空闲时间段（避开已保存的AI安排）"""
+    try:
+        return AIService.find_free_slots(date, duration, after, before, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@ai_router.post("/schedule-conflicts")
+async def check_schedule_conflicts(request: ScheduleConflictRequest):
+    """检查候选时间段（可跨多天）与已保存的AI安排是否冲突"""
+    try:
+        results = AIService.check_schedule_conflicts(request.slots)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "has_conflicts": any(result["conflicts"] for result in results),
+        "results": results
+    }
+
 @ai_router.get("/schedule/{date}")
 async def get_day_schedule(date: str):
     """获取指定日期的AI安排"""
@@ -141,27 +442,7 @@ async def get_day_schedule(date: str):
     except ValueError:
         raise HTTPException(status_code=400, detail="日期格式错误，请使用YYYY-MM-DD格式")
     
-    # 检查是否有保存的安排
-    schedule = db.get_day_schedule(date)
-    if schedule:
-        # 检查任务是否发生变化
-        current_tasks = db.get_tasks_for_date(target_date)
-        current_version = AIService._generate_task_version(current_tasks)
-        tasks_changed = schedule.task_version != current_version
-        
-        return {
-            "date": date,
-            "has_schedule": True,
-            "schedule": schedule,
-            "tasks_changed": tasks_changed
-        }
-    else:
-        return {
-            "date": date,
-            "has_schedule": False,
-            "schedule": None,
-            "tasks_changed": False
-        }
+    return AIService.get_schedule_status(target_date)
 
 @ai_router.delete("/schedule/{date}")
 async def delete_day_schedule(date: str):
@@ -180,8 +461,8 @@ async def get_day_schedule_preview(date: str):
     except ValueError:
         raise HTTPException(status_code=400, detail="日期格式错误，请使用YYYY-MM-DD格式")
     
-    # 收集该日期的任务
-    day_tasks = db.get_tasks_for_date(target_date)
+    # 收集该日期的任务（按依赖关系和优先级排好顺序）
+    day_tasks = AIService.order_tasks_for_day(db.get_tasks_for_date(target_date))
     total_estimated_hours = sum(task.estimated_hours or 2.0 for task in day_tasks)
     
     # 统计信息
@@ -208,6 +489,27 @@ async def get_day_schedule_preview(date: str):
         ]
     }
 
+@ai_router.get("/prefetch/metrics")
+async def get_prefetch_metrics():
+    """获取夜间日程预生成的进度和跳过统计"""
+    return SchedulePrefetchService.get_metrics()
+
+@ai_router.post("/prefetch/run")
+async def run_prefetch(background_tasks: BackgroundTasks):
+    """立即执行一轮日程预生成（忽略时间窗口）"""
+    background_tasks.add_task(SchedulePrefetchService.run_once, None, False)
+    return {"status": "processing", "message": "日程预生成已开始"}
+
+@ai_router.get("/router")
+async def get_model_router_status(limit: int = 50):
+    """获取模型路由状态（各模型延迟/错误率EWMA）和最近的路由决策"""
+    return model_router.get_status(limit)
+
+@ai_router.get("/prompt-cache/stats")
+async def get_prompt_cache_stats():
+    """获取相似规划缓存的命中统计"""
+    return prompt_cache.get_stats()
+
 @ai_router.post("/plan-tasks/test")
 async def test_ai_planning(prompt: str = "学习React Native开发", max_tasks: int = 3):
     """测试AI任务规划功能"""
@@ -222,7 +524,8 @@ async def test_ai_planning(prompt: str = "学习React Native开发", max_tasks:
                 return {
                     "success": True,
                     "tasks_created": len(job.result) if job.result else 0,
-                    "tasks": job.result
+                    "tasks": job.result,
+                    "deduplicated": job.deduplicated or []
                 }
             else:
                 return {
@@ -235,12 +538,135 @@ async def test_ai_planning(prompt: str = "学习React Native开发", max_tasks:
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+# ===== 归档路由 =====
+@archive_router.get("")
+async def get_archived_tasks(offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500)):
+    """按归档时间倒序分页获取已归档的任务"""
+    total, encoded_tasks = TaskService.get_archived_tasks(offset, limit)
+    content = (
+        b'{"total":' + dumps(total)
+        + b',"tasks":[' + b",".join(encoded_tasks) + b"]}"
+    )
+    return Response(content=content, media_type="application/json")
+
+@archive_router.get("/metrics")
+async def get_archive_metrics():
+    """获取归档任务数和定期归档的运行指标"""
+    return ArchiveService.get_metrics()
+
+@archive_router.post("/run")
+async def run_archive():
+    """立即归档完成超过宽限期的任务"""
+    return ArchiveService.run_once()
+
+@archive_router.get("/{task_id}", response_model=Task)
+async def get_archived_task(task_id: str):
+    """获取单个归档任务"""
+    task = db.get_archived_task(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="归档任务不存在")
+    return task
+
+@archive_router.post("/{task_id}/restore", response_model=Task)
+async def restore_archived_task(task_id: str):
+    """把归档任务恢复为未完成任务"""
+    try:
+        task = TaskService.restore_archived_task(task_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not task:
+        raise HTTPException(status_code=404, detail="归档任务不存在")
+    return task
+
+@archive_router.delete("/{task_id}")
+async def delete_archived_task(task_id: str):
+    """彻底删除归档任务"""
+    if not db.delete_archived_task(task_id):
+        raise HTTPException(status_code=404, detail="归档任务不存在")
+    return {"message": "归档任务已删除"}
+
+# ===== 统计分析路由 =====
+@analytics_router.get("/completion-rate")
+async def get_completion_rate(request: Request, start: Optional[date] = None, end: Optional[date] = None):
+    """每周完成率（按截止日期所在周，含归档任务），总体和按优先级；默认最近 12 周"""
+    end = end or date.today()
+    start = start or end - timedelta(weeks=12) + timedelta(days=1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start 不能晚于 end")
+    
+    etag = _etag("completion-rate", db.get_version("tasks"), db.get_version("archive"), start, end)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    
+    return Response(
+        content=dumps(TaskService.get_completion_rates(start, end)),
+        media_type="application/json",
+        headers={"ETag": etag}
+    )
+
+@analytics_router.get("/load")
+async def get_daily_load(request: Request, start: Optional[date] = None, end: Optional[date] = None):
+    """未完成任务每天的预计工时负载；默认从今天起 14 天"""
+    start = start or date.today()
+    end = end or start + timedelta(days=13)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start 不能晚于 end")
+    if (end - start).days + 1 > current_settings.DATE_RANGE_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"单次最多查询{current_settings.DATE_RANGE_MAX_DAYS}天")
+    
+    etag = _etag("load", db.get_version("tasks"), start, end)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    
+    return Response(
+        content=dumps(TaskService.get_daily_load(start, end)),
+        media_type="application/json",
+        headers={"ETag": etag}
+    )
+
+@analytics_router.get("/overdue-aging")
+async def get_overdue_aging():
+    """逾期未完成任务按逾期天数分段统计（随当前时间变化，不提供 ETag）"""
+    return Response(content=dumps(TaskService.get_overdue_aging()), media_type="application/json")
+
 # ===== 通用路由 =====
 @general_router.get("/stats", response_model=TaskStatsResponse)
-async def get_stats():
-    """获取任务统计信息"""
+async def get_stats(request: Request, response: Response):
+    """获取任务统计信息；统计依赖当天日期，ETag 同时包含数据版本和日期"""
+    etag = _etag("stats", db.get_version("tasks"), db.get_version("archive"), date.today())
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    
+    response.headers["ETag"] = etag
     return TaskService.get_task_stats()
 
+@general_router.get("/dashboard")
+async def get_dashboard(request: Request):
+    """首页聚合数据：统计、标签、今日任务、重要任务和今日AI安排（一次请求、一次遍历）"""
+    today = date.today()
+    etag = _etag("dashboard", db.get_version("tasks"), db.get_version("day_schedules"), db.get_version("archive"), today)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+    
+    dashboard = TaskService.get_dashboard()
+    schedule_status = dict(dashboard["schedule"])
+    if schedule_status["schedule"] is not None:
+        schedule_status["schedule"] = schedule_status["schedule"].model_dump(mode="json")
+    
+    encode_many = db.encoded_cache.encode_many
+    content = (
+        b'{"stats":' + dumps(dashboard["stats"])
+        + b',"tags":' + dumps(dashboard["tags"])
+        + b',"today_tasks":' + encode_many(dashboard["today_tasks"])
+        + b',"important_tasks":' + encode_many(dashboard["important_tasks"])
+        + b',"schedule":' + dumps(schedule_status) + b"}"
+    )
+    return Response(content=content, media_type="application/json", headers={"ETag": etag})
+
 @general_router.get("/tags", response_model=TagsResponse)
 async def get_available_tags():
     """获取所有可用的标签"""
@@ -0,0 +1,162 @@
+"""
+任务归档模块 - 已完成任务的冷存储
+任务按紧凑的 JSON 字节保存，不再保留 pydantic 对象；配置文件路径时追加写入 JSONL 文件，内存中只保留偏移量，
+失效行（被覆盖的旧记录和墓碑行）多于存活记录时重写文件
+"""
+import json
+import os
+import sys
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from models import Task
+from task_serializer import dumps, task_to_dict
+
+
+class TaskArchive:
+    """已归档任务：任务ID -> JSON 字节（内存模式）或文件中的 (偏移量, 长度)（文件模式），按归档顺序排列"""
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self._records: Dict[str, Union[bytes, Tuple[int, int]]] = {}
+        self._priorities: Dict[str, str] = {}
+        self._by_priority: Counter = Counter()
+        self._file = None
+        self._lines = 0  # 文件中的记录行数（包括失效行）
+        if path:
+            self._file = open(path, "a+b")
+            self._load()
+            self._maybe_compact()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._records
+
+    def _load(self) -> None:
+        """从归档文件恢复索引（删除和恢复以墓碑行记录，后出现的行覆盖前面的行）"""
+        self._file.seek(0)
+        offset = 0
+        for line in self._file:
+            length = len(line.rstrip(b"\n"))
+            if length:
+                self._lines += 1
+                record = json.loads(line)
+                if record.get("_deleted"):
+                    self._forget(record["id"])
+                else:
+                    self._remember(record["id"], record.get("priority"), (offset, length))
+            offset += len(line)
+
+    def _remember(self, task_id: str, priority: Optional[str], record) -> None:
+        self._forget(task_id)
+        priority = sys.intern(priority or "medium")
+        self._records[task_id] = record
+        self._priorities[task_id] = priority
+        self._by_priority[priority] += 1
+
+    def _forget(self, task_id: str) -> None:
+        if self._records.pop(task_id, None) is None:
+            return
+        priority = self._priorities.pop(task_id)
+        self._by_priority[priority] -= 1
+        if not self._by_priority[priority]:
+            del self._by_priority[priority]
+
+    def _append(self, encoded: bytes) -> Tuple[int, int]:
+        """向归档文件追加一行，返回 (偏移量, 长度)"""
+        offset = self._file.seek(0, os.SEEK_END)
+        self._file.write(encoded + b"\n")
+        self._lines += 1
+        return offset, len(encoded)
+
+    def _maybe_compact(self) -> None:
+        """失效行多于存活记录时压缩归档文件"""
+        if self._file and self._lines - len(self._records) > len(self._records):
+            self.compact()
+
+    def compact(self) -> None:
+        """把存活记录按归档顺序写入临时文件后替换归档文件，重新打开并重建偏移量"""
+        temp_path = self.path + ".tmp"
+        records = {}
+        offset = 0
+        with open(temp_path, "wb") as temp:
+            for task_id in self._records:
+                encoded = self.get_encoded(task_id)
+                temp.write(encoded + b"\n")
+                records[task_id] = (offset, len(encoded))
+                offset += len(encoded) + 1
+            temp.flush()
+            os.fsync(temp.fileno())
+        self._file.close()
+        os.replace(temp_path, self.path)
+        self._file = open(self.path, "a+b")
+        self._records = records
+        self._lines = len(records)
+
+    def add_many(self, tasks: List[Task]) -> None:
+        """归档一批任务"""
+        for task in tasks:
+            encoded = dumps(task_to_dict(task))
+            self._remember(task.id, task.priority, self._append(encoded) if self._file else encoded)
+        if self._file:
+            self._file.flush()
+            self._maybe_compact()
+
+    def get_encoded(self, task_id: str) -> Optional[bytes]:
+        """获取归档任务的 JSON 字节"""
+        record = self._records.get(task_id)
+        if record is None or isinstance(record, bytes):
+            return record
+        offset, length = record
+        self._file.seek(offset)
+        return self._file.read(length)
+
+    def get(self, task_id: str) -> Optional[Task]:
+        """获取归档任务"""
+        encoded = self.get_encoded(task_id)
+        return Task.model_validate_json(encoded) if encoded is not None else None
+
+    def tasks(self) -> Iterator[Task]:
+        """按归档顺序逐个解码所有归档任务"""
+        for task_id in list(self._records):
+            yield self.get(task_id)
+
+    def remove(self, task_id: str) -> Optional[Task]:
+        """移出归档（恢复或彻底删除），返回移出的任务"""
+        task = self.get(task_id)
+        if task is None:
+            return None
+        self._forget(task_id)
+        if self._file:
+            self._append(dumps({"id": task_id, "_deleted": True}))
+            self._file.flush()
+            self._maybe_compact()
+        return task
+
+    def page(self, offset: int = 0, limit: int = 50) -> List[bytes]:
+        """按归档时间倒序分页获取任务的 JSON 字节"""
+        return [self.get_encoded(task_id) for task_id in islice(reversed(self._records), offset, offset + limit)]
+
+    def counts(self) -> dict:
+        """归档任务数（总数和按优先级）"""
+        return {"total": len(self._records), "by_priority": dict(self._by_priority)}
+
+    def clear(self, truncate: bool = False) -> None:
+        """清空归档；文件模式下默认只断开与文件的关联（文件保持不变，之后的归档保存在内存中），
+        truncate=True 时清空文件并继续写入"""
+        self._records.clear()
+        self._priorities.clear()
+        self._by_priority.clear()
+        self._lines = 0
+        if not self._file:
+            return
+        if truncate:
+            self._file.truncate(0)
+            self._file.flush()
+        else:
+            self._file.close()
+            self._file = None
+            self.path = ""
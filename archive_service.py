@@ -0,0 +1,59 @@
+"""
+归档服务 - 定期把完成超过宽限期的任务移出热存储
+热存储只保留未完成和刚完成的任务，日历、标签、统计等遍历不再被大量已完成任务拖慢
+"""
+import asyncio
+from typing import Optional
+from datetime import datetime, timedelta
+
+from database import db
+from config import current_settings
+
+
+class ArchiveService:
+    # 运行指标
+    metrics = {
+        "runs": 0,
+        "tasks_archived": 0,
+        "last_run_at": None,
+        "last_run_archived": 0,
+    }
+
+    @staticmethod
+    def run_once(now: Optional[datetime] = None) -> dict:
+        """归档完成时间早于宽限期的任务"""
+        now = now or datetime.now()
+        completed_before = now - timedelta(days=current_settings.ARCHIVE_GRACE_DAYS)
+        archived = db.archive_completed_tasks(completed_before)
+
+        metrics = ArchiveService.metrics
+        metrics["runs"] += 1
+        metrics["tasks_archived"] += archived
+        metrics["last_run_at"] = now.isoformat()
+        metrics["last_run_archived"] = archived
+        if archived:
+            print(f"🗄️ 归档已完成任务 {archived} 个")
+        return {"archived": archived, "completed_before": completed_before.isoformat()}
+
+    @staticmethod
+    async def run_forever():
+        """周期性归档"""
+        while True:
+            try:
+                if current_settings.ARCHIVE_ENABLED:
+                    ArchiveService.run_once()
+            except Exception as e:
+                print(f"任务归档出错: {e}")
+
+            await asyncio.sleep(current_settings.ARCHIVE_CHECK_INTERVAL)
+
+    @staticmethod
+    def get_metrics() -> dict:
+        """获取归档指标和归档任务数"""
+        return {
+            **ArchiveService.metrics,
+            **db.get_archive_counts(),
+            "enabled": current_settings.ARCHIVE_ENABLED,
+            "grace_days": current_settings.ARCHIVE_GRACE_DAYS,
+            "storage": "file" if current_settings.ARCHIVE_PATH else "memory",
+        }
@@ -12,7 +12,10 @@ from typing import Dict, Any
 # 导入主应用
 from main import app
 from database import db
-from models import Task, TaskTag
+from change_log import ChangeLog
+from config import current_settings
+from indexes import DueDateIndex
+from models import Task, TaskTag, AIJob, AIJobStatus
 
 # 创建测试客户端
 client = TestClient(app)
@@ -23,9 +26,7 @@ class TestTaskGenieAPI:
     def setup_method(self):
         """每个测试方法执行前的设置"""
         # 清空数据库
-        db.tasks.clear()
-        db.ai_jobs.clear()
-        db.day_schedules.clear()
+        db.reset()
         print("\n🧹 清空测试数据")
 
     def teardown_method(self):
@@ -80,6 +81,30 @@ class TestTaskGenieAPI:
         print(f"✅ 任务创建成功，ID: {data['id']}")
         return data
 
+    def test_create_tasks_bulk(self):
+        """测试批量创建任务"""
+        print("\n🧪 测试批量创建任务...")
+        
+        tasks_data = [{"name": f"批量任务{i}", "priority": "low"} for i in range(5)]
+        response = client.post("/tasks/bulk", json=tasks_data)
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert len(data) == 5
+        assert len({task["id"] for task in data}) == 5
+        assert len(client.get("/tasks").json()) == 5
+        
+        # ID冲突时整批不写入
+        existing = db.get_task(data[0]["id"])
+        try:
+            db.create_tasks([Task(id="new-task", name="新任务"), existing])
+            assert False, "应该抛出异常"
+        except ValueError:
+            pass
+        assert db.get_task("new-task") is None
+        
+        print(f"✅ 批量创建 {len(data)} 个任务")
+
     def test_get_all_tasks(self):
         """测试获取所有任务"""
         print("\n🧪 测试获取所有任务...")
@@ -109,6 +134,119 @@ class TestTaskGenieAPI:
         print(f"✅ 获取到 {len(data)} 个任务")
         return data
 
+    def test_get_tasks_paginated(self):
+        """测试任务列表的筛选、排序和游标分页"""
+        print("\n🧪 测试任务分页...")
+        
+        base = datetime.now()
+        tasks_data = [
+            {"name": f"任务{i}", "priority": ["low", "medium", "high"][i % 3],
+             "due_date": (base + timedelta(hours=i)).isoformat()}
+            for i in range(12)
+        ]
+        client.post("/tasks/bulk", json=tasks_data)
+        
+        # 按优先级降序、截止日期升序，每页5条
+        collected = []
+        cursor = None
+        while True:
+            params = {"sort": "-priority,due_date", "limit": 5}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/tasks", params=params)
+            assert response.status_code == 200
+            collected.extend(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        
+        assert len(collected) == 12
+        assert len({task["id"] for task in collected}) == 12
+        assert [task["priority"] for task in collected[:4]] == ["high"] * 4
+        assert collected[0]["due_date"] < collected[1]["due_date"]
+        
+        # 筛选
+        response = client.get("/tasks", params={"priority": "low", "due_to": (base + timedelta(hours=6)).isoformat()})
+        assert response.status_code == 200
+        assert len(response.json()) == 3
+        
+        # 带时区的截止日期范围（Z 后缀）与存储的无时区截止时间比较
+        client.post("/tasks/bulk", json=[{"name": "时区任务", "due_date": "2030-01-02T00:00:00"}])
+        for sort in ("created_at", "due_date"):
+            response = client.get("/tasks", params={"sort": sort, "due_from": "2030-01-01T00:00:00Z",
+                                                    "due_to": "2030-01-03T00:00:00Z"})
+            assert response.status_code == 200
+            assert [task["name"] for task in response.json()] == ["时区任务"]
+        response = client.post("/tasks/bulk-update", json={"filter": {"due_from": "2030-01-01T00:00:00Z"},
+                                                           "update": {"priority": "high"}})
+        assert response.status_code == 200
+        
+        # 非法排序字段
+        response = client.get("/tasks", params={"sort": "unknown"})
+        assert response.status_code == 400
+        
+        # 篡改的游标返回400
+        import base64
+        for key, task_id in ((["x"], "id"), (5, "id"), ([0, 1], "id"), ([0, 1, 0], "id"),
+                             ([0, 2, 0, 1.5], 7), ([0, True, 0, 1], "id")):
+            payload = json.dumps(["-priority,due_date", key, task_id]).encode()
+            response = client.get("/tasks", params={"sort": "-priority,due_date",
+                                                    "cursor": base64.urlsafe_b64encode(payload).decode()})
+            assert response.status_code == 400
+        assert client.get("/tasks", params={"cursor": "不是游标"}).status_code == 400
+        
+        print(f"✅ 分页获取 {len(collected)} 个任务")
+
+    def test_export_tasks_stream(self):
+        """测试流式导出任务"""
+        print("\n🧪 测试流式导出任务...")
+        
+        client.post("/tasks/bulk", json=[{"name": f"导出任务{i}"} for i in range(30)])
+        
+        response = client.get("/tasks/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = response.text.strip().split("\n")
+        assert len(lines) == 30
+        assert json.loads(lines[0])["name"].startswith("导出任务")
+        
+        response = client.get("/tasks/export?format=json")
+        assert response.status_code == 200
+        assert len(response.json()) == 30
+        
+        print(f"✅ 导出 {len(lines)} 个任务")
+
+    def test_import_tasks_stream(self):
+        """测试流式批量导入任务"""
+        print("\n🧪 测试批量导入任务...")
+        
+        jsonl_body = "\n".join([
+            json.dumps({"name": "导入任务1", "priority": "high"}, ensure_ascii=False),
+            "{坏的JSON",
+            json.dumps({"description": "缺少名称"}, ensure_ascii=False),
+            json.dumps({"name": "导入任务2", "estimated_hours": 1.5}, ensure_ascii=False),
+        ])
+        response = client.post("/tasks/import", content=jsonl_body.encode("utf-8"))
+        assert response.status_code == 200
+        data = response.json()
+        assert data["imported"] == 2
+        assert data["failed"] == 2
+        assert [error["line"] for error in data["errors"]] == [2, 3]
+        assert "rows_per_second" in data
+        
+        csv_body = 'name,description,priority\n"任务, 带逗号","第一行\n第二行",low\n导入任务4,,medium\n'
+        response = client.post("/tasks/import?format=csv", content=csv_body.encode("utf-8"))
+        assert response.status_code == 200
+        data = response.json()
+        assert data["imported"] == 2
+        assert data["failed"] == 0
+        
+        names = {task["name"] for task in client.get("/tasks").json()}
+        assert "任务, 带逗号" in names
+        assert len(names) == 4
+        
+        print("✅ 批量导入正常")
+
     def test_get_single_task(self):
         """测试获取单个任务"""
         print("\n🧪 测试获取单个任务...")
@@ -164,6 +302,330 @@ class TestTaskGenieAPI:
         
         print(f"✅ 任务更新成功: {data['name']}")
 
+    def test_bulk_update_and_delete(self):
+        """测试批量更新和批量删除"""
+        print("\n🧪 测试批量更新和删除...")
+        
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+        tasks = client.post("/tasks/bulk", json=[
+            {"name": "今天任务1", "due_date": (today + timedelta(hours=10)).isoformat()},
+            {"name": "今天任务2", "due_date": (today + timedelta(hours=15)).isoformat()},
+            {"name": "下周任务", "due_date": (today + timedelta(days=7)).isoformat()},
+        ]).json()
+        
+        # 按筛选条件把今天的任务全部标记完成
+        response = client.post("/tasks/bulk-update", json={
+            "filter": {"due_from": today.isoformat(), "due_to": (today + timedelta(days=1)).isoformat()},
+            "update": {"completed": True}
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert data["updated"] == 2
+        assert all(client.get(f"/tasks/{task['id']}").json()["completed"] for task in tasks[:2])
+        assert db.get_tasks_for_date(today.date()) == []
+        
+        # 批量设置前置任务：依赖自身或成环的任务逐个报告，其余任务照常更新
+        client.put(f"/tasks/{tasks[2]['id']}", json={"depends_on": [tasks[1]["id"]]})
+        response = client.post("/tasks/bulk-update", json={
+            "ids": [task["id"] for task in tasks] + ["missing-id"], "update": {"depends_on": [tasks[2]["id"]]}
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["updated"], data["invalid"]) == (1, 2)
+        assert [(item["id"], item["status"]) for item in data["results"]] == [
+            (tasks[0]["id"], "updated"), (tasks[1]["id"], "invalid"), (tasks[2]["id"], "invalid"), ("missing-id", "not_found")
+        ]
+        assert "成环" in data["results"][1]["detail"] and "自身" in data["results"][2]["detail"]
+        assert client.get(f"/tasks/{tasks[0]['id']}").json()["depends_on"] == [tasks[2]["id"]]
+        assert client.get(f"/tasks/{tasks[1]['id']}").json()["depends_on"] == []
+        
+        # 前置任务不存在时整批拒绝
+        response = client.post("/tasks/bulk-update", json={"ids": [tasks[0]["id"]], "update": {"depends_on": ["missing-id"]}})
+        assert response.status_code == 400
+        
+        # 按ID删除，包含一个不存在的ID
+        response = client.post("/tasks/bulk-delete", json={"ids": [tasks[0]["id"], "missing-id"]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["deleted"] == 1
+        assert {item["id"]: item["status"] for item in data["results"]} == {
+            tasks[0]["id"]: "deleted", "missing-id": "not_found"
+        }
+        assert len(client.get("/tasks").json()) == 2
+        
+        # 不允许无条件批量操作
+        response = client.post("/tasks/bulk-delete", json={})
+        assert response.status_code == 400
+        
+        print("✅ 批量更新和删除正常")
+
+    def test_task_list_cache_invalidation(self):
+        """测试任务列表快速序列化缓存在更新后失效"""
+        print("\n🧪 测试序列化缓存失效...")
+        
+        created_task = client.post("/tasks", json={"name": "缓存任务"}).json()
+        task_id = created_task["id"]
+        
+        assert client.get("/tasks").json()[0]["name"] == created_task["name"]
+        client.put(f"/tasks/{task_id}", json={"name": "改名后的任务"})
+        
+        data = client.get("/tasks").json()
+        assert data[0]["name"] == "改名后的任务"
+        assert data[0] == client.get(f"/tasks/{task_id}").json()
+        
+        print("✅ 序列化缓存失效正常")
+
+    def test_task_field_projection(self):
+        """测试任务列表字段投影"""
+        print("\n🧪 测试字段投影...")
+        
+        client.post("/tasks", json={
+            "name": "投影任务", "description": "很长的描述", "priority": "high",
+            "due_date": "2030-01-15T10:00:00", "scheduled_date": "2030-01-16"
+        })
+        
+        data = client.get("/tasks", params={"fields": "name,priority"}).json()
+        assert set(data[0].keys()) == {"id", "name", "priority"}
+        
+        data = client.get("/tasks", params={"fields": "due_date", "sort": "-priority"}).json()
+        assert data[0]["due_date"] == "2030-01-15T10:00:00"
+        assert set(data[0].keys()) == {"id", "due_date"}
+        
+        # 原先被 /tasks/{task_id} 遮蔽的 /tasks/by-tags 现在可以访问
+        response = client.get("/tasks/by-tags", params={"fields": "name"})
+        assert response.status_code == 200
+        assert response.json()[0]["name"] == "投影任务"
+        
+        calendar = client.get("/tasks/calendar/2030/1", params={"fields": "name"}).json()
+        assert calendar["2030-01-15"]["due"][0].keys() == {"id", "name"}
+        assert calendar["2030-01-16"]["scheduled"][0]["name"] == "投影任务"
+        assert client.get("/tasks/calendar/2030/1").json()["2030-01-15"]["due"][0]["description"] == "很长的描述"
+        
+        response = client.get("/tasks", params={"fields": "name,password"})
+        assert response.status_code == 400
+        
+        print("✅ 字段投影正常")
+
+    def test_conditional_get_etag(self):
+        """测试 ETag 和 If-None-Match 条件请求"""
+        print("\n🧪 测试条件请求...")
+        
+        created_task = client.post("/tasks", json={"name": "日历任务", "due_date": "2030-03-10T09:00:00"}).json()
+        
+        for url in ["/tasks", "/stats", "/tasks/calendar/2030/3"]:
+            response = client.get(url)
+            etag = response.headers["ETag"]
+            assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+        
+        # 查询参数不同，ETag 不同
+        assert client.get("/tasks", params={"fields": "name"}).headers["ETag"] != client.get("/tasks").headers["ETag"]
+        
+        # 其他月份的写操作不影响本月日历的 ETag
+        calendar_etag = client.get("/tasks/calendar/2030/3").headers["ETag"]
+        client.post("/tasks", json={"name": "其他月份", "due_date": "2030-05-01T09:00:00"})
+        assert client.get("/tasks/calendar/2030/3", headers={"If-None-Match": calendar_etag}).status_code == 304
+        
+        # 任务移出本月后，本月日历 ETag 失效
+        client.put(f"/tasks/{created_task['id']}", json={"due_date": "2030-04-01T09:00:00"})
+        response = client.get("/tasks/calendar/2030/3", headers={"If-None-Match": calendar_etag})
+        assert response.status_code == 200
+        assert response.json() == {}
+        
+        tasks_etag = client.get("/tasks").headers["ETag"]
+        client.delete(f"/tasks/{created_task['id']}")
+        assert client.get("/tasks", headers={"If-None-Match": tasks_etag}).status_code == 200
+        
+        print("✅ 条件请求正常")
+
+    def test_task_changes_feed(self):
+        """测试增量同步变更流"""
+        print("\n🧪 测试增量同步...")
+        
+        first = client.post("/tasks", json={"name": "任务A"}).json()
+        second = client.post("/tasks", json={"name": "任务B"}).json()
+        
+        # 过旧的版本需要全量同步
+        data = client.get("/tasks/changes", params={"since": 0}).json()
+        assert data["full_resync"] is True
+        assert len(data["changes"]) == 2
+        version = data["version"]
+        
+        assert client.get("/tasks/changes", params={"since": version}).json()["changes"] == []
+        
+        client.put(f"/tasks/{first['id']}", json={"name": "任务A改"})
+        client.put(f"/tasks/{first['id']}", json={"priority": "high"})
+        client.delete(f"/tasks/{second['id']}")
+        third = client.post("/tasks", json={"name": "任务C"}).json()
+        
+        data = client.get("/tasks/changes", params={"since": version, "fields": "name"}).json()
+        assert data["full_resync"] is False
+        assert [task["id"] for task in data["changes"]] == [first["id"], third["id"]]
+        assert data["changes"][0] == {"id": first["id"], "name": "任务A改"}
+        assert data["deleted"] == [second["id"]]
+        assert data["version"] > version
+        
+        # 压缩后同一任务只保留最新一条，丢弃的历史之前的版本需要全量同步
+        change_log = ChangeLog(max_entries=8, start_version=0)
+        for version in range(1, 13):
+            change_log.record(version, [f"t{version % 3}"])
+        assert len(change_log) <= 8
+        assert change_log.since(9) == (["t1", "t2", "t0"], [])
+        for version in range(13, 25):
+            change_log.record(version, [f"n{version}"])
+        assert change_log.since(1) is None
+        
+        print("✅ 增量同步正常")
+
+    def test_dashboard(self):
+        """测试首页聚合接口与各单独接口一致"""
+        print("\n🧪 测试首页聚合接口...")
+        
+        today = datetime.now().replace(hour=18, minute=0, second=0, microsecond=0)
+        client.post("/tasks", json={"name": "今日重要任务", "priority": "high", "due_date": today.isoformat()})
+        client.post("/tasks", json={"name": "无截止日期任务"})
+        client.post("/tasks", json={"name": "明日任务", "due_date": (today + timedelta(days=1)).isoformat()})
+        
+        response = client.get("/dashboard")
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert data["stats"] == client.get("/stats").json()
+        assert data["tags"] == client.get("/tags").json()
+        assert data["today_tasks"] == client.get("/tasks/by-tag/今日").json()
+        assert data["important_tasks"] == client.get("/tasks/by-tag/重要").json()
+        assert data["schedule"] == client.get(f"/ai/schedule/{today.date().isoformat()}").json()
+        assert len(data["today_tasks"]) == 2
+        assert data["stats"]["due_today"] == 1
+        
+        etag = response.headers["ETag"]
+        assert client.get("/dashboard", headers={"If-None-Match": etag}).status_code == 304
+        
+        print("✅ 首页聚合接口正常")
+
+    def test_batch_get_tasks(self):
+        """测试按ID批量读取任务"""
+        print("\n🧪 测试批量读取...")
+        
+        created = client.post("/tasks/bulk", json=[{"name": f"任务{i}"} for i in range(3)]).json()
+        ids = [created[2]["id"], "not-exist", created[0]["id"], created[2]["id"]]
+        
+        response = client.post("/tasks/batch-get", json={"ids": ids})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["tasks"] == [client.get(f"/tasks/{created[2]['id']}").json(), created[0]]
+        assert data["missing"] == ["not-exist"]
+        
+        data = client.post("/tasks/batch-get", params={"fields": "name"}, json={"ids": ids}).json()
+        assert data["tasks"][0] == {"id": created[2]["id"], "name": "任务2"}
+        
+        too_many = [str(i) for i in range(current_settings.BATCH_GET_MAX_IDS + 1)]
+        assert client.post("/tasks/batch-get", json={"ids": too_many}).status_code == 400
+        
+        print("✅ 批量读取正常")
+
+    def test_search_tasks(self):
+        """测试全文检索"""
+        print("\n🧪 测试全文检索...")
+        
+        french = client.post("/tasks", json={"name": "学习法语语法", "description": "复习动词变位"}).json()
+        client.post("/tasks", json={"name": "整理笔记", "description": "整理法语课的笔记"})
+        python_task = client.post("/tasks", json={"name": "Python 练习", "description": "FastAPI 教程"}).json()
+        
+        response = client.get("/tasks/search", params={"q": "法语"})
+        assert response.status_code == 200
+        results = response.json()
+        assert response.headers["X-Total-Count"] == "2"
+        # 名称命中的任务排在前面
+        assert results[0]["id"] == french["id"]
+        
+        assert [task["id"] for task in client.get("/tasks/search", params={"q": "fast*"}).json()] == [python_task["id"]]
+        assert [task["id"] for task in client.get("/tasks/search", params={"q": "PYTHON 教程"}).json()] == [python_task["id"]]
+        assert client.get("/tasks/search", params={"q": "法语 python"}).json() == []
+        
+        # 索引随更新和删除增量维护
+        client.put(f"/tasks/{python_task['id']}", json={"name": "Rust 练习", "description": ""})
+        assert client.get("/tasks/search", params={"q": "python"}).json() == []
+        assert client.get("/tasks/search", params={"q": "rust", "fields": "name"}).json() == [
+            {"id": python_task["id"], "name": "Rust 练习"}
+        ]
+        client.delete(f"/tasks/{french['id']}")
+        assert client.get("/tasks/search", params={"q": "法语"}).headers["X-Total-Count"] == "1"
+        
+        print("✅ 全文检索正常")
+
+    def test_due_range_and_next_up(self):
+        """测试截止时间范围查询和最紧急任务"""
+        print("\n🧪 测试截止时间索引...")
+        
+        now = datetime.now()
+        def create(name, hours, priority="medium"):
+            return client.post("/tasks", json={
+                "name": name, "priority": priority, "due_date": (now + timedelta(hours=hours)).isoformat()
+            }).json()
+        
+        overdue = create("已逾期", -5, "low")
+        soon_low = create("明天低优先级", 20, "low")
+        later_high = create("两天后高优先级", 50, "high")
+        far = create("下周", 24 * 7)
+        completed = create("已完成", 10, "high")
+        client.put(f"/tasks/{completed['id']}", json={"completed": True})
+        client.post("/tasks", json={"name": "没有截止日期"})
+        
+        data = client.get("/tasks/due", params={"within_hours": 72}).json()
+        assert [task["id"] for task in data] == [soon_low["id"], later_high["id"]]
+        
+        data = client.get("/tasks/due", params={"due_to": now.isoformat()}).json()
+        assert [task["id"] for task in data] == [overdue["id"]]
+        
+        # 高优先级提前48小时：有效截止时间早于20小时后到期的低优先级任务
+        data = client.get("/tasks/next-up", params={"k": 3, "fields": "name"}).json()
+        assert [task["id"] for task in data] == [overdue["id"], later_high["id"], soon_low["id"]]
+        
+        # 与全量排序结果一致
+        index = DueDateIndex()
+        tasks = [Task(id=str(i), name=f"任务{i}", priority=["low", "medium", "high"][i % 3],
+                      due_date=now + timedelta(hours=(i * 37) % 500 - 100)) for i in range(300)]
+        index.build(tasks)
+        leads = {"high": 48 * 3600, "medium": 24 * 3600, "low": 0}
+        priorities = {task.id: task.priority for task in tasks}
+        expected = sorted((task.due_date.timestamp() - leads[task.priority], task.id) for task in tasks)[:10]
+        assert index.most_urgent(10, leads, priorities.get) == expected
+        
+        print("✅ 截止时间索引正常")
+
+    def test_calendar_counts(self):
+        """测试日历计数与日历任务数据一致，并随写操作更新"""
+        print("\n🧪 测试日历计数...")
+        
+        high = client.post("/tasks", json={
+            "name": "高优先级", "priority": "high", "due_date": "2030-01-31T10:00:00", "scheduled_date": "2030-02-01"
+        }).json()
+        client.post("/tasks", json={"name": "低优先级", "priority": "low", "due_date": "2030-01-31T18:00:00"})
+        client.post("/tasks", json={"name": "三月", "scheduled_date": "2030-03-05"})
+        
+        response = client.get("/tasks/calendar-counts", params={"start": "2030-01-01", "end": "2030-03-31"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["priorities"] == ["low", "medium", "high"]
+        assert data["days"] == {
+            "2030-01-31": {"due": [1, 0, 1], "scheduled": [0, 0, 0]},
+            "2030-02-01": {"due": [0, 0, 0], "scheduled": [0, 0, 1]},
+            "2030-03-05": {"due": [0, 0, 0], "scheduled": [0, 1, 0]},
+        }
+        
+        # 与按月获取的日历任务数量一致
+        calendar = client.get("/tasks/calendar/2030/1").json()
+        assert len(calendar["2030-01-31"]["due"]) == sum(data["days"]["2030-01-31"]["due"])
+        
+        client.put(f"/tasks/{high['id']}", json={"completed": True})
+        data = client.get("/tasks/calendar-counts", params={"start": "2030-01-01", "end": "2030-02-28"}).json()
+        assert data["days"] == {"2030-01-31": {"due": [1, 0, 0], "scheduled": [0, 0, 0]}}
+        
+        response = client.get("/tasks/calendar-counts", params={"start": "2030-01-01", "end": "2031-12-31"})
+        assert response.status_code == 400
+        
+        print("✅ 日历计数正常")
+
     def test_delete_task(self):
         """测试删除任务"""
         print("\n🧪 测试删除任务...")
@@ -428,6 +890,588 @@ class TestTaskGenieAPI:
         
         print(f"✅ 日程预览: {data['task_count']}个任务，{data['total_estimated_hours']}小时")
 
+    def test_schedule_prefetch_skips_unchanged(self):
+        """测试日程预生成跳过任务未变化的日期"""
+        print("\n🧪 测试日程预生成...")
+        
+        from ai_service import AIService
+        from models import DaySchedule
+        from schedule_prefetch_service import SchedulePrefetchService
+        
+        today = datetime.now().date()
+        task_data = {
+            "name": "今天的任务",
+            "due_date": datetime.combine(today, datetime.min.time()).isoformat(),
+            "priority": "high"
+        }
+        client.post("/tasks", json=task_data)
+        
+        # 预先保存与当前任务版本一致的安排
+        version = AIService._generate_task_version(db.get_tasks_for_date(today))
+        db.create_day_schedule(today.isoformat(), DaySchedule(
+            date=today,
+            created_at=datetime.now(),
+            updated_at=datetime.now(),
+            schedule_items=[],
+            suggestions=[],
+            total_hours=0,
+            efficiency_score=8,
+            task_version=version
+        ))
+        
+        before = SchedulePrefetchService.metrics["dates_skipped_unchanged"]
+        result = asyncio.run(SchedulePrefetchService.run_once(respect_window=False))
+        assert result["completed"] is True
+        assert result["skipped_unchanged"] >= 1
+        assert result["generated"] == 0
+        
+        response = client.get("/ai/prefetch/metrics")
+        assert response.status_code == 200
+        assert response.json()["dates_skipped_unchanged"] > before
+        
+        print(f"✅ 日程预生成跳过了 {result['skipped_unchanged']} 个未变化的日期")
+
+    def test_schedule_prefetch_recurring_and_window(self):
+        """测试日程预生成包含重复任务实例的日期，时间窗口按注入的时钟判断"""
+        print("\n🧪 测试日程预生成的重复任务和时间窗口...")
+        
+        from schedule_prefetch_service import SchedulePrefetchService
+        
+        now = datetime(2030, 3, 1, 3, 0)
+        start = now.date() + timedelta(days=1)
+        client.post("/tasks", json={
+            "name": "晨跑", "scheduled_date": start.isoformat(),
+            "recurrence": {"freq": "daily", "interval": 2}
+        })
+        # 只有重复任务实例的日期也要预生成
+        end = now.date() + timedelta(days=6)
+        assert db.get_pending_dates(now.date(), end) == [start + timedelta(days=offset) for offset in (0, 2, 4)]
+        
+        # 开始时在时间窗口内，处理第一个日期前时钟已走出窗口，与真实时间无关
+        ticks = iter([now, now.replace(hour=6)])
+        result = asyncio.run(SchedulePrefetchService.run_once(clock=lambda: next(ticks)))
+        assert result["started"] is True
+        assert result["completed"] is False
+        assert result["scanned"] == 0
+        assert SchedulePrefetchService.metrics["last_run_started_at"] == now.isoformat()
+        
+        # 传入窗口外的 now 时直接停止
+        result = asyncio.run(SchedulePrefetchService.run_once(now.replace(hour=12)))
+        assert result["completed"] is False
+        assert result["scanned"] == 0
+        
+        print("✅ 重复任务日期已包含，时间窗口按注入时钟判断")
+
+    def test_schedules_range(self):
+        """测试按日期范围获取日程安排及其过期标记"""
+        print("\n🧪 测试日程安排范围查询...")
+        
+        from ai_service import AIService
+        from models import DaySchedule
+        
+        start = datetime(2030, 6, 1).date()
+        tasks = []
+        for offset in range(3):
+            day = start + timedelta(days=offset)
+            tasks.append(client.post("/tasks", json={"name": f"任务{offset}", "scheduled_date": day.isoformat()}).json())
+            db.create_day_schedule(day.isoformat(), DaySchedule(
+                date=day, created_at=datetime.now(), updated_at=datetime.now(), schedule_items=[],
+                suggestions=[], total_hours=0, efficiency_score=8,
+                task_version=AIService.get_date_task_version(day)
+            ))
+        # 范围外的安排不返回
+        db.create_day_schedule("2030-05-01", db.get_day_schedule("2030-06-01"))
+        
+        client.put(f"/tasks/{tasks[1]['id']}", json={"name": "改名"})
+        
+        response = client.get("/ai/schedules", params={"start": "2030-06-01", "end": "2030-06-30"})
+        assert response.status_code == 200
+        schedules = response.json()["schedules"]
+        assert [item["date"] for item in schedules] == ["2030-06-01", "2030-06-02", "2030-06-03"]
+        assert [item["tasks_changed"] for item in schedules] == [False, True, False]
+        assert client.get("/ai/schedule/2030-06-02").json()["tasks_changed"] is True
+        
+        # 任务版本号按日期桶版本缓存，与重新计算的结果一致
+        day = start + timedelta(days=1)
+        assert AIService.get_date_task_version(day) == AIService._generate_task_version(db.get_tasks_for_date(day))
+        
+        # 缓存有上限，按最久未使用淘汰
+        max_entries = current_settings.DATE_RANGE_MAX_DAYS + current_settings.SCHEDULE_PREFETCH_DAYS_AHEAD + 1
+        for offset in range(max_entries + 10):
+            AIService.get_date_task_version(start + timedelta(days=100 + offset))
+        assert len(AIService._task_version_cache) == max_entries
+        assert day not in AIService._task_version_cache
+        
+        db.delete_day_schedule("2030-06-02")
+        schedules = client.get("/ai/schedules", params={"start": "2030-06-02", "end": "2030-06-03"}).json()["schedules"]
+        assert [item["date"] for item in schedules] == ["2030-06-03"]
+        
+        print("✅ 日程安排范围查询正常")
+
+    def test_recurring_tasks(self):
+        """测试重复任务按查询日期展开实例"""
+        print("\n🧪 测试重复任务...")
+        
+        today = datetime.now().date()
+        start = today + timedelta(days=1)
+        habit = client.post("/tasks", json={
+            "name": "晨跑", "priority": "high",
+            "due_date": datetime.combine(start, datetime.min.time()).replace(hour=7).isoformat(),
+            "recurrence": {"freq": "daily", "interval": 2}
+        }).json()
+        weekly = client.post("/tasks", json={
+            "name": "周报", "scheduled_date": today.isoformat(),
+            "recurrence": {"freq": "weekly", "weekdays": [today.weekday()], "until": (today + timedelta(days=14)).isoformat()}
+        }).json()
+        assert len(db.tasks) == 2
+        
+        # 只存一条任务，按日期展开实例（截止时刻保留）
+        occurrences = db.get_tasks_for_date(start + timedelta(days=4))
+        assert [(task.id, task.due_date.hour) for task in occurrences] == [(habit["id"], 7)]
+        assert db.get_tasks_for_date(start + timedelta(days=3)) == []
+        assert [task.id for task in db.get_tasks_for_date(today + timedelta(days=14))] == [weekly["id"]]
+        assert [task.id for task in db.get_tasks_for_date(today + timedelta(days=21))] == [habit["id"]]
+        assert db.get_dates_version(today, today) >= db.versions["tasks"]
+        
+        # 日历计数和月历包含展开的实例
+        counts = client.get("/tasks/calendar-counts", params={
+            "start": start.isoformat(), "end": (start + timedelta(days=9)).isoformat()
+        }).json()["days"]
+        assert [day for day, value in counts.items() if value["due"][2]] == \
+            [(start + timedelta(days=offset)).isoformat() for offset in range(0, 10, 2)]
+        calendar = client.get(f"/tasks/calendar/{start.year}/{start.month}").json()
+        assert calendar[start.isoformat()]["due"][0]["occurrence_date"] == start.isoformat()
+        
+        # 标签和统计按今天/明天是否有实例计算
+        from tag_service import TagService
+        assert TagService.get_task_tags(db.get_task(habit["id"])) == ["明日", "重要"]
+        stats = client.get("/stats").json()
+        assert stats["due_today"] == 1 and stats["overdue"] == 0
+        
+        # 完成某一天的实例后该日不再展开
+        response = client.post(f"/tasks/{habit['id']}/occurrences/{start.isoformat()}/complete")
+        assert response.status_code == 200
+        assert db.get_tasks_for_date(start) == []
+        assert client.post(f"/tasks/{habit['id']}/occurrences/{start.isoformat()}/complete").status_code == 400
+        
+        # 例外日期以集合存储，输出为升序列表；不可能再有实例的日期被清理
+        later, earlier = start + timedelta(days=4), start + timedelta(days=2)
+        client.post(f"/tasks/{habit['id']}/occurrences/{later.isoformat()}/complete")
+        db.get_task(habit["id"]).recurrence.exceptions.add(start - timedelta(days=30))
+        response = client.post(f"/tasks/{habit['id']}/occurrences/{earlier.isoformat()}/complete")
+        assert response.json()["recurrence"]["exceptions"] == [d.isoformat() for d in (start, earlier, later)]
+        assert client.get("/tasks").json()[0]["recurrence"]["exceptions"] == response.json()["recurrence"]["exceptions"]
+        
+        print("✅ 重复任务正常")
+
+    def test_archive_completed_tasks(self):
+        """测试已完成任务归档、查询和恢复"""
+        print("\n🧪 测试任务归档...")
+        
+        import os
+        import tempfile
+        from archive import TaskArchive
+        
+        old = client.post("/tasks", json={"name": "旧任务", "priority": "high"}).json()
+        recent = client.post("/tasks", json={"name": "刚完成"}).json()
+        active = client.post("/tasks", json={"name": "进行中", "depends_on": [old["id"]]}).json()
+        client.put(f"/tasks/{old['id']}", json={"completed": True})
+        client.put(f"/tasks/{recent['id']}", json={"completed": True})
+        assert db.get_task(recent["id"]).completed_at is not None
+        
+        # 完成超过宽限期的任务移出热存储，增量同步表现为删除
+        db.get_task(old["id"]).completed_at = datetime.now() - timedelta(days=30)
+        version = db.get_version("tasks")
+        assert client.post("/archive/run").json()["archived"] == 1
+        assert set(db.tasks) == {recent["id"], active["id"]}
+        assert client.get("/tasks/changes", params={"since": version}).json()["deleted"] == [old["id"]]
+        assert client.get("/stats").json()["archived"] == 1
+        
+        data = client.get("/archive").json()
+        assert data["total"] == 1 and data["tasks"][0]["id"] == old["id"]
+        assert client.get(f"/archive/{old['id']}").json()["priority"] == "high"
+        assert client.get("/archive/metrics").json()["by_priority"] == {"high": 1}
+        
+        # 已归档的前置任务视为已完成
+        assert active["id"] in [task["id"] for task in client.get("/tasks/ready").json()]
+        assert client.post("/tasks", json={"name": "后续", "depends_on": [old["id"]]}).status_code == 200
+        
+        # 恢复为未完成任务
+        restored = client.post(f"/archive/{old['id']}/restore").json()
+        assert restored["completed"] is False and restored["completed_at"] is None
+        assert old["id"] in db.tasks and client.get(f"/archive/{old['id']}").status_code == 404
+        
+        # 文件模式：重新打开后归档仍在，删除以墓碑行记录
+        path = os.path.join(tempfile.mkdtemp(), "archive.jsonl")
+        archive = TaskArchive(path)
+        archive.add_many([db.get_task(recent["id"]), db.get_task(active["id"])])
+        archive.remove(active["id"])
+        reopened = TaskArchive(path)
+        assert len(reopened) == 1 and reopened.get(recent["id"]).name == "刚完成"
+        
+        # 反复恢复和重新归档后文件被压缩，重新打开后计数一致
+        for _ in range(10):
+            archive.add_many([db.get_task(old["id"]), db.get_task(active["id"])])
+            archive.remove(old["id"])
+        with open(path, "rb") as archive_file:
+            assert len(archive_file.read().splitlines()) <= 2 * len(archive)
+        assert TaskArchive(path).counts() == archive.counts() == {"total": 2, "by_priority": {"medium": 2}}
+        
+        # 清空（测试用的重置）不会删除归档文件
+        archive.clear()
+        assert len(archive) == 0 and len(TaskArchive(path)) == 2
+        
+        print("✅ 任务归档正常")
+
+    def test_free_slots_and_conflicts(self):
+        """测试空闲时间段查询和跨天冲突检查"""
+        print("\n🧪 测试空闲时间段和冲突检查...")
+        
+        from models import DaySchedule, TaskScheduleItem
+        from time_slots import parse_hhmm
+        
+        def item(task_id, start_time, end_time):
+            return TaskScheduleItem(task_id=task_id, task_name=task_id, start_time=start_time, end_time=end_time,
+                                    duration=0, priority="medium", reason="")
+        
+        day = datetime(2030, 7, 1).date()
+        db.create_day_schedule(day.isoformat(), DaySchedule(
+            date=day, created_at=datetime.now(), updated_at=datetime.now(),
+            schedule_items=[item("a", "09:00", "10:30"), item("b", "10:00", "11:00"),
+                            item("c", "13:00", "14:00"), item("d", "8点", "9点")],
+            suggestions=[], total_hours=0, efficiency_score=8, task_version=""
+        ))
+        
+        # 下午 12:00-18:00 找 90 分钟：13:00-14:00 被占用
+        response = client.get("/ai/free-slots", params={"date": "2030-07-01", "duration": 90,
+                                                         "after": "12:00", "before": "18:00"})
+        assert response.status_code == 200
+        assert response.json()["slots"] == [{"start_time": "14:00", "end_time": "18:00", "minutes": 240}]
+        
+        # 默认窗口：重叠的 a、b 合并为 09:00-11:00
+        slots = client.get("/ai/free-slots", params={"date": "2030-07-01", "duration": 60}).json()["slots"]
+        assert [(slot["start_time"], slot["end_time"]) for slot in slots] == [("11:00", "13:00"), ("14:00", "22:00")]
+        assert client.get("/ai/free-slots", params={"date": "2030-07-02", "duration": 60}).json()["slots"][0]["minutes"] == 780
+        assert client.get("/ai/free-slots", params={"date": "2030-07-01", "duration": 60, "after": "25:00"}).status_code == 400
+        
+        response = client.post("/ai/schedule-conflicts", json={"slots": [
+            {"date": "2030-07-01", "start_time": "10:15", "end_time": "10:45"},
+            {"date": "2030-07-01", "start_time": "11:00", "end_time": "13:00"},
+            {"date": "2030-07-02", "start_time": "10:00", "end_time": "11:00"},
+        ]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["has_conflicts"] is True
+        assert [[c["task_id"] for c in result["conflicts"]] for result in data["results"]] == [["a", "b"], [], []]
+        
+        # 删除安排后时间段释放
+        db.delete_day_schedule(day.isoformat())
+        assert client.post("/ai/schedule-conflicts", json={"slots": [
+            {"date": "2030-07-01", "start_time": "10:15", "end_time": "10:45"}]}).json()["has_conflicts"] is False
+        assert parse_hhmm("24:00") == 1440
+        
+        # 很长的区间与许多短区间并存时，冲突查询仍只返回重叠的区间
+        from time_slots import DaySlots
+        slots = DaySlots([(0, 1440, "all-day")] + [(m, m + 5, f"s{m}") for m in range(0, 1440, 10)])
+        assert [c[2] for c in slots.conflicts(603, 604)] == ["all-day", "s600"]
+        assert [c[2] for c in slots.conflicts(606, 609)] == ["all-day"]
+        
+        print("✅ 空闲时间段和冲突检查正常")
+    
+    def test_compact_task_records(self):
+        """测试数据库以紧凑记录存储任务，API 边界转换为 Task"""
+        print("\n🧪 测试紧凑任务记录...")
+        
+        from task_record import TaskRecord
+        
+        created = client.post("/tasks", json={"name": "记录任务", "priority": "high"}).json()
+        stored = db.get_task(created["id"])
+        assert isinstance(stored, TaskRecord)
+        assert not hasattr(stored, "__dict__")
+        
+        # 优先级驻留为共享对象，默认的可变字段不在记录间共享
+        other = db.create_task(Task(id="record-2", name="另一个", priority="".join("high")))
+        assert other.priority is stored.priority
+        assert other.depends_on is not stored.depends_on
+        
+        # API 返回与 Task 一致的字段
+        response = client.put(f"/tasks/{created['id']}", json={"completed": True})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["completed"] is True and data["completed_at"] is not None
+        assert client.get(f"/tasks/{created['id']}").json() == data
+        assert stored.to_task() == Task.model_validate(data)
+        
+        # 服务返回独立的 Task，修改它不影响存储的记录
+        from task_service import TaskService
+        returned = TaskService.get_task(created["id"])
+        assert isinstance(returned, Task)
+        returned.name = "改名"
+        returned.depends_on.append("x")
+        assert stored.name == "记录任务" and stored.depends_on == []
+        
+        print("✅ 紧凑任务记录正常")
+    
+    def test_task_analytics(self):
+        """测试按列统计：每周完成率、每日负载、逾期分段"""
+        print("\n🧪 测试统计分析...")
+        
+        from analytics import TaskColumns
+        
+        # 2030-07-01 为周一
+        def create(name, due, priority="medium", hours=None, **extra):
+            return client.post("/tasks", json={"name": name, "due_date": due, "priority": priority,
+                                               "estimated_hours": hours, **extra}).json()
+        
+        a = create("周一高", "2030-07-01T10:00:00", "high", 2)
+        create("周二高", "2030-07-02T10:00:00", "high", 1.5)
+        c = create("周三低", "2030-07-03T23:30:00", "low")
+        d = create("下周中", "2030-07-08T09:00:00", "medium", 3, scheduled_date="2030-07-02")
+        create("每天", "2030-07-01T08:00:00", recurrence={"freq": "daily"})
+        client.put(f"/tasks/{a['id']}", json={"completed": True})
+        client.put(f"/tasks/{c['id']}", json={"completed": True})
+        
+        # 归档的已完成任务仍计入完成率
+        db.archive_completed_tasks(datetime.now() + timedelta(days=1))
+        assert db.get_task(a["id"]) is None
+        
+        response = client.get("/analytics/completion-rate", params={"start": "2030-07-01", "end": "2030-07-14"})
+        assert response.status_code == 200
+        weeks = response.json()["weeks"]
+        assert [week["week_start"] for week in weeks] == ["2030-07-01", "2030-07-08"]
+        assert (weeks[0]["total"], weeks[0]["completed"], weeks[0]["rate"]) == (3, 2, 0.6667)
+        assert weeks[0]["by_priority"]["high"] == {"total": 2, "completed": 1, "rate": 0.5}
+        assert weeks[1]["by_priority"] == {"medium": {"total": 1, "completed": 0, "rate": 0.0}}
+        etag = response.headers["ETag"]
+        assert client.get("/analytics/completion-rate", params={"start": "2030-07-01", "end": "2030-07-14"},
+                          headers={"If-None-Match": etag}).status_code == 304
+        
+        # 负载按计划日期（没有时按截止日期），已完成和重复任务不计
+        load = client.get("/analytics/load", params={"start": "2030-07-01", "end": "2030-07-03"}).json()
+        assert [(day["date"], day["tasks"], day["hours"]) for day in load["days"]] == [
+            ("2030-07-01", 0, 0.0), ("2030-07-02", 2, 4.5), ("2030-07-03", 0, 0.0)]
+        assert load["total_hours"] == 4.5
+        from analytics import ENGINE
+        assert load["engine"] == ENGINE
+        assert client.get("/analytics/load", params={"start": "2030-07-03", "end": "2030-07-01"}).status_code == 400
+        
+        # 逾期分段
+        now = datetime.now()
+        create("刚逾期", (now - timedelta(hours=2)).isoformat(), "high", 1)
+        create("逾期两天", (now - timedelta(days=2)).isoformat())
+        create("逾期很久", (now - timedelta(days=40)).isoformat(), "low", 4)
+        done = create("逾期已完成", (now - timedelta(days=2)).isoformat())
+        client.put(f"/tasks/{done['id']}", json={"completed": True})
+        aging = client.get("/analytics/overdue-aging").json()
+        assert aging["total"] == 3
+        buckets = {bucket["label"]: bucket for bucket in aging["buckets"]}
+        assert buckets["1天内"]["by_priority"] == {"high": 1} and buckets["1天内"]["hours"] == 1.0
+        assert buckets["1-3天"]["count"] == 1
+        assert buckets["30天以上"]["count"] == 1 and buckets["30天以上"]["max_days"] is None
+        
+        # 删除后的行被复用
+        columns = db.task_columns
+        rows = len(columns.alive)
+        client.delete(f"/tasks/{d['id']}")
+        create("复用行", "2030-07-09T09:00:00")
+        assert len(columns.alive) == rows and isinstance(columns, TaskColumns)
+        
+        print("✅ 统计分析正常")
+
+    def test_model_router(self):
+        """测试按请求复杂度和错误率路由模型"""
+        print("\n🧪 测试模型路由...")
+        
+        from config import current_settings
+        from model_router import ModelRouter
+        
+        original = (current_settings.AI_FAST_MODEL, current_settings.AI_STRONG_MODEL)
+        current_settings.AI_FAST_MODEL, current_settings.AI_STRONG_MODEL = "fast-model", "strong-model"
+        try:
+            router = ModelRouter()
+            assert router.route("task_planning", prompt_chars=4, max_tasks=2) == ("fast-model", None)
+            assert router.route("task_planning", prompt_chars=200, max_tasks=8)[0] == "strong-model"
+            assert router.route("day_schedule", task_count=12)[0] == "strong-model"
+            
+            # 强模型持续失败后，大请求改走快速模型
+            for _ in range(10):
+                router.record("strong-model", 1.0, False)
+            assert router.route("day_schedule", task_count=12)[0] == "fast-model"
+            
+            status = router.get_status()
+            assert status["models"]["strong-model"]["failures"] == 10
+            assert len(status["recent_decisions"]) == 4
+            
+            # 冷却期后放行一次探测请求，探测成功后恢复路由到首选模型
+            now = [0.0]
+            router = ModelRouter(clock=lambda: now[0])
+            route = lambda: router.route("day_schedule", task_count=12)
+            assert route() == ("strong-model", None)
+            assert route() == ("strong-model", None)  # 模型变得不健康前发出、稍后返回的请求
+            router.record("strong-model", 60.0, True)  # 一次很慢的调用即超出延迟预算
+            assert route()[0] == "fast-model"
+            now[0] += current_settings.AI_ROUTER_PROBE_INTERVAL - 1
+            assert route()[0] == "fast-model"
+            now[0] += 1
+            model, probe = route()
+            assert model == "strong-model" and probe is not None  # 探测
+            assert route()[0] == "fast-model"  # 探测返回前不再放行
+            router.record("strong-model", 1.0, True)  # 早先请求的成功不算探测结果
+            assert route()[0] == "fast-model"
+            router.record("strong-model", 2.0, False, probe)  # 探测失败，继续冷却
+            now[0] += 1
+            assert route()[0] == "fast-model"
+            now[0] += current_settings.AI_ROUTER_PROBE_INTERVAL
+            model, probe = route()
+            assert model == "strong-model"
+            router.record("strong-model", 2.0, True, probe)  # 探测成功，模型恢复
+            assert route() == ("strong-model", None)
+            assert route() == ("strong-model", None)
+        finally:
+            current_settings.AI_FAST_MODEL, current_settings.AI_STRONG_MODEL = original
+        
+        response = client.get("/ai/router")
+        assert response.status_code == 200
+        assert "recent_decisions" in response.json()
+        
+        print("✅ 模型路由正常")
+
+    def test_similar_prompt_cache(self):
+        """测试相似目标复用缓存的规划结果"""
+        print("\n🧪 测试相似规划缓存...")
+        
+        from ai_service import AIService
+        from prompt_cache import prompt_cache
+        
+        prompt_cache.clear()
+        cached_tasks = [
+            {"name": f"学习法语第{i + 1}课", "description": "每天晚上20:00-20:30学习一课法语，完成课后练习并复习单词", "priority": "medium"}
+            for i in range(3)
+        ]
+        prompt_cache.store("学习法语", "learning", "法语入门", cached_tasks)
+        
+        # 相似目标命中缓存，不调用AI
+        job_id = "cache-test-job"
+        db.create_ai_job(AIJob(job_id=job_id, status=AIJobStatus.PENDING, created_at=datetime.now()))
+        asyncio.run(AIService.process_task_planning(job_id, "我想学习法语基础", 3))
+        
+        job = db.get_ai_job(job_id)
+        assert job.status == AIJobStatus.COMPLETED
+        assert len(job.result) == 3
+        assert all(task["name"].startswith("法语入门") for task in job.result)
+        # 截止日期相对当前时间重新计算
+        assert all(task["due_date"] > datetime.now() for task in job.result)
+        
+        # 不同语种不应命中
+        assert prompt_cache.lookup("学习德语", "learning") is None
+        
+        # 等长的单字替换（相似度约 0.57 / 0.7）不应命中，只多出修饰词的仍命中
+        prompt_cache.store("学习法语基础", "learning", "法语基础", cached_tasks)
+        prompt_cache.store("每天学习法语基础语法", "learning", "法语语法", cached_tasks)
+        assert prompt_cache.lookup("学习日语基础", "learning") is None
+        assert prompt_cache.lookup("每天学习日语基础语法", "learning") is None
+        assert prompt_cache.lookup("每天学习法语基础", "learning") is not None
+        
+        print("✅ 相似规划缓存命中正常")
+
+    def test_ai_plan_deduplication(self):
+        """测试AI规划结果与已有任务去重"""
+        print("\n🧪 测试AI规划去重...")
+        
+        from ai_service import AIService
+        
+        ai_tasks = [
+            {"name": "背诵法语单词", "description": "每天晚上20:00-20:30背诵30个法语单词，使用Anki软件复习", "priority": "medium"},
+            {"name": "练习法语听力", "description": "每天早上7:00-7:30听30分钟法语播客，记录10个生词", "priority": "low"},
+        ]
+        
+        first = AIService._create_tasks_from_ai_result([dict(t) for t in ai_tasks], "法语入门", 2, datetime.now())
+        assert len(first) == 2
+        
+        # 主题不同但内容相同的规划，全部判定为重复
+        deduplicated = []
+        second = AIService._create_tasks_from_ai_result(
+            [dict(t) for t in ai_tasks], "法语学习计划", 2, datetime.now(), deduplicated
+        )
+        assert len(second) == 0
+        assert len(deduplicated) == 2
+        assert {d["existing_task_id"] for d in deduplicated} == {t.id for t in first}
+        assert all(d["action"] == "skipped" for d in deduplicated)
+        assert len(db.get_all_tasks()) == 2
+        
+        # merge 模式：合并到已有任务与新任务在同一次写入中完成，只产生一个版本
+        original_mode = current_settings.AI_DEDUP_MODE
+        current_settings.AI_DEDUP_MODE = "merge"
+        try:
+            version = db.get_version("tasks")
+            merged = []
+            new_tasks = AIService._create_tasks_from_ai_result(
+                [dict(t, priority="high") for t in ai_tasks]
+                + [{"name": "编写Flutter移动应用原型", "description": "使用Flutter完成登录和首页两个页面，并在模拟器上运行演示"}],
+                "法语冲刺", 3, datetime.now(), merged
+            )
+            assert len(new_tasks) == 1 and [d["action"] for d in merged] == ["merged", "merged"]
+            assert all(db.get_task(t.id).priority == "high" for t in first)
+            assert db.get_version("tasks") == version + 1
+            _, changed, _ = db.get_changes(version)
+            assert {task.id for task in changed} == {t.id for t in first} | {new_tasks[0].id}
+        finally:
+            current_settings.AI_DEDUP_MODE = original_mode
+        
+        # 不相关的任务正常创建
+        other = AIService._create_tasks_from_ai_result(
+            [{"name": "搭建React Native开发环境", "description": "安装Node.js和Android Studio，运行示例项目并截图记录"}],
+            "RN开发", 1, datetime.now()
+        )
+        assert len(other) == 1
+        
+        print(f"✅ 去重 {len(deduplicated)} 个重复任务")
+
+    def test_task_dependencies(self):
+        """测试任务依赖：可开始任务、环检测、AI规划步骤和日程顺序"""
+        print("\n🧪 测试任务依赖...")
+        
+        from ai_service import AIService
+        from models import TaskScheduleItem
+        
+        design = client.post("/tasks", json={"name": "设计", "due_date": "2030-01-03T18:00:00"}).json()
+        build = client.post("/tasks", json={"name": "开发", "depends_on": [design["id"]], "due_date": "2030-01-02T18:00:00"}).json()
+        test = client.post("/tasks", json={"name": "测试", "depends_on": [build["id"]]}).json()
+        assert [task["id"] for task in client.get("/tasks/ready").json()] == [design["id"]]
+        assert client.post("/tasks", json={"name": "x", "depends_on": ["不存在"]}).status_code == 400
+        
+        # 成环和依赖自身被拒绝，且不修改任务
+        response = client.put(f"/tasks/{design['id']}", json={"depends_on": [test["id"]]})
+        assert response.status_code == 400 and "成环" in response.json()["detail"]
+        assert client.put(f"/tasks/{design['id']}", json={"depends_on": [design["id"]]}).status_code == 400
+        assert db.get_task(design["id"]).depends_on == []
+        
+        # 完成前置任务后后续任务可开始；删除前置任务视为满足
+        client.put(f"/tasks/{design['id']}", json={"completed": True})
+        assert [task["id"] for task in client.get("/tasks/ready").json()] == [build["id"]]
+        client.delete(f"/tasks/{build['id']}")
+        assert [task["id"] for task in client.get("/tasks/ready").json()] == [test["id"]]
+        
+        # AI规划的步骤依次依赖
+        steps = AIService._create_tasks_from_ai_result([
+            {"name": "调研跨平台框架", "description": "对比 Flutter 和 React Native 的生态、性能和学习成本"},
+            {"name": "搭建开发环境", "description": "安装 Xcode、Android Studio 并跑通官方示例工程"},
+        ], "App开发", 2, datetime.now())
+        assert steps[0].depends_on == [] and steps[1].depends_on == [steps[0].id]
+        
+        # AI给出的顺序违反依赖时按拓扑顺序重排，保留时长
+        def item(task_id, start_time, end_time):
+            return TaskScheduleItem(task_id=task_id, task_name=task_id, start_time=start_time, end_time=end_time,
+                                    duration=0, priority="medium", reason="")
+        
+        items = [item("b", "09:00", "11:00"), item("a", "11:30", "12:00"), item("c", "14:00", "15:00")]
+        ordered = AIService._order_schedule_items(items, {"b": ["a"]})
+        assert [(i.task_id, i.start_time, i.end_time) for i in ordered] == \
+            [("a", "09:00", "09:30"), ("b", "11:30", "13:30"), ("c", "14:00", "15:00")]
+        assert AIService._order_schedule_items(items, {"a": ["b"]}) is items
+        
+        print("✅ 任务依赖正常")
+
     # ===== 错误处理测试 =====
     def test_invalid_task_creation(self):
         """测试无效任务创建"""
@@ -507,11 +1551,25 @@ def run_all_tests():
         test_instance.test_root_endpoint,
         test_instance.test_health_check,
         test_instance.test_create_task,
+        test_instance.test_create_tasks_bulk,
         test_instance.test_get_all_tasks,
+        test_instance.test_get_tasks_paginated,
+        test_instance.test_export_tasks_stream,
+        test_instance.test_import_tasks_stream,
         test_instance.test_get_single_task,
         test_instance.test_get_nonexistent_task,
         test_instance.test_update_task,
+        test_instance.test_task_list_cache_invalidation,
+        test_instance.test_task_field_projection,
+        test_instance.test_conditional_get_etag,
+        test_instance.test_task_changes_feed,
+        test_instance.test_dashboard,
+        test_instance.test_batch_get_tasks,
+        test_instance.test_search_tasks,
+        test_instance.test_due_range_and_next_up,
+        test_instance.test_calendar_counts,
         test_instance.test_delete_task,
+        test_instance.test_bulk_update_and_delete,
         test_instance.test_get_available_tags,
         test_instance.test_filter_tasks_by_tags,
         test_instance.test_get_calendar_tasks,
@@ -521,6 +1579,18 @@ def run_all_tests():
         test_instance.test_ai_job_not_found,
         test_instance.test_ai_test_endpoint,
         test_instance.test_day_schedule_preview,
+        test_instance.test_schedule_prefetch_skips_unchanged,
+        test_instance.test_schedule_prefetch_recurring_and_window,
+        test_instance.test_schedules_range,
+        test_instance.test_recurring_tasks,
+        test_instance.test_task_dependencies,
+        test_instance.test_archive_completed_tasks,
+        test_instance.test_free_slots_and_conflicts,
+        test_instance.test_compact_task_records,
+        test_instance.test_task_analytics,
+        test_instance.test_model_router,
+        test_instance.test_similar_prompt_cache,
+        test_instance.test_ai_plan_deduplication,
         test_instance.test_invalid_task_creation,
         test_instance.test_invalid_date_format,
         test_instance.test_complete_workflow,
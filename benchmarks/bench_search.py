@@ -0,0 +1,84 @@
+"""
+全文检索基准测试
+对比全量扫描（子串匹配）与倒排索引（BM25 排序）的查询延迟
+
+运行: python benchmarks/bench_search.py [任务数...]   默认 10000 100000
+"""
+import gc
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_index import SearchIndex
+
+SUBJECTS = ["法语", "英语", "日语", "德语", "数学", "物理", "化学", "历史", "吉他", "钢琴", "游泳", "跑步",
+            "健身", "摄影", "绘画", "编程", "Python", "React", "FastAPI", "Docker", "算法", "写作", "阅读", "烹饪"]
+ACTIONS = ["学习", "复习", "练习", "背诵", "整理", "总结", "准备", "预习", "阅读", "完成", "提交", "检查"]
+OBJECTS = ["单词", "语法", "笔记", "作业", "报告", "课程", "章节", "习题", "项目", "计划", "文档", "视频"]
+QUERIES = ["法语", "复习语法", "python", "react 项目", "学习 笔记", "钢琴练习", "fast*", "算", "跑步计划", "不存在的词"]
+QUERY_ROUNDS = 50
+
+
+class BenchTask:
+    """只包含检索所需字段的轻量任务"""
+    __slots__ = ("id", "name", "description")
+
+    def __init__(self, task_id: str, name: str, description: str):
+        self.id = task_id
+        self.name = name
+        self.description = description
+
+
+def make_tasks(count: int):
+    rng = random.Random(42)
+    tasks = []
+    for i in range(count):
+        subject, action, obj = rng.choice(SUBJECTS), rng.choice(ACTIONS), rng.choice(OBJECTS)
+        tasks.append(BenchTask(
+            str(uuid.uuid4()),
+            f"{action}{subject}{obj} 第{i % 97}组",
+            f"{rng.choice(ACTIONS)}{rng.choice(SUBJECTS)}相关的{rng.choice(OBJECTS)}，预计{i % 5 + 1}小时",
+        ))
+    return tasks
+
+
+def percentile(samples, ratio: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    for size in sizes:
+        tasks = make_tasks(size)
+
+        started = time.perf_counter()
+        index = SearchIndex()
+        index.add_many(tasks)
+        build_seconds = time.perf_counter() - started
+        gc.collect()
+
+        samples = []
+        for _ in range(QUERY_ROUNDS):
+            for query in QUERIES:
+                started = time.perf_counter()
+                index.search(query, limit=20)
+                samples.append((time.perf_counter() - started) * 1000)
+
+        scan_samples = []
+        for query in QUERIES[:3]:
+            started = time.perf_counter()
+            [task for task in tasks if query in task.name or query in task.description]
+            scan_samples.append((time.perf_counter() - started) * 1000)
+
+        print(f"{size:>9,} 个任务: 建索引 {build_seconds:.1f}s, 词表 {len(index._vocabulary):,} 项 | "
+              f"索引查询 p50 {percentile(samples, 0.5):.2f}ms p99 {percentile(samples, 0.99):.2f}ms | "
+              f"全量扫描 {sum(scan_samples) / len(scan_samples):.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+任务列表序列化基准测试
+对比当前路径（response_model 校验 + jsonable 转换 + json.dumps）与快速路径（逐任务字节缓存拼接）
+
+运行: python benchmarks/bench_serialization.py
+"""
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+
+from models import Task
+from task_serializer import EncodedTaskCache, orjson
+
+SIZES = [1_000, 10_000, 100_000]
+REPEAT = 5
+
+
+def make_tasks(count: int) -> List[Task]:
+    """生成带中文长描述的测试任务"""
+    now = datetime.now()
+    return [
+        Task(
+            id=str(uuid.uuid4()),
+            name=f"学习法语 Step{i % 10 + 1}：背诵第{i}组单词",
+            description="每天晚上20:00-20:30背诵30个法语单词，使用Anki软件复习，完成后记录正确率。" * 4,
+            created_at=now,
+            due_date=now + timedelta(hours=i % 500),
+            priority=["low", "medium", "high"][i % 3],
+            estimated_hours=1.5,
+        )
+        for i in range(count)
+    ]
+
+
+def current_path(adapter: TypeAdapter, tasks: List[Task]) -> bytes:
+    """当前路径：response_model 校验后转为 JSON 兼容对象，再用 json.dumps 编码"""
+    validated = adapter.validate_python(tasks)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def best_of(func, repeat: int = REPEAT) -> float:
+    """多次运行取最短耗时（毫秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    adapter = TypeAdapter(List[Task])
+    print(f"编码器: {'orjson' if orjson is not None else 'json (标准库)'}")
+    print(f"{'任务数':>8} {'当前路径':>12} {'快速路径(冷)':>14} {'快速路径(热)':>14} {'加速比(热)':>10}")
+
+    for size in SIZES:
+        tasks = make_tasks(size)
+
+        current_ms = best_of(lambda: current_path(adapter, tasks))
+        cold_ms = best_of(lambda: EncodedTaskCache().encode_many(tasks))
+        cache = EncodedTaskCache()
+        cache.encode_many(tasks)
+        warm_ms = best_of(lambda: cache.encode_many(tasks))
+
+        # 两条路径输出的内容必须一致
+        assert json.loads(current_path(adapter, tasks[:100])) == json.loads(cache.encode_many(tasks[:100]))
+
+        print(f"{size:>8} {current_ms:>10.1f}ms {cold_ms:>12.1f}ms {warm_ms:>12.1f}ms {current_ms / warm_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
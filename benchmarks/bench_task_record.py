@@ -0,0 +1,86 @@
+"""
+任务内存表示基准测试
+对比 models.Task（pydantic 模型）与 TaskRecord（__slots__ 紧凑记录）的内存占用、构建和读取速度
+
+运行: python benchmarks/bench_task_record.py [任务数...]   默认 100000 1000000
+"""
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Task
+from task_record import TaskRecord
+
+PRIORITIES = ["low", "medium", "high"]
+
+
+def make_fields(count: int):
+    rng = random.Random(42)
+    base = datetime(2025, 1, 1, 9, 0)
+    return [
+        dict(
+            id=str(uuid.uuid4()),
+            name=f"任务 {i}",
+            description="",
+            created_at=base,
+            due_date=base + timedelta(hours=rng.randrange(24 * 90)),
+            priority="".join(rng.choice(PRIORITIES)),  # 与解析请求体得到的字符串一样，每个任务一个新对象
+            estimated_hours=rng.choice([None, 0.5, 1.0, 2.0]),
+        )
+        for i in range(count)
+    ]
+
+
+def measure(build, fields):
+    """返回 (对象列表, 构建秒数, 占用字节数)"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    items = [build(values) for values in fields]
+    seconds = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return items, seconds, size
+
+
+def scan(items) -> float:
+    """按优先级和截止时间过滤一遍，返回耗时（毫秒）"""
+    cutoff = datetime(2025, 2, 1)
+    started = time.perf_counter()
+    [item for item in items if item.priority == "high" and not item.completed and item.due_date < cutoff]
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    for size in sizes:
+        fields = make_fields(size)
+
+        tasks, task_seconds, task_bytes = measure(lambda values: Task(**values), fields)
+        task_scan = scan(tasks)
+        del tasks
+
+        records, record_seconds, record_bytes = measure(lambda values: TaskRecord(**values), fields)
+        record_scan = scan(records)
+
+        started = time.perf_counter()
+        for record in records[:10_000]:
+            record.to_task()
+        convert_us = (time.perf_counter() - started) / min(size, 10_000) * 1e6
+        del records
+
+        print(f"{size:>9,} 个任务: "
+              f"Task {task_bytes / size:.0f}B/个 构建 {task_seconds:.2f}s 扫描 {task_scan:.0f}ms | "
+              f"TaskRecord {record_bytes / size:.0f}B/个 构建 {record_seconds:.2f}s 扫描 {record_scan:.0f}ms | "
+              f"转换为 Task {convert_us:.1f}µs/个")
+
+
+if __name__ == "__main__":
+    main()
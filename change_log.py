@@ -0,0 +1,67 @@
+"""
+变更日志模块 - 任务增量同步（GET /tasks/changes）使用的环形缓冲区
+记录每次写操作的 (版本号, 任务ID, 是否删除)，满时压缩为每个任务只保留最新一条
+"""
+from collections import deque
+from typing import List, Optional, Set, Tuple
+
+
+class ChangeLog:
+    """任务变更日志（按版本号递增追加）"""
+
+    def __init__(self, max_entries: int = 10000, start_version: int = 0):
+        self.max_entries = max_entries
+        self._entries: deque = deque()  # (版本号, 任务ID, 是否删除)
+        # 早于该版本的变更已被丢弃，since 小于它的客户端需要全量同步
+        self.min_version = start_version
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(self, version: int, task_ids, deleted: bool = False) -> None:
+        """记录一次写操作涉及的任务"""
+        for task_id in task_ids:
+            self._entries.append((version, task_id, deleted))
+        if len(self._entries) > self.max_entries:
+            self._compact()
+
+    def _compact(self) -> None:
+        """压缩：同一任务只保留最新一条；仍然过多时丢弃最旧的条目（保留3/4容量，均摊 O(1)）"""
+        seen = set()
+        compacted = []
+        for entry in reversed(self._entries):
+            if entry[1] not in seen:
+                seen.add(entry[1])
+                compacted.append(entry)
+        compacted.reverse()
+
+        keep = self.max_entries * 3 // 4
+        if len(compacted) > keep:
+            dropped = compacted[:len(compacted) - keep]
+            self.min_version = max(self.min_version, dropped[-1][0])
+            compacted = compacted[len(compacted) - keep:]
+        self._entries = deque(compacted)
+
+    def since(self, version: int) -> Optional[Tuple[List[str], List[str]]]:
+        """获取指定版本之后的变更，返回 (有更新的任务ID, 已删除的任务ID)；
+        版本过旧（变更已被丢弃）时返回 None，调用方应全量同步"""
+        if version < self.min_version:
+            return None
+
+        seen: Set[str] = set()
+        changed, deleted = [], []
+        for entry_version, task_id, is_deleted in reversed(self._entries):
+            if entry_version <= version:
+                break
+            if task_id in seen:
+                continue
+            seen.add(task_id)
+            (deleted if is_deleted else changed).append(task_id)
+        changed.reverse()
+        deleted.reverse()
+        return changed, deleted
+
+    def clear(self, min_version: int) -> None:
+        """清空日志，之前的版本都需要全量同步"""
+        self._entries.clear()
+        self.min_version = min_version
@@ -23,13 +23,32 @@ class Settings:
     OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "https://api.siliconflow.cn/v1")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "Qwen/Qwen2.5-7B-Instruct")
     
+    # 模型路由配置：小请求走快速模型，大请求走强模型（默认都使用 OPENAI_MODEL）
+    AI_FAST_MODEL: str = os.getenv("AI_FAST_MODEL", OPENAI_MODEL)
+    AI_STRONG_MODEL: str = os.getenv("AI_STRONG_MODEL", OPENAI_MODEL)
+    AI_ROUTER_SMALL_PROMPT_CHARS: int = int(os.getenv("AI_ROUTER_SMALL_PROMPT_CHARS", "30"))
+    AI_ROUTER_SMALL_MAX_TASKS: int = int(os.getenv("AI_ROUTER_SMALL_MAX_TASKS", "3"))
+    AI_ROUTER_SMALL_DAY_TASKS: int = int(os.getenv("AI_ROUTER_SMALL_DAY_TASKS", "4"))
+    AI_ROUTER_EWMA_ALPHA: float = float(os.getenv("AI_ROUTER_EWMA_ALPHA", "0.2"))
+    AI_ROUTER_LATENCY_BUDGET: float = float(os.getenv("AI_ROUTER_LATENCY_BUDGET", "20"))  # 秒
+    AI_ROUTER_MAX_ERROR_RATE: float = float(os.getenv("AI_ROUTER_MAX_ERROR_RATE", "0.5"))
+    AI_ROUTER_PROBE_INTERVAL: float = float(os.getenv("AI_ROUTER_PROBE_INTERVAL", "60"))  # 秒，不健康的首选模型每隔这么久放行一次探测请求
+    
     # 任务配置
     MAX_TASKS_PER_PLANNING: int = int(os.getenv("MAX_TASKS_PER_PLANNING", "10"))
     DEFAULT_TASK_PRIORITY: str = os.getenv("DEFAULT_TASK_PRIORITY", "medium")
     DEFAULT_ESTIMATED_HOURS: float = float(os.getenv("DEFAULT_ESTIMATED_HOURS", "2.0"))
+    BULK_MAX_TASKS: int = int(os.getenv("BULK_MAX_TASKS", "1000"))  # 单次批量操作的最大任务数
+    # 紧急度排序：各优先级的提前量（小时），紧急度 = 截止时间 - 提前量
+    URGENCY_LEAD_HOURS_HIGH: float = float(os.getenv("URGENCY_LEAD_HOURS_HIGH", "48"))
+    URGENCY_LEAD_HOURS_MEDIUM: float = float(os.getenv("URGENCY_LEAD_HOURS_MEDIUM", "24"))
+    URGENCY_LEAD_HOURS_LOW: float = float(os.getenv("URGENCY_LEAD_HOURS_LOW", "0"))
+    BATCH_GET_MAX_IDS: int = int(os.getenv("BATCH_GET_MAX_IDS", "500"))  # 单次批量读取的最大任务ID数
+    DATE_RANGE_MAX_DAYS: int = int(os.getenv("DATE_RANGE_MAX_DAYS", "366"))  # 日期范围查询（日历计数、日程安排）单次最多天数
     
     # 数据库配置（预留，目前使用内存数据库）
     DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL")
+    CHANGE_LOG_MAX_ENTRIES: int = int(os.getenv("CHANGE_LOG_MAX_ENTRIES", "10000"))  # 增量同步变更日志保留的条目数
     
     # 日志配置
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
@@ -46,6 +65,18 @@ class Settings:
     # 缓存配置
     CACHE_TTL: int = int(os.getenv("CACHE_TTL", "3600"))  # 1小时
     
+    # 相似提示缓存配置（复用相近目标的任务规划结果）
+    PROMPT_CACHE_ENABLED: bool = os.getenv("PROMPT_CACHE_ENABLED", "True").lower() == "true"
+    PROMPT_CACHE_SIMILARITY_THRESHOLD: float = float(os.getenv("PROMPT_CACHE_SIMILARITY_THRESHOLD", "0.5"))
+    PROMPT_CACHE_MAX_ENTRIES: int = int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "100000"))
+    PROMPT_CACHE_TTL: int = int(os.getenv("PROMPT_CACHE_TTL", "604800"))  # 7天
+    
+    # 已完成任务归档：完成超过宽限期的任务移出热存储（ARCHIVE_PATH 为空时归档保存在内存中）
+    ARCHIVE_ENABLED: bool = os.getenv("ARCHIVE_ENABLED", "True").lower() == "true"
+    ARCHIVE_GRACE_DAYS: float = float(os.getenv("ARCHIVE_GRACE_DAYS", "7"))
+    ARCHIVE_CHECK_INTERVAL: int = int(os.getenv("ARCHIVE_CHECK_INTERVAL", "3600"))  # 秒
+    ARCHIVE_PATH: str = os.getenv("ARCHIVE_PATH", "")  # JSONL 文件路径
+    
     # 任务标签配置
     AUTO_TAG_ENABLED: bool = os.getenv("AUTO_TAG_ENABLED", "True").lower() == "true"
     
@@ -53,6 +84,20 @@ class Settings:
     AI_TASK_PLANNING_ENABLED: bool = os.getenv("AI_TASK_PLANNING_ENABLED", "True").lower() == "true"
     AI_SCHEDULE_ENABLED: bool = os.getenv("AI_SCHEDULE_ENABLED", "True").lower() == "true"
     AI_RESPONSE_TIMEOUT: int = int(os.getenv("AI_RESPONSE_TIMEOUT", "30"))  # 30秒
+    SCHEDULE_DAY_START: str = os.getenv("SCHEDULE_DAY_START", "09:00")  # 空闲时间段查询的默认起点 HH:MM
+    SCHEDULE_DAY_END: str = os.getenv("SCHEDULE_DAY_END", "22:00")  # 空闲时间段查询的默认终点 HH:MM
+    
+    # AI规划任务去重：skip 跳过重复任务，merge 合并到已有任务，off 关闭
+    AI_DEDUP_MODE: str = os.getenv("AI_DEDUP_MODE", "skip").lower()
+    AI_DEDUP_SIMILARITY_THRESHOLD: float = float(os.getenv("AI_DEDUP_SIMILARITY_THRESHOLD", "0.6"))
+
+    # 日程预生成配置（夜间低峰期提前生成日程，避开早高峰限流）
+    SCHEDULE_PREFETCH_ENABLED: bool = os.getenv("SCHEDULE_PREFETCH_ENABLED", "True").lower() == "true"
+    SCHEDULE_PREFETCH_WINDOW_START: str = os.getenv("SCHEDULE_PREFETCH_WINDOW_START", "02:00")  # HH:MM
+    SCHEDULE_PREFETCH_WINDOW_END: str = os.getenv("SCHEDULE_PREFETCH_WINDOW_END", "05:00")  # HH:MM
+    SCHEDULE_PREFETCH_RATE_PER_MINUTE: float = float(os.getenv("SCHEDULE_PREFETCH_RATE_PER_MINUTE", "6"))
+    SCHEDULE_PREFETCH_DAYS_AHEAD: int = int(os.getenv("SCHEDULE_PREFETCH_DAYS_AHEAD", "1"))
+    SCHEDULE_PREFETCH_CHECK_INTERVAL: int = int(os.getenv("SCHEDULE_PREFETCH_CHECK_INTERVAL", "60"))  # 秒
     
     # 安全配置
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
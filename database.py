@@ -2,71 +2,505 @@
 数据库操作模块 - 简化标签系统后的版本
 目前使用内存存储，后续可以替换为真实数据库
 """
-from typing import Dict, List, Optional
-from models import Task, AIJob, DaySchedule
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from models import Task, AIJob, DaySchedule, TaskFilter
+from indexes import (
+    DateIndex, DayCountIndex, DueDateIndex, OrderedIndex, RecurrenceIndex, format_sort_spec, make_sort_key
+)
+from text_index import NgramIndex, SearchIndex
+from task_serializer import EncodedTaskCache
+from change_log import ChangeLog
+from config import current_settings
+from time_slots import DaySlots, ScheduleSlotIndex
+from recurrence import make_occurrence, occurrence_dates, occurs_on
+from dependency_graph import DependencyIndex
+from archive import TaskArchive
+from analytics import TaskColumns
+from task_record import TaskRecord, to_record
+
+# 重复任务的实例可能落在任意日期：重复任务变更时记录在这个日期桶上，所有日期的版本都取它参与比较
+ALL_DATES = None
 
 # ===== 内存数据库 =====
 class InMemoryDatabase:
     def __init__(self):
-        self.tasks: Dict[str, Task] = {}
+        self.tasks: Dict[str, TaskRecord] = {}  # 紧凑任务记录，API 边界再转换为 models.Task
         self.ai_jobs: Dict[str, AIJob] = {}
         self.day_schedules: Dict[str, DaySchedule] = {}  # key: "YYYY-MM-DD"
+        self._schedule_dates: List[str] = []  # 有安排的日期（升序），用于日期范围查询
+        self.archive = TaskArchive(current_settings.ARCHIVE_PATH)  # 已完成任务的冷存储，不在热存储中
+        self.slot_index = ScheduleSlotIndex()  # 日程安排中已占用的时间段（按日期，整数分钟）
+        
+        # 二级索引，写操作时统一维护
+        self.date_index = DateIndex()
+        self.dedup_index = NgramIndex()
+        self.due_index = DueDateIndex()  # 未完成任务按截止时间排序
+        self.day_count_index = DayCountIndex()  # 每日截止/计划任务按优先级计数（日历热力图）
+        self.recurrence_index = RecurrenceIndex()  # 未完成的重复任务，按查询日期展开实例
+        self.dependency_index = DependencyIndex()  # 任务依赖图，维护可开始的任务
+        self.search_index = SearchIndex()  # 名称和描述的全文检索
+        self.encoded_cache = EncodedTaskCache()  # 任务 JSON 字节缓存，随写操作失效
+        self.task_columns = TaskColumns()  # 统计分析用的属性列（归档任务也保留在列中）
+        self.task_columns.add_many(self.archive.tasks())
+        self._indexes = [self.date_index, self.due_index, self.day_count_index, self.recurrence_index,
+                         self.dependency_index, self.dedup_index, self.search_index, self.encoded_cache,
+                         self.task_columns]
+        
+        # 按需创建的排序索引（排序规则 -> 有序索引），超出上限时淘汰最久未使用的
+        self._ordered_indexes: "OrderedDict[str, OrderedIndex]" = OrderedDict()
+        self.max_ordered_indexes = 8
+        
+        # 数据版本：全局单调递增的写序号，按集合和日期桶记录最后一次变更时的序号（用于 ETag 和增量同步）；
+        # 以启动时间（毫秒）为起点，服务重启后客户端持有的旧版本号不会与新数据混淆
+        self._version_seq = int(time.time() * 1000)
+        self.versions: Dict[str, int] = {"tasks": self._version_seq, "ai_jobs": self._version_seq,
+                                         "day_schedules": self._version_seq, "archive": self._version_seq}
+        self.date_versions: Dict[date, int] = {}
+        self.change_log = ChangeLog(current_settings.CHANGE_LOG_MAX_ENTRIES, self._version_seq)
+        
+        # 写操作和依赖索引的读操作加锁，保证批量写入对读者原子可见
+        self._lock = threading.RLock()
+    
+    def reset(self):
+        """清空所有数据（测试用）；版本号继续递增，不会与清空前的 ETag 冲突；
+        归档文件不会被清空，只断开与文件的关联"""
+        with self._lock:
+            self.tasks.clear()
+            self.ai_jobs.clear()
+            self.day_schedules.clear()
+            self._schedule_dates.clear()
+            self.slot_index.clear()
+            self.archive.clear()
+            for index in self._indexes:
+                index.clear()
+            for collection in self.versions:
+                self._bump_version(collection, list(self.date_versions))
+            self.change_log.clear(self._version_seq)
+    
+    # ===== 数据版本 =====
+    def _bump_version(self, collection: str, dates: Iterable[date] = ()):
+        """记录一次写操作：集合和受影响的日期桶更新为新的写序号"""
+        self._version_seq += 1
+        self.versions[collection] = self._version_seq
+        for day in dates:
+            self.date_versions[day] = self._version_seq
+    
+    def _tasks_changed(self, task_ids: Iterable[str], dates: Iterable[date], deleted: bool = False):
+        """记录一次任务写操作：更新数据版本并写入变更日志"""
+        self._bump_version("tasks", dates)
+        self.change_log.record(self._version_seq, task_ids, deleted)
+    
+    def _task_dates(self, task_ids: Iterable[str]) -> set:
+        """任务当前所在的日期桶（写操作前后各取一次，覆盖旧日期和新日期）；重复任务影响所有日期"""
+        dates = set()
+        for task_id in task_ids:
+            dates.update(self.date_index.task_dates(task_id))
+            if task_id in self.recurrence_index:
+                dates.add(ALL_DATES)
+        return dates
+    
+    def get_version(self, collection: str) -> int:
+        """获取集合的数据版本"""
+        return self.versions[collection]
+    
+    def get_date_version(self, day: date) -> int:
+        """获取单个日期桶的数据版本（该日期的任务最后一次变化时的写序号）"""
+        return max(self.date_versions.get(day, 0), self.date_versions.get(ALL_DATES, 0))
+    
+    def get_changes(self, since: int) -> Tuple[int, Optional[List[TaskRecord]], List[str]]:
+        """获取指定版本之后的任务变更，返回 (当前版本, 有更新的任务, 已删除的任务ID)；
+        版本过旧或不属于当前数据时任务列表为 None，需要全量同步"""
+        with self._lock:
+            version = self.versions["tasks"]
+            changes = self.change_log.since(since) if since <= version else None
+            if changes is None:
+                return version, None, []
+            changed_ids, deleted_ids = changes
+            return version, [self.tasks[task_id] for task_id in changed_ids], deleted_ids
+    
+    def get_dates_version(self, start: date, end: date) -> int:
+        """获取日期范围（包含起止日期）内各日期桶的最大数据版本"""
+        with self._lock:
+            version = self.date_versions.get(ALL_DATES, 0)
+            day = start
+            while day <= end:
+                version = max(version, self.date_versions.get(day, 0))
+                day += timedelta(days=1)
+            return version
+    
+    # ===== 索引维护 =====
+    def _index_task(self, task: Task):
+        """重建单个任务的索引项"""
+        for index in self._indexes:
+            index.discard(task.id)
+            index.add(task)
+    
+    def _unindex_task(self, task_id: str):
+        """移除单个任务的索引项"""
+        for index in self._indexes:
+            index.discard(task_id)
     
     # ===== 任务操作 =====
-    def create_task(self, task: Task) -> Task:
+    def create_task(self, task: Task) -> TaskRecord:
         """创建任务"""
-        self.tasks[task.id] = task
+        task = to_record(task)
+        with self._lock:
+            dates = self._task_dates([task.id])
+            self.tasks[task.id] = task
+            self._index_task(task)
+            self._tasks_changed([task.id], dates | self._task_dates([task.id]))
         return task
     
-    def get_task(self, task_id: str) -> Optional[Task]:
+    def create_tasks(self, tasks: List[Task], updates: Optional[Dict[str, Callable]] = None) -> List[TaskRecord]:
+        """批量创建任务：整批一次写入，任一任务ID冲突则整批不写入；
+        updates（任务ID -> apply(task)）在同一次写入中修改已有任务（不存在的跳过），只产生一次版本变更"""
+        tasks = [to_record(task) for task in tasks]
+        new_tasks = {}
+        for task in tasks:
+            if not task.id or task.id in new_tasks:
+                raise ValueError(f"任务ID无效或重复: {task.id}")
+            new_tasks[task.id] = task
+        
+        with self._lock:
+            conflicts = [task_id for task_id in new_tasks if task_id in self.tasks]
+            if conflicts:
+                raise ValueError(f"任务ID已存在: {conflicts[0]}")
+            
+            updated_ids = [task_id for task_id in (updates or ()) if task_id in self.tasks]
+            dates = self._task_dates(updated_ids)
+            updated = []
+            for task_id in updated_ids:
+                task = self.tasks[task_id]
+                updates[task_id](task)
+                updated.append(task)
+            
+            self.tasks.update(new_tasks)
+            for index in self._indexes:
+                for task in updated:
+                    index.discard(task.id)
+                index.add_many(tasks + updated)
+            changed_ids = list(new_tasks) + updated_ids
+            self._tasks_changed(changed_ids, dates | self._task_dates(changed_ids))
+        return tasks
+    
+    def get_task(self, task_id: str) -> Optional[TaskRecord]:
         """获取单个任务"""
         return self.tasks.get(task_id)
     
-    def get_all_tasks(self) -> List[Task]:
+    def get_tasks(self, task_ids: List[str]) -> Tuple[List[TaskRecord], List[str]]:
+        """按ID批量获取任务（去重、保持请求顺序），返回 (找到的任务, 不存在的任务ID)"""
+        found, missing = [], []
+        with self._lock:
+            for task_id in dict.fromkeys(task_ids):
+                task = self.tasks.get(task_id)
+                if task is None:
+                    missing.append(task_id)
+                else:
+                    found.append(task)
+        return found, missing
+    
+    def get_all_tasks(self) -> List[TaskRecord]:
         """获取所有任务"""
-        return list(self.tasks.values())
+        with self._lock:
+            return list(self.tasks.values())
+    
+    def iter_tasks(self, batch_size: int = 500):
+        """逐批遍历所有任务；只快照任务ID，遍历期间被删除的任务会被跳过"""
+        with self._lock:
+            task_ids = list(self.tasks)
+        
+        for start in range(0, len(task_ids), batch_size):
+            with self._lock:
+                batch = [self.tasks[task_id] for task_id in task_ids[start:start + batch_size] if task_id in self.tasks]
+            yield from batch
     
-    def update_task(self, task_id: str, task: Task) -> Optional[Task]:
+    def update_task(self, task_id: str, task: Task) -> Optional[TaskRecord]:
         """更新任务"""
-        if task_id in self.tasks:
-            self.tasks[task_id] = task
-            return task
+        task = to_record(task)
+        with self._lock:
+            if task_id in self.tasks:
+                dates = self._task_dates([task_id])
+                self.tasks[task_id] = task
+                self._index_task(task)
+                self._tasks_changed([task_id], dates | self._task_dates([task_id]))
+                return task
         return None
     
+    def update_tasks(self, task_ids: List[str], apply) -> Dict[str, Optional[TaskRecord]]:
+        """批量更新：在一次加锁内对每个任务调用 apply(task) 并统一重建索引，
+        返回 任务ID -> 更新后的任务（不存在时为 None）"""
+        results = {}
+        with self._lock:
+            dates = self._task_dates(task_ids)
+            updated = []
+            for task_id in task_ids:
+                task = self.tasks.get(task_id)
+                if task is not None:
+                    apply(task)
+                    updated.append(task)
+                results[task_id] = task
+            
+            for index in self._indexes:
+                for task in updated:
+                    index.discard(task.id)
+                index.add_many(updated)
+            if updated:
+                updated_ids = [task.id for task in updated]
+                self._tasks_changed(updated_ids, dates | self._task_dates(updated_ids))
+        return results
+    
+    def delete_tasks(self, task_ids: List[str]) -> Dict[str, bool]:
+        """批量删除，返回 任务ID -> 是否删除成功"""
+        results = {}
+        with self._lock:
+            dates = self._task_dates(task_ids)
+            for task_id in task_ids:
+                results[task_id] = self.tasks.pop(task_id, None) is not None
+                if results[task_id]:
+                    self._unindex_task(task_id)
+            deleted_ids = [task_id for task_id, deleted in results.items() if deleted]
+            if deleted_ids:
+                self._tasks_changed(deleted_ids, dates, deleted=True)
+        return results
+    
     def delete_task(self, task_id: str) -> bool:
         """删除任务"""
-        if task_id in self.tasks:
-            del self.tasks[task_id]
-            return True
+        with self._lock:
+            if task_id in self.tasks:
+                dates = self._task_dates([task_id])
+                del self.tasks[task_id]
+                self._unindex_task(task_id)
+                self._tasks_changed([task_id], dates, deleted=True)
+                return True
         return False
     
-    def get_tasks_for_date(self, target_date) -> List[Task]:
-        """获取指定日期的任务"""
-        tasks_for_date = []
+    def _get_ordered_index(self, sort_spec) -> OrderedIndex:
+        """获取排序规则对应的有序索引，首次使用时构建，之后随写操作增量维护"""
+        name = format_sort_spec(sort_spec)
+        index = self._ordered_indexes.get(name)
+        if index is not None:
+            self._ordered_indexes.move_to_end(name)
+            return index
         
-        for task in self.tasks.values():
-            if task.completed:
-                continue
-                
-            is_target_date_task = False
-            
-            # 截止日期在目标日期
-            if task.due_date and task.due_date.date() == target_date:
-                is_target_date_task = True
+        index = OrderedIndex(make_sort_key(sort_spec))
+        index.build(self.tasks.values())
+        self._ordered_indexes[name] = index
+        self._indexes.append(index)
+        
+        if len(self._ordered_indexes) > self.max_ordered_indexes:
+            _, evicted = self._ordered_indexes.popitem(last=False)
+            self._indexes.remove(evicted)
+        return index
+    
+    @staticmethod
+    def _due_range_bounds(sort_spec, task_filter: Optional[TaskFilter]):
+        """首个排序字段为截止日期时，把截止日期范围换算为索引上的起止排序键"""
+        if task_filter is None or sort_spec[0][0] != "due_date":
+            return None, None
+        
+        descending = sort_spec[0][1]
+        low, high = task_filter.due_from, task_filter.due_to
+        if descending:
+            low, high = high, low
+        sign = -1 if descending else 1
+        start = ((0, sign * low.timestamp()),) if low else None
+        stop = (0, sign * high.timestamp()) if high else None
+        return start, stop
+    
+    def query_tasks(self, sort_spec, task_filter: Optional[TaskFilter] = None, limit: Optional[int] = None,
+                    after: Optional[tuple] = None) -> Tuple[List[TaskRecord], Optional[tuple]]:
+        """按排序规则分页查询任务，返回 (任务列表, 下一页起点)；没有更多数据时起点为 None"""
+        with self._lock:
+            index = self._get_ordered_index(sort_spec)
+            start, stop = self._due_range_bounds(sort_spec, task_filter)
+            if after is None or (start is not None and start > after):
+                after = start
             
-            # 计划日期在目标日期
-            if task.scheduled_date and task.scheduled_date == target_date:
-                is_target_date_task = True
+            results = []
+            for entry in index.iter_after(after):
+                if stop is not None and entry[0][:2] > stop:
+                    break
+                task = self.tasks[entry[1]]
+                if task_filter is not None and not task_filter.matches(task):
+                    continue
+                results.append(task)
+                if limit is not None and len(results) >= limit:
+                    return results, entry
+            return results, None
+    
+    def get_tasks_between(self, start: date, end: date) -> List[TaskRecord]:
+        """获取截止日期或计划日期在日期范围（包含起止日期）内的未完成任务（按日期桶查找，不扫描全部任务）"""
+        with self._lock:
+            task_ids = {}
+            for day in self.date_index.dates(start, end):
+                task_ids.update(dict.fromkeys(self.date_index.get(day)))
+            return [self.tasks[task_id] for task_id in task_ids]
+    
+    def get_tasks_for_date(self, target_date) -> List[TaskRecord]:
+        """获取指定日期的任务（截止日期或计划日期在目标日期的未完成任务，以及重复任务在该日的实例）"""
+        with self._lock:
+            tasks = [self.tasks[task_id] for task_id in self.date_index.get(target_date)]
+            for task_id in self.recurrence_index:
+                task = self.tasks[task_id]
+                if occurs_on(task, target_date):
+                    tasks.append(make_occurrence(task, target_date))
+            return tasks
+    
+    def get_occurrences_between(self, start: date, end: date) -> List[TaskRecord]:
+        """展开未完成的重复任务在日期范围（包含起止日期）内的实例，按日期升序"""
+        with self._lock:
+            occurrences = [
+                make_occurrence(task, day)
+                for task in map(self.tasks.__getitem__, self.recurrence_index)
+                for day in occurrence_dates(task, start, end)
+            ]
+        occurrences.sort(key=lambda occurrence: occurrence.occurrence_date)
+        return occurrences
+    
+    def get_pending_dates(self, start=None, end=None) -> List:
+        """获取有未完成任务的日期（升序）；指定起止日期时包含范围内有重复任务实例的日期"""
+        with self._lock:
+            dates = self.date_index.dates(start, end)
+            if start is None or end is None:
+                return dates
+            pending = set(dates)
+            for task in map(self.tasks.__getitem__, self.recurrence_index):
+                pending.update(occurrence_dates(task, start, end))
+            return sorted(pending)
+    
+    def get_day_counts(self, start, end) -> Dict:
+        """获取日期范围内每天的未完成任务计数（按截止/计划和优先级）"""
+        with self._lock:
+            return self.day_count_index.between(start, end)
+    
+    def get_tasks_due_between(self, start=None, end=None, limit: Optional[int] = None) -> List[TaskRecord]:
+        """获取截止时间在 [start, end] 内的未完成任务（按截止时间升序）"""
+        with self._lock:
+            return [self.tasks[task_id] for task_id in self.due_index.between(start, end, limit)]
+    
+    def get_most_urgent_tasks(self, k: int, lead_seconds: Dict[str, float]) -> List[Tuple[TaskRecord, float]]:
+        """获取最紧急的 k 个未完成任务，返回 (任务, 有效截止时间戳)"""
+        with self._lock:
+            tasks = self.tasks
+            urgent = self.due_index.most_urgent(k, lead_seconds, lambda task_id: tasks[task_id].priority)
+            return [(tasks[task_id], effective) for effective, task_id in urgent]
+    
+    def get_ready_tasks(self, limit: Optional[int] = None) -> List[TaskRecord]:
+        """获取可开始的未完成任务（前置任务都已完成），按截止时间升序，没有截止时间的排在最后"""
+        with self._lock:
+            tasks = [self.tasks[task_id] for task_id in self.dependency_index.ready()]
+        tasks.sort(key=lambda task: (task.due_date is None, task.due_date.timestamp() if task.due_date else 0, task.id))
+        return tasks[:limit] if limit is not None else tasks
+    
+    def find_dependency_cycle(self, task_id: str, prerequisites: List[str]) -> Optional[List[str]]:
+        """把任务的前置任务设为 prerequisites 时形成的环（任务ID列表），不成环时返回 None"""
+        with self._lock:
+            return self.dependency_index.find_cycle(task_id, prerequisites)
+    
+    def find_similar_tasks(self, name: str, description: str = "", threshold: float = 0.6, limit: int = 5) -> List[tuple]:
+        """查找与给定名称和描述近似重复的未完成任务，返回 (任务, 相似度)"""
+        with self._lock:
+            matches = self.dedup_index.find_similar(name, description, threshold, limit)
+            return [(self.tasks[task_id], similarity) for task_id, similarity in matches]
+    
+    def search_tasks(self, query: str, limit: int = 20) -> Tuple[List[Tuple[TaskRecord, float]], int, bool]:
+        """全文检索任务名称和描述，返回 ((任务, 得分) 列表, 命中总数, 总数是否精确)"""
+        with self._lock:
+            matches, total, exact = self.search_index.search(query, limit)
+            return [(self.tasks[task_id], score) for task_id, score in matches], total, exact
+    
+    # ===== 归档操作 =====
+    def archive_completed_tasks(self, completed_before: datetime) -> int:
+        """把完成时间早于 completed_before 的已完成任务移入归档（没有完成时间的旧数据直接归档），
+        对增量同步的客户端表现为删除；返回归档的任务数"""
+        with self._lock:
+            archived = [
+                task for task in self.tasks.values()
+                if task.completed and (task.completed_at is None or task.completed_at <= completed_before)
+            ]
+            if not archived:
+                return 0
             
-            if is_target_date_task:
-                tasks_for_date.append(task)
-        
-        return tasks_for_date
+            task_ids = [task.id for task in archived]
+            dates = self._task_dates(task_ids)
+            self.archive.add_many(archived)
+            for task_id in task_ids:
+                del self.tasks[task_id]
+                self._unindex_task(task_id)
+            self.task_columns.add_many(archived)  # 完成率统计仍包含归档任务
+            self._tasks_changed(task_ids, dates, deleted=True)
+            self._bump_version("archive")
+            return len(archived)
+    
+    def is_archived(self, task_id: str) -> bool:
+        """任务是否已归档"""
+        return task_id in self.archive
+    
+    def get_archived_task(self, task_id: str) -> Optional[Task]:
+        """获取归档任务"""
+        with self._lock:
+            return self.archive.get(task_id)
+    
+    def get_archived_page(self, offset: int = 0, limit: int = 50) -> Tuple[int, List[bytes]]:
+        """按归档时间倒序分页获取归档任务的 JSON 字节，返回 (归档总数, 本页任务)"""
+        with self._lock:
+            return len(self.archive), self.archive.page(offset, limit)
+    
+    def get_archive_counts(self) -> dict:
+        """归档任务数（总数和按优先级）"""
+        with self._lock:
+            return self.archive.counts()
+    
+    def restore_archived_task(self, task_id: str, apply=None) -> Optional[Task]:
+        """把归档任务移回热存储（写入前调用 apply(task) 修改任务）"""
+        with self._lock:
+            if task_id in self.tasks:
+                raise ValueError(f"任务ID已存在: {task_id}")
+            task = self.archive.remove(task_id)
+            if task is None:
+                return None
+            if apply is not None:
+                apply(task)
+            self.create_task(task)
+            self._bump_version("archive")
+            return task
+    
+    def delete_archived_task(self, task_id: str) -> bool:
+        """彻底删除归档任务"""
+        with self._lock:
+            if self.archive.remove(task_id) is None:
+                return False
+            self.task_columns.discard(task_id)
+            self._bump_version("archive")
+            return True
+    
+    # ===== 统计分析 =====
+    def get_completion_by_week(self, start: date, end: date) -> List[Tuple[date, str, int, int]]:
+        """截止日期在范围内的任务（含归档）按周和优先级统计任务数和已完成数"""
+        with self._lock:
+            return self.task_columns.completion_by_week(start, end)
+    
+    def get_load_by_day(self, start: date, end: date) -> List[Tuple[date, int, float, int]]:
+        """未完成任务每天的任务数和预计工时"""
+        with self._lock:
+            return self.task_columns.load_by_day(start, end)
+    
+    def get_overdue_aging(self, now: datetime) -> List[Tuple[int, Dict[str, int], float]]:
+        """逾期未完成任务按逾期天数分段统计"""
+        with self._lock:
+            return self.task_columns.overdue_aging(now)
     
     # ===== AI作业操作 =====
     def create_ai_job(self, job: AIJob) -> AIJob:
         """创建AI作业"""
-        self.ai_jobs[job.job_id] = job
+        with self._lock:
+            self.ai_jobs[job.job_id] = job
+            self._bump_version("ai_jobs")
         return job
     
     def get_ai_job(self, job_id: str) -> Optional[AIJob]:
@@ -75,15 +509,22 @@ class InMemoryDatabase:
     
     def update_ai_job(self, job_id: str, job: AIJob) -> Optional[AIJob]:
         """更新AI作业"""
-        if job_id in self.ai_jobs:
-            self.ai_jobs[job_id] = job
-            return job
+        with self._lock:
+            if job_id in self.ai_jobs:
+                self.ai_jobs[job_id] = job
+                self._bump_version("ai_jobs")
+                return job
         return None
     
     # ===== 日程安排操作 =====
     def create_day_schedule(self, date_str: str, schedule: DaySchedule) -> DaySchedule:
         """创建日程安排"""
-        self.day_schedules[date_str] = schedule
+        with self._lock:
+            if date_str not in self.day_schedules:
+                insort(self._schedule_dates, date_str)
+            self.day_schedules[date_str] = schedule
+            self.slot_index.set_day(date_str, schedule.schedule_items)
+            self._bump_version("day_schedules")
         return schedule
     
     def get_day_schedule(self, date_str: str) -> Optional[DaySchedule]:
@@ -92,10 +533,27 @@ class InMemoryDatabase:
     
     def delete_day_schedule(self, date_str: str) -> bool:
         """删除日程安排"""
-        if date_str in self.day_schedules:
-            del self.day_schedules[date_str]
-            return True
+        with self._lock:
+            if date_str in self.day_schedules:
+                del self.day_schedules[date_str]
+                del self._schedule_dates[bisect_left(self._schedule_dates, date_str)]
+                self.slot_index.remove_day(date_str)
+                self._bump_version("day_schedules")
+                return True
         return False
+    
+    def get_day_schedules_between(self, start_str: str, end_str: str) -> List[Tuple[str, DaySchedule]]:
+        """获取日期范围内（"YYYY-MM-DD"，包含起止日期）保存的日程安排，按日期升序"""
+        with self._lock:
+            dates = self._schedule_dates
+            position = bisect_left(dates, start_str)
+            stop = bisect_right(dates, end_str)
+            return [(date_str, self.day_schedules[date_str]) for date_str in dates[position:stop]]
+    
+    def get_day_slots(self, date_str: str) -> DaySlots:
+        """获取指定日期（"YYYY-MM-DD"）日程安排中已占用的时间段"""
+        with self._lock:
+            return self.slot_index.get_day(date_str)
 
 # 全局数据库实例
 db = InMemoryDatabase()
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+依赖关系模块 - 任务依赖图的邻接索引、增量环检测和拓扑排序
+任务的 depends_on 列出必须先完成的前置任务；已完成或已删除的前置任务视为满足
+"""
+import heapq
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from indexes import TaskIndex
+
+
+class DependencyIndex(TaskIndex):
+    """依赖邻接索引：前置任务 / 后续任务两个方向的邻接表，
+    并为每个任务维护未完成前置任务的计数，计数为 0 的未完成任务即为可开始的任务"""
+
+    def __init__(self):
+        self._prerequisites: Dict[str, Set[str]] = {}  # 任务ID -> 前置任务ID
+        self._dependents: Dict[str, Set[str]] = {}  # 任务ID -> 依赖它的任务ID
+        self._active: Set[str] = set()  # 未完成的任务
+        self._pending: Dict[str, int] = {}  # 任务ID -> 未完成的前置任务数
+        self._ready: Set[str] = set()  # 未完成且前置任务都已完成的任务
+
+    def add(self, task) -> None:
+        """加入索引"""
+        task_id = task.id
+        prerequisites = set(task.depends_on)
+        self._prerequisites[task_id] = prerequisites
+        for prerequisite in prerequisites:
+            self._dependents.setdefault(prerequisite, set()).add(task_id)
+        self._pending[task_id] = sum(1 for prerequisite in prerequisites if prerequisite in self._active)
+
+        if task.completed:
+            return
+        self._active.add(task_id)
+        if self._pending[task_id] == 0:
+            self._ready.add(task_id)
+        for dependent in self._dependents.get(task_id, ()):
+            self._pending[dependent] += 1
+            self._ready.discard(dependent)
+
+    def discard(self, task_id: str) -> None:
+        """移出索引；依赖它的任务不受影响（前置任务删除后视为满足）"""
+        prerequisites = self._prerequisites.pop(task_id, None)
+        if prerequisites is None:
+            return
+
+        if task_id in self._active:
+            self._active.discard(task_id)
+            self._ready.discard(task_id)
+            for dependent in self._dependents.get(task_id, ()):
+                self._pending[dependent] -= 1
+                if self._pending[dependent] == 0 and dependent in self._active:
+                    self._ready.add(dependent)
+        del self._pending[task_id]
+
+        for prerequisite in prerequisites:
+            dependents = self._dependents[prerequisite]
+            dependents.discard(task_id)
+            if not dependents:
+                del self._dependents[prerequisite]
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._prerequisites.clear()
+        self._dependents.clear()
+        self._active.clear()
+        self._pending.clear()
+        self._ready.clear()
+
+    def ready(self) -> Set[str]:
+        """可开始的任务ID（未完成且没有未完成的前置任务）"""
+        return self._ready
+
+    def dependents(self, task_id: str) -> Set[str]:
+        """直接依赖该任务的任务ID"""
+        return self._dependents.get(task_id, set())
+
+    def find_cycle(self, task_id: str, prerequisites: Iterable[str]) -> Optional[List[str]]:
+        """把任务的前置任务设为 prerequisites 时是否成环：只从新的前置任务出发沿依赖方向搜索，
+        能回到该任务即成环，返回环上的任务ID（从该任务开始），否则返回 None"""
+        parents = {}
+        stack = []
+        for prerequisite in prerequisites:
+            if prerequisite not in parents:
+                parents[prerequisite] = task_id
+                stack.append(prerequisite)
+
+        while stack:
+            current = stack.pop()
+            if current == task_id:
+                path = [task_id]
+                node = parents[task_id]
+                while node != task_id:
+                    path.append(node)
+                    node = parents[node]
+                return path[:1] + path[:0:-1]
+            for prerequisite in self._prerequisites.get(current, ()):
+                if prerequisite not in parents:
+                    parents[prerequisite] = current
+                    stack.append(prerequisite)
+        return None
+
+
+def topological_order(items: List, item_id: Callable, prerequisites_of: Callable, key: Callable) -> List:
+    """按依赖关系排序（只考虑列表内部的依赖），同时可排的项按 key 升序；
+    同一任务可出现多次（如拆成多段安排），成环的剩余项按 key 追加在最后"""
+    positions: Dict[str, List[int]] = {}
+    for position, item in enumerate(items):
+        positions.setdefault(item_id(item), []).append(position)
+
+    pending = [0] * len(items)
+    dependents: List[List[int]] = [[] for _ in items]
+    for position, item in enumerate(items):
+        for prerequisite in set(prerequisites_of(item)):
+            if prerequisite == item_id(item):
+                continue
+            for prerequisite_position in positions.get(prerequisite, ()):
+                pending[position] += 1
+                dependents[prerequisite_position].append(position)
+
+    heap = [(key(item), position) for position, item in enumerate(items) if not pending[position]]
+    heapq.heapify(heap)
+    ordered = []
+    while heap:
+        _, position = heapq.heappop(heap)
+        ordered.append(position)
+        for dependent in dependents[position]:
+            pending[dependent] -= 1
+            if pending[dependent] == 0:
+                heapq.heappush(heap, (key(items[dependent]), dependent))
+
+    if len(ordered) < len(items):
+        placed = set(ordered)
+        ordered.extend(sorted((position for position in range(len(items)) if position not in placed),
+                              key=lambda position: (key(items[position]), position)))
+    return [items[position] for position in ordered]
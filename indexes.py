@@ -0,0 +1,339 @@
+"""
+索引模块 - 内存数据库的二级索引
+每个索引实现 add(task) / discard(task_id)，由数据库在写操作时统一维护
+"""
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, List, Optional, Set, Tuple
+from datetime import date, datetime, timedelta
+
+from recurrence import is_recurring_master
+
+
+class TaskIndex:
+    """二级索引基类"""
+
+    def add(self, task) -> None:
+        raise NotImplementedError
+
+    def add_many(self, tasks) -> None:
+        """批量加入新任务（子类可提供更高效的实现）"""
+        for task in tasks:
+            self.add(task)
+
+    def discard(self, task_id: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class DateIndex(TaskIndex):
+    """日期索引：日期 -> 该日到期或计划在该日的未完成任务ID"""
+
+    def __init__(self):
+        self._by_date: Dict[date, Set[str]] = {}
+        self._task_dates: Dict[str, Tuple[date, ...]] = {}
+
+    @staticmethod
+    def _dates_of(task) -> Tuple[date, ...]:
+        """任务所属的日期（截止日期和计划日期）；重复任务按查询日期展开，不进入日期桶"""
+        if task.completed or is_recurring_master(task):
+            return ()
+
+        dates = set()
+        if task.due_date:
+            dates.add(task.due_date.date())
+        if task.scheduled_date:
+            dates.add(task.scheduled_date)
+        return tuple(dates)
+
+    def add(self, task) -> None:
+        """加入索引"""
+        dates = self._dates_of(task)
+        if not dates:
+            return
+
+        self._task_dates[task.id] = dates
+        for day in dates:
+            self._by_date.setdefault(day, set()).add(task.id)
+
+    def discard(self, task_id: str) -> None:
+        """移出索引"""
+        dates = self._task_dates.pop(task_id, ())
+        for day in dates:
+            task_ids = self._by_date.get(day)
+            if task_ids is None:
+                continue
+            task_ids.discard(task_id)
+            if not task_ids:
+                del self._by_date[day]
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._by_date.clear()
+        self._task_dates.clear()
+
+    def task_dates(self, task_id: str) -> Tuple[date, ...]:
+        """任务当前所在的日期桶"""
+        return self._task_dates.get(task_id, ())
+
+    def get(self, target_date: date) -> Set[str]:
+        """获取指定日期的任务ID"""
+        return self._by_date.get(target_date, set())
+
+    def dates(self, start: Optional[date] = None, end: Optional[date] = None) -> List[date]:
+        """获取有未完成任务的日期（升序，包含起止日期）"""
+        return sorted(
+            day for day in self._by_date
+            if (start is None or day >= start) and (end is None or day <= end)
+        )
+
+
+# ===== 有序索引 =====
+PRIORITY_RANK = {"low": 0, "medium": 1, "high": 2}
+
+# 可排序字段 -> 取值函数（返回数值，None 表示缺失）
+SORTABLE_FIELDS = {
+    "created_at": lambda task: task.created_at.timestamp() if task.created_at else None,
+    "due_date": lambda task: task.due_date.timestamp() if task.due_date else None,
+    "priority": lambda task: PRIORITY_RANK.get(task.priority),
+    "estimated_hours": lambda task: task.estimated_hours,
+    "scheduled_date": lambda task: task.scheduled_date.toordinal() if task.scheduled_date else None,
+}
+
+MAX_SORT_KEYS = 3
+
+
+def parse_sort_spec(sort: str) -> Tuple[Tuple[str, bool], ...]:
+    """解析排序参数，如 "-priority,due_date" -> (("priority", True), ("due_date", False))"""
+    spec = []
+    for part in sort.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        descending = part.startswith("-")
+        field = part.lstrip("+-")
+        if field not in SORTABLE_FIELDS:
+            raise ValueError(f"不支持的排序字段: {field}")
+        spec.append((field, descending))
+
+    if not spec:
+        raise ValueError("排序参数不能为空")
+    if len(spec) > MAX_SORT_KEYS:
+        raise ValueError(f"最多支持{MAX_SORT_KEYS}个排序字段")
+    return tuple(spec)
+
+
+def format_sort_spec(spec: Tuple[Tuple[str, bool], ...]) -> str:
+    """排序规则的规范化字符串"""
+    return ",".join(f"-{field}" if descending else field for field, descending in spec)
+
+
+def make_sort_key(spec: Tuple[Tuple[str, bool], ...]):
+    """根据排序规则生成排序键函数；缺失值无论升降序都排在最后"""
+    getters = [(SORTABLE_FIELDS[field], descending) for field, descending in spec]
+
+    def sort_key(task) -> tuple:
+        key = []
+        for getter, descending in getters:
+            value = getter(task)
+            if value is None:
+                key.extend((1, 0))
+            else:
+                key.extend((0, -value if descending else value))
+        return tuple(key)
+
+    return sort_key
+
+
+class OrderedIndex(TaskIndex):
+    """按排序键维护的有序索引（bisect 维护的有序列表），用于分页和范围查询"""
+
+    def __init__(self, key_func):
+        self._key_func = key_func
+        self._entries: List[tuple] = []  # (排序键, 任务ID)
+        self._task_entries: Dict[str, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, task) -> None:
+        """加入索引"""
+        entry = (self._key_func(task), task.id)
+        insort(self._entries, entry)
+        self._task_entries[task.id] = entry
+
+    def add_many(self, tasks) -> None:
+        """批量加入：新条目与已有条目一次归并（timsort 识别两段有序序列），避免逐条插入"""
+        new_entries = [(self._key_func(task), task.id) for task in tasks]
+        if len(new_entries) < 32:
+            for entry in new_entries:
+                insort(self._entries, entry)
+        else:
+            new_entries.sort()
+            self._entries = sorted(self._entries + new_entries)
+        for entry in new_entries:
+            self._task_entries[entry[1]] = entry
+
+    def discard(self, task_id: str) -> None:
+        """移出索引"""
+        entry = self._task_entries.pop(task_id, None)
+        if entry is None:
+            return
+        position = bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._entries.clear()
+        self._task_entries.clear()
+
+    def build(self, tasks) -> None:
+        """从任务集合批量构建索引"""
+        self._task_entries = {task.id: (self._key_func(task), task.id) for task in tasks}
+        self._entries = sorted(self._task_entries.values())
+
+    def iter_after(self, after: Optional[tuple] = None):
+        """从指定条目之后（不含）按顺序遍历 (排序键, 任务ID)"""
+        position = 0 if after is None else bisect_right(self._entries, after)
+        entries = self._entries
+        while position < len(entries):
+            yield entries[position]
+            position += 1
+
+
+class DueDateIndex(OrderedIndex):
+    """截止日期有序索引：只包含有截止日期的未完成任务，条目为 (截止时间戳, 任务ID)"""
+
+    def __init__(self):
+        super().__init__(lambda task: task.due_date.timestamp())
+
+    @staticmethod
+    def _indexed(task) -> bool:
+        return task.due_date is not None and not task.completed and not is_recurring_master(task)
+
+    def add(self, task) -> None:
+        if self._indexed(task):
+            super().add(task)
+
+    def add_many(self, tasks) -> None:
+        super().add_many([task for task in tasks if self._indexed(task)])
+
+    def build(self, tasks) -> None:
+        super().build([task for task in tasks if self._indexed(task)])
+
+    def between(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                limit: Optional[int] = None) -> List[str]:
+        """截止时间在 [start, end] 内的任务ID（按截止时间升序）"""
+        entries = self._entries
+        position = 0 if start is None else bisect_left(entries, (start.timestamp(),))
+        stop = len(entries) if end is None else bisect_right(entries, (end.timestamp(), "\U0010ffff"))
+        if limit is not None:
+            stop = min(stop, position + limit)
+        return [task_id for _, task_id in entries[position:stop]]
+
+    def most_urgent(self, k: int, lead_seconds: Dict[str, float], priority_of) -> List[Tuple[float, str]]:
+        """最紧急的 k 个任务：紧急度按"截止时间 - 优先级提前量"（越小越紧急）计算，
+        返回 (有效截止时间戳, 任务ID)；按截止时间顺序扫描，后续任务不可能更紧急时提前结束"""
+        if k <= 0:
+            return []
+
+        max_lead = max(lead_seconds.values(), default=0)
+        heap = []  # (-有效截止时间戳, 任务ID)，堆顶为当前第 k 紧急的任务
+        for due_timestamp, task_id in self._entries:
+            if len(heap) >= k and due_timestamp - max_lead >= -heap[0][0]:
+                break
+            effective = due_timestamp - lead_seconds.get(priority_of(task_id), 0)
+            if len(heap) < k:
+                heapq.heappush(heap, (-effective, task_id))
+            elif effective < -heap[0][0]:
+                heapq.heapreplace(heap, (-effective, task_id))
+
+        return sorted((-negative, task_id) for negative, task_id in heap)
+
+
+class DayCountIndex(TaskIndex):
+    """每日计数索引：日期 -> 未完成任务按优先级的计数
+    [截止 low, 截止 medium, 截止 high, 计划 low, 计划 medium, 计划 high]"""
+
+    PRIORITIES = ("low", "medium", "high")
+
+    def __init__(self):
+        self._counts: Dict[date, List[int]] = {}
+        self._task_slots: Dict[str, Tuple[Tuple[date, int], ...]] = {}
+
+    @staticmethod
+    def _slots_of(task) -> Tuple[Tuple[date, int], ...]:
+        """任务占用的 (日期, 计数位置)；未知优先级按 medium 计，重复任务不计入"""
+        if task.completed or is_recurring_master(task):
+            return ()
+
+        rank = PRIORITY_RANK.get(task.priority, 1)
+        slots = []
+        if task.due_date:
+            slots.append((task.due_date.date(), rank))
+        if task.scheduled_date:
+            slots.append((task.scheduled_date, 3 + rank))
+        return tuple(slots)
+
+    def add(self, task) -> None:
+        """加入索引"""
+        slots = self._slots_of(task)
+        if not slots:
+            return
+
+        self._task_slots[task.id] = slots
+        for day, slot in slots:
+            counts = self._counts.get(day)
+            if counts is None:
+                counts = self._counts[day] = [0] * 6
+            counts[slot] += 1
+
+    def discard(self, task_id: str) -> None:
+        """移出索引"""
+        for day, slot in self._task_slots.pop(task_id, ()):
+            counts = self._counts[day]
+            counts[slot] -= 1
+            if not any(counts):
+                del self._counts[day]
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._counts.clear()
+        self._task_slots.clear()
+
+    def between(self, start: date, end: date) -> Dict[date, List[int]]:
+        """日期范围（包含起止日期）内有任务的日期及其计数"""
+        results = {}
+        day = start
+        while day <= end:
+            counts = self._counts.get(day)
+            if counts is not None:
+                results[day] = list(counts)
+            day += timedelta(days=1)
+        return results
+
+
+class RecurrenceIndex(TaskIndex):
+    """未完成的重复任务ID（按查询日期展开实例时只需遍历这些任务）"""
+
+    def __init__(self):
+        self._task_ids: Set[str] = set()
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._task_ids
+
+    def __iter__(self):
+        return iter(self._task_ids)
+
+    def add(self, task) -> None:
+        if is_recurring_master(task) and not task.completed:
+            self._task_ids.add(task.id)
+
+    def discard(self, task_id: str) -> None:
+        self._task_ids.discard(task_id)
+
+    def clear(self) -> None:
+        self._task_ids.clear()
@@ -2,16 +2,31 @@
 TaskGenie 后端主应用文件
 模块化结构的FastAPI应用
 """
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from api_routes import task_router, ai_router, general_router
+from api_routes import task_router, ai_router, archive_router, analytics_router, general_router
+from schedule_prefetch_service import SchedulePrefetchService
+from archive_service import ArchiveService
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动夜间日程预生成和已完成任务归档的周期任务"""
+    prefetch_task = asyncio.create_task(SchedulePrefetchService.run_forever())
+    archive_task = asyncio.create_task(ArchiveService.run_forever())
+    yield
+    prefetch_task.cancel()
+    archive_task.cancel()
 
 # 创建FastAPI应用
 app = FastAPI(
     title="TaskGenie API",
     description="智能任务管理系统API",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # 配置跨域
@@ -25,6 +40,8 @@ app.add_middleware(
 # 注册路由
 app.include_router(task_router)
 app.include_router(ai_router)
+app.include_router(archive_router)
+app.include_router(analytics_router)
 app.include_router(general_router)
 
 # 根路径
@@ -0,0 +1,151 @@
+"""
+模型路由模块 - 按请求复杂度和实时延迟/错误率为每次AI调用选择模型
+"""
+import logging
+import time
+from collections import deque
+from itertools import count
+from typing import Callable, Dict, Optional, Tuple
+from datetime import datetime
+
+from config import current_settings
+
+logger = logging.getLogger(__name__)
+
+
+class ModelStats:
+    """单个模型的实时统计（EWMA）"""
+
+    def __init__(self):
+        self.latency_ewma: Optional[float] = None  # 秒
+        self.error_ewma: float = 0.0
+        self.calls: int = 0
+        self.failures: int = 0
+        self.last_routed: Optional[float] = None  # 最近一次路由到该模型的时间（单调时钟）
+        self.probe_token: Optional[int] = None  # 未返回的探测请求的令牌
+
+    def record(self, latency: float, success: bool, alpha: float, probe: Optional[int] = None):
+        """记录一次调用结果；只有带着当前探测令牌的调用才结束探测，探测成功说明模型已恢复，统计从这次结果重新开始"""
+        self.calls += 1
+        if not success:
+            self.failures += 1
+
+        if probe is not None and probe == self.probe_token:
+            self.probe_token = None
+            if success:
+                self.latency_ewma = latency
+                self.error_ewma = 0.0
+                return
+
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma = alpha * latency + (1 - alpha) * self.latency_ewma
+        self.error_ewma = alpha * (0.0 if success else 1.0) + (1 - alpha) * self.error_ewma
+
+    def is_healthy(self) -> bool:
+        """延迟和错误率都在阈值内"""
+        if self.error_ewma > current_settings.AI_ROUTER_MAX_ERROR_RATE:
+            return False
+        if self.latency_ewma is not None and self.latency_ewma > current_settings.AI_ROUTER_LATENCY_BUDGET:
+            return False
+        return True
+
+    def cost(self) -> float:
+        """综合代价：延迟按错误率放大，没有数据的模型视为零代价"""
+        return (self.latency_ewma or 0.0) * (1 + 4 * self.error_ewma)
+
+    def to_dict(self) -> dict:
+        return {
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "error_ewma": round(self.error_ewma, 3),
+            "calls": self.calls,
+            "failures": self.failures,
+        }
+
+
+class ModelRouter:
+    def __init__(self, max_decisions: int = 200, clock: Callable[[], float] = time.monotonic):
+        self.stats: Dict[str, ModelStats] = {}
+        self.decisions = deque(maxlen=max_decisions)
+        self._clock = clock
+        self._probe_tokens = count(1)
+
+    def _get_stats(self, model: str) -> ModelStats:
+        if model not in self.stats:
+            self.stats[model] = ModelStats()
+        return self.stats[model]
+
+    @staticmethod
+    def _classify(kind: str, prompt_chars: int, max_tasks: int, task_count: int) -> str:
+        """按请求复杂度分级：small / large"""
+        if kind == "day_schedule":
+            if task_count <= current_settings.AI_ROUTER_SMALL_DAY_TASKS:
+                return "small"
+            return "large"
+
+        if (prompt_chars <= current_settings.AI_ROUTER_SMALL_PROMPT_CHARS
+                and max_tasks <= current_settings.AI_ROUTER_SMALL_MAX_TASKS):
+            return "small"
+        return "large"
+
+    def route(self, kind: str, prompt_chars: int = 0, max_tasks: int = 0,
+              task_count: int = 0) -> Tuple[str, Optional[int]]:
+        """为一次AI调用选择模型，返回 (模型, 探测令牌)；探测请求的令牌需在 record 时原样传回，其他调用为 None"""
+        tier = self._classify(kind, prompt_chars, max_tasks, task_count)
+        fast_model = current_settings.AI_FAST_MODEL
+        strong_model = current_settings.AI_STRONG_MODEL
+
+        preferred = fast_model if tier == "small" else strong_model
+        fallback = strong_model if tier == "small" else fast_model
+
+        now = self._clock()
+        model = preferred
+        probe = None
+        reason = f"{tier}请求使用首选模型"
+        if preferred != fallback:
+            preferred_stats = self._get_stats(preferred)
+            fallback_stats = self._get_stats(fallback)
+            if not preferred_stats.is_healthy():
+                # 不健康的模型没有流量就无法更新统计：每隔 AI_ROUTER_PROBE_INTERVAL 放行一次探测请求
+                if (preferred_stats.probe_token is None and preferred_stats.last_routed is not None
+                        and now - preferred_stats.last_routed >= current_settings.AI_ROUTER_PROBE_INTERVAL):
+                    probe = preferred_stats.probe_token = next(self._probe_tokens)
+                    reason = f"{tier}请求首选模型不健康，发送探测请求检查是否恢复"
+                elif fallback_stats.is_healthy() or fallback_stats.cost() < preferred_stats.cost():
+                    model = fallback
+                    reason = (f"{tier}请求首选模型不健康"
+                              f"（延迟EWMA={preferred_stats.latency_ewma}, 错误率EWMA={preferred_stats.error_ewma:.2f}），改用备选模型")
+
+        self._get_stats(model).last_routed = now
+
+        decision = {
+            "time": datetime.now().isoformat(),
+            "kind": kind,
+            "tier": tier,
+            "model": model,
+            "reason": reason,
+            "prompt_chars": prompt_chars,
+            "max_tasks": max_tasks,
+            "task_count": task_count,
+        }
+        self.decisions.append(decision)
+        logger.info(f"模型路由: kind={kind} tier={tier} model={model} ({reason})")
+        return model, probe
+
+    def record(self, model: str, latency: float, success: bool, probe: Optional[int] = None):
+        """记录调用延迟和结果（probe 为 route 返回的探测令牌）"""
+        self._get_stats(model).record(latency, success, current_settings.AI_ROUTER_EWMA_ALPHA, probe)
+
+    def get_status(self, limit: int = 50) -> dict:
+        """获取路由状态和最近的路由决策"""
+        return {
+            "fast_model": current_settings.AI_FAST_MODEL,
+            "strong_model": current_settings.AI_STRONG_MODEL,
+            "models": {model: stats.to_dict() for model, stats in self.stats.items()},
+            "recent_decisions": list(self.decisions)[-limit:],
+        }
+
+
+# 全局路由实例
+model_router = ModelRouter()
@@ -1,8 +1,8 @@
 """
 数据模型定义 - 简化标签系统
 """
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Union, Any
+from pydantic import BaseModel, Field, field_serializer
+from typing import List, Optional, Dict, Set, Union, Any
 from datetime import datetime, date
 from enum import Enum
 
@@ -12,6 +12,11 @@ class TaskStatus(str, Enum):
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
 
+class RecurrenceFrequency(str, Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+
 class AIJobStatus(str, Enum):
     PENDING = "pending"
     PROCESSING = "processing"
@@ -19,6 +24,19 @@ class AIJobStatus(str, Enum):
     FAILED = "failed"
 
 # ===== 任务相关模型 =====
+class RecurrenceRule(BaseModel):
+    """重复规则：从任务的截止日期（没有时为计划日期）开始重复，实例按查询的日期范围即时展开"""
+    freq: RecurrenceFrequency
+    interval: int = Field(1, ge=1)  # 每隔几天/周/月
+    weekdays: Optional[List[int]] = None  # 按周重复时的星期（0=周一），默认与起始日期相同
+    until: Optional[date] = None  # 最后一次重复的日期（包含）
+    exceptions: Set[date] = set()  # 已完成或跳过的日期，不再展开实例（集合，展开时按日期 O(1) 判断）
+
+    @field_serializer("exceptions")
+    def _sorted_exceptions(self, exceptions: Set[date]) -> List[date]:
+        """按日期升序输出"""
+        return sorted(exceptions)
+
 class Task(BaseModel):
     id: Optional[str] = None
     name: str
@@ -26,10 +44,14 @@ class Task(BaseModel):
     completed: bool = False
     status: TaskStatus = TaskStatus.PENDING
     created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None  # 完成时间，归档的宽限期从此开始计算
     due_date: Optional[datetime] = None
     priority: Optional[str] = "medium"  # low, medium, high
     estimated_hours: Optional[float] = None
     scheduled_date: Optional[date] = None
+    recurrence: Optional[RecurrenceRule] = None
+    occurrence_date: Optional[date] = None  # 重复任务展开的实例所在日期（实例不存储，ID与重复任务相同）
+    depends_on: List[str] = []  # 必须先完成的前置任务ID
 
 class TaskCreate(BaseModel):
     name: str
@@ -38,6 +60,8 @@ class TaskCreate(BaseModel):
     priority: Optional[str] = "medium"
     estimated_hours: Optional[float] = None
     scheduled_date: Optional[date] = None
+    recurrence: Optional[RecurrenceRule] = None
+    depends_on: List[str] = []
 
 class TaskUpdate(BaseModel):
     name: Optional[str] = None
@@ -48,6 +72,52 @@ class TaskUpdate(BaseModel):
     priority: Optional[str] = None
     estimated_hours: Optional[float] = None
     scheduled_date: Optional[date] = None
+    recurrence: Optional[RecurrenceRule] = None
+    depends_on: Optional[List[str]] = None
+
+class TaskFilter(BaseModel):
+    """任务筛选条件（所有条件为AND关系）"""
+    status: Optional[TaskStatus] = None
+    priority: Optional[str] = None
+    completed: Optional[bool] = None
+    due_from: Optional[datetime] = None  # 截止日期下界（包含）
+    due_to: Optional[datetime] = None    # 截止日期上界（包含）
+
+    def is_empty(self) -> bool:
+        return all(value is None for value in self.dict().values())
+
+    def matches(self, task) -> bool:
+        if self.status is not None and task.status != self.status:
+            return False
+        if self.priority is not None and task.priority != self.priority:
+            return False
+        if self.completed is not None and task.completed != self.completed:
+            return False
+        if self.due_from is not None or self.due_to is not None:
+            if task.due_date is None:
+                return False
+            # 按时间戳比较：带时区的筛选值（如 ...Z）与存储的无时区截止时间可以比较，与 DueDateIndex 一致
+            due = task.due_date.timestamp()
+            if self.due_from is not None and due < self.due_from.timestamp():
+                return False
+            if self.due_to is not None and due > self.due_to.timestamp():
+                return False
+        return True
+
+class TaskBulkUpdate(BaseModel):
+    """批量更新：按任务ID列表或筛选条件选择任务（同时提供时取交集）"""
+    ids: Optional[List[str]] = None
+    filter: Optional[TaskFilter] = None
+    update: TaskUpdate
+
+class TaskBulkDelete(BaseModel):
+    """批量删除：按任务ID列表或筛选条件选择任务（同时提供时取交集）"""
+    ids: Optional[List[str]] = None
+    filter: Optional[TaskFilter] = None
+
+class TaskBatchGet(BaseModel):
+    """按任务ID批量读取"""
+    ids: List[str]
 
 # ===== AI相关模型 =====
 class AITaskRequest(BaseModel):
@@ -87,12 +157,22 @@ class DayScheduleResponse(BaseModel):
     schedule: Optional[DaySchedule] = None
     tasks_changed: bool = False
 
+class ScheduleSlot(BaseModel):
+    date: date
+    start_time: str  # HH:MM 格式
+    end_time: str    # HH:MM 格式
+
+class ScheduleConflictRequest(BaseModel):
+    """检查候选时间段与已保存的日程安排是否冲突（可跨多天）"""
+    slots: List[ScheduleSlot]
+
 class AIJob(BaseModel):
     job_id: str
     status: AIJobStatus
     created_at: datetime
     result: Optional[Any] = None
     error: Optional[str] = None
+    deduplicated: Optional[List[Dict[str, Any]]] = None  # 规划中被判定为重复的任务
 
 # ===== 响应模型 =====
 class TaskStatsResponse(BaseModel):
@@ -104,6 +184,7 @@ class TaskStatsResponse(BaseModel):
     by_priority: Dict[str, int]
     by_status: Dict[str, int]
     by_tags: Dict[str, int]
+    archived: int = 0  # 已归档（移出热存储）的已完成任务数
 
 class TagsResponse(BaseModel):
     system_tags: List[str]
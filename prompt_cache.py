@@ -0,0 +1,210 @@
+"""
+相似提示缓存模块 - 基于字符 n-gram 的 MinHash/LSH 近似重复检测
+用于复用语义相近的任务规划结果（如"学习法语" / "我想学习法语基础" / "学法语"）
+"""
+import heapq
+import random
+import re
+import time
+from collections import Counter, OrderedDict
+from difflib import SequenceMatcher
+from operator import itemgetter
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from config import current_settings
+
+# 归一化时去除的口语化填充词
+FILLER_WORDS = ["我想要", "我想", "我要", "想要", "帮我", "请帮", "请", "如何", "怎么", "一下"]
+_PUNCTUATION_PATTERN = re.compile(r"[\s\W_]+", re.UNICODE)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_MAX_SHINGLE_CACHE = 200000
+
+
+def normalize_prompt(prompt: str) -> str:
+    """归一化提示：小写、去标点空白、去填充词"""
+    text = _PUNCTUATION_PATTERN.sub("", prompt.lower())
+    for word in FILLER_WORDS:
+        text = text.replace(word, "")
+    return text
+
+
+def char_ngrams(text: str, sizes: Tuple[int, ...] = (1, 2)) -> FrozenSet[str]:
+    """字符 n-gram 集合（默认单字 + 双字，适合短中文文本）"""
+    grams = set()
+    for n in sizes:
+        if len(text) < n:
+            continue
+        for i in range(len(text) - n + 1):
+            grams.add(text[i:i + n])
+    return frozenset(grams)
+
+
+def has_substitution(a: str, b: str) -> bool:
+    """两段归一化文本对齐后是否有被替换的内容（"学习法语基础" / "学习日语基础"），
+    而不只是一侧多出或少了字词（"学习法语" / "学习法语基础"、"学法语"）；
+    替换的往往正是决定规划内容的关键词，整体相似度再高也不能复用"""
+    opcodes = SequenceMatcher(None, a, b, autojunk=False).get_opcodes()
+    return any(tag == "replace" for tag, *_ in opcodes)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Jaccard 相似度"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class CachedPlan:
+    """缓存的规划结果"""
+    __slots__ = ("entry_id", "prompt", "text", "shingles", "task_type", "project_theme", "tasks", "band_keys", "created_at")
+
+    def __init__(self, entry_id: int, prompt: str, text: str, shingles: FrozenSet[str], task_type: str,
+                 project_theme: str, tasks: List[dict], band_keys: List[int]):
+        self.entry_id = entry_id
+        self.prompt = prompt
+        self.text = text  # 归一化后的提示
+        self.shingles = shingles
+        self.task_type = task_type
+        self.project_theme = project_theme
+        self.tasks = tasks
+        self.band_keys = band_keys
+        self.created_at = time.time()
+
+
+class MinHashPromptCache:
+    """MinHash + LSH 分桶的相似提示缓存"""
+
+    def __init__(self, bands: int = 16, rows: int = 3, max_candidates: int = 10,
+                 max_bucket_scan: int = 256, seed: int = 42):
+        self.bands = bands
+        self.rows = rows
+        self.max_candidates = max_candidates
+        self.max_bucket_scan = max_bucket_scan
+
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(bands * rows)
+        ]
+
+        # n-gram -> 各排列下的哈希值，签名计算只需逐列取最小值
+        self._shingle_hashes: Dict[str, Tuple[int, ...]] = {}
+
+        self._entries: "OrderedDict[int, CachedPlan]" = OrderedDict()
+        self._buckets: Dict[int, List[int]] = {}
+        self._next_id = 0
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _hashes_of(self, shingle: str) -> Tuple[int, ...]:
+        """单个 n-gram 在所有排列下的哈希值（带缓存）"""
+        hashes = self._shingle_hashes.get(shingle)
+        if hashes is None:
+            if len(self._shingle_hashes) >= _MAX_SHINGLE_CACHE:
+                self._shingle_hashes.clear()
+            h = hash(shingle) & _MAX_HASH
+            hashes = tuple((a * h + b) % _MERSENNE_PRIME for a, b in self._permutations)
+            self._shingle_hashes[shingle] = hashes
+        return hashes
+
+    def _signature(self, shingles: FrozenSet[str]) -> List[int]:
+        """计算 MinHash 签名"""
+        return list(map(min, zip(*[self._hashes_of(shingle) for shingle in shingles])))
+
+    def _band_keys(self, signature: List[int]) -> List[int]:
+        """把签名切分为 LSH 分桶键"""
+        rows = self.rows
+        return [hash((band, *signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def lookup(self, prompt: str, task_type: str, min_tasks: int = 0) -> Optional[Tuple[CachedPlan, float]]:
+        """查找相似度超过阈值、任务类型一致且没有替换内容的缓存规划，返回 (规划, 相似度)"""
+        text = normalize_prompt(prompt)
+        shingles = char_ngrams(text)
+        if not shingles or not self._entries:
+            self.stats["misses"] += 1
+            return None
+
+        # 统计候选项命中的分桶数量，只精确校验命中最多的少数候选；
+        # 过大的分桶来自高频 n-gram（如"学习"），区分度低，直接跳过
+        band_hits = Counter()
+        max_bucket_scan = self.max_bucket_scan
+        for key in self._band_keys(self._signature(shingles)):
+            bucket = self._buckets.get(key)
+            if bucket and len(bucket) <= max_bucket_scan:
+                band_hits.update(bucket)
+
+        threshold = current_settings.PROMPT_CACHE_SIMILARITY_THRESHOLD
+        expire_before = time.time() - current_settings.PROMPT_CACHE_TTL
+        best = None
+        best_similarity = 0.0
+        for entry_id, _ in heapq.nlargest(self.max_candidates, band_hits.items(), key=itemgetter(1)):
+            entry = self._entries.get(entry_id)
+            if entry is None or entry.task_type != task_type or entry.created_at < expire_before:
+                continue
+            if len(entry.tasks) < min_tasks:
+                continue
+            similarity = jaccard(shingles, entry.shingles)
+            if similarity >= threshold and similarity > best_similarity and not has_substitution(text, entry.text):
+                best, best_similarity = entry, similarity
+
+        if best is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        return best, best_similarity
+
+    def store(self, prompt: str, task_type: str, project_theme: str, tasks: List[dict]) -> Optional[CachedPlan]:
+        """缓存规划结果"""
+        text = normalize_prompt(prompt)
+        shingles = char_ngrams(text)
+        if not shingles or not tasks:
+            return None
+
+        band_keys = self._band_keys(self._signature(shingles))
+        entry = CachedPlan(self._next_id, prompt, text, shingles, task_type, project_theme, tasks, band_keys)
+        self._next_id += 1
+
+        self._entries[entry.entry_id] = entry
+        for key in band_keys:
+            self._buckets.setdefault(key, []).append(entry.entry_id)
+        self.stats["stores"] += 1
+
+        while len(self._entries) > current_settings.PROMPT_CACHE_MAX_ENTRIES:
+            self._evict_oldest()
+        return entry
+
+    def _evict_oldest(self):
+        """淘汰最早缓存的规划"""
+        _, entry = self._entries.popitem(last=False)
+        for key in entry.band_keys:
+            bucket = self._buckets.get(key)
+            if not bucket:
+                continue
+            bucket.remove(entry.entry_id)
+            if not bucket:
+                del self._buckets[key]
+        self.stats["evictions"] += 1
+
+    def clear(self):
+        """清空缓存"""
+        self._entries.clear()
+        self._buckets.clear()
+        self._shingle_hashes.clear()
+
+    def get_stats(self) -> dict:
+        """获取缓存统计"""
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "enabled": current_settings.PROMPT_CACHE_ENABLED,
+            "similarity_threshold": current_settings.PROMPT_CACHE_SIMILARITY_THRESHOLD,
+        }
+
+
+# 全局缓存实例
+prompt_cache = MinHashPromptCache()
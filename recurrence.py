@@ -0,0 +1,93 @@
+"""
+重复任务模块 - 按查询的日期范围即时展开重复任务的实例
+只存储一条重复任务（主任务），实例不落库，内存占用与重复的时间跨度无关
+"""
+import copy
+from datetime import date, datetime, timedelta
+from typing import Iterator
+
+from models import RecurrenceFrequency
+
+
+def is_recurring_master(task) -> bool:
+    """是否为存储的重复任务（展开的实例不算）"""
+    return task.recurrence is not None and task.occurrence_date is None
+
+
+def anchor_date(task) -> date:
+    """重复的起始日期：截止日期，没有时为计划日期，再没有时为创建日期"""
+    if task.due_date:
+        return task.due_date.date()
+    if task.scheduled_date:
+        return task.scheduled_date
+    return (task.created_at or datetime.now()).date()
+
+
+def _matches(rule, anchor: date, day: date) -> bool:
+    """day（不早于起始日期）是否落在重复周期上"""
+    if rule.freq == RecurrenceFrequency.DAILY:
+        return (day - anchor).days % rule.interval == 0
+    if rule.freq == RecurrenceFrequency.WEEKLY:
+        weekdays = rule.weekdays or [anchor.weekday()]
+        weeks = ((day - anchor).days + anchor.weekday()) // 7  # 距起始日期所在周的周数
+        return weeks % rule.interval == 0 and day.weekday() in weekdays
+    months = (day.year - anchor.year) * 12 + day.month - anchor.month
+    return day.day == anchor.day and months % rule.interval == 0
+
+
+def occurs_on(task, day: date) -> bool:
+    """重复任务在指定日期是否有实例"""
+    rule = task.recurrence
+    anchor = anchor_date(task)
+    if day < anchor or (rule.until is not None and day > rule.until) or day in rule.exceptions:
+        return False
+    return _matches(rule, anchor, day)
+
+
+def occurrence_dates(task, start: date, end: date) -> Iterator[date]:
+    """重复任务在 [start, end] 内的实例日期（升序，逐个产出）"""
+    rule = task.recurrence
+    anchor = anchor_date(task)
+    start = max(start, anchor)
+    if rule.until is not None:
+        end = min(end, rule.until)
+    if start > end:
+        return
+
+    exceptions = rule.exceptions
+    if rule.freq == RecurrenceFrequency.DAILY:
+        # 按天重复直接跳到范围内的第一个实例
+        day = anchor + timedelta(days=-(-(start - anchor).days // rule.interval) * rule.interval)
+        step = timedelta(days=rule.interval)
+        while day <= end:
+            if day not in exceptions:
+                yield day
+            day += step
+        return
+
+    day = start
+    step = timedelta(days=1)
+    while day <= end:
+        if day not in exceptions and _matches(rule, anchor, day):
+            yield day
+        day += step
+
+
+def prune_exceptions(task) -> None:
+    """去掉不可能再有实例的例外日期（早于起始日期或晚于结束日期）"""
+    rule = task.recurrence
+    anchor = anchor_date(task)
+    rule.exceptions = {
+        day for day in rule.exceptions if day >= anchor and (rule.until is None or day <= rule.until)
+    }
+
+
+def make_occurrence(task, day: date):
+    """生成重复任务在指定日期的实例：截止时间（保留时刻）和计划日期移到该日"""
+    occurrence = copy.copy(task)
+    occurrence.occurrence_date = day
+    if task.due_date:
+        occurrence.due_date = datetime.combine(day, task.due_date.timetz())
+    if task.scheduled_date or not task.due_date:
+        occurrence.scheduled_date = day
+    return occurrence
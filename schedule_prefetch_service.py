@@ -0,0 +1,173 @@
+"""
+日程预生成服务 - 在夜间低峰期提前生成日程安排
+遍历有未完成任务（包括重复任务实例）的日期，通过正常的 process_day_schedule 流程生成 DaySchedule，
+任务版本未变化的日期直接跳过
+"""
+import asyncio
+import uuid
+from typing import Callable, Optional
+from datetime import datetime, time, timedelta
+
+from models import AIJob, AIJobStatus
+from database import db
+from ai_service import AIService
+from config import current_settings
+from time_slots import parse_hhmm
+
+
+def _parse_hhmm(value: str) -> time:
+    """解析 HH:MM 格式的时间"""
+    hour, minute = divmod(parse_hhmm(value), 60)
+    return time(hour % 24, minute)
+
+
+class SchedulePrefetchService:
+    # 运行指标
+    metrics = {
+        "runs_started": 0,
+        "runs_completed": 0,
+        "runs_interrupted": 0,
+        "dates_scanned": 0,
+        "dates_generated": 0,
+        "dates_skipped_unchanged": 0,
+        "dates_failed": 0,
+        "current_run_total": 0,
+        "current_run_processed": 0,
+        "last_run_started_at": None,
+        "last_run_finished_at": None,
+    }
+
+    _running: bool = False
+
+    @staticmethod
+    def in_window(now: datetime) -> bool:
+        """判断当前时间是否处于预生成时间窗口内（支持跨午夜的窗口）"""
+        start = _parse_hhmm(current_settings.SCHEDULE_PREFETCH_WINDOW_START)
+        end = _parse_hhmm(current_settings.SCHEDULE_PREFETCH_WINDOW_END)
+        current = now.time()
+
+        if start <= end:
+            return start <= current < end
+        return current >= start or current < end
+
+    @staticmethod
+    def _window_length() -> timedelta:
+        """时间窗口长度"""
+        start = _parse_hhmm(current_settings.SCHEDULE_PREFETCH_WINDOW_START)
+        end = _parse_hhmm(current_settings.SCHEDULE_PREFETCH_WINDOW_END)
+        start_minutes = start.hour * 60 + start.minute
+        end_minutes = end.hour * 60 + end.minute
+        return timedelta(minutes=(end_minutes - start_minutes) % (24 * 60))
+
+    @staticmethod
+    async def run_once(now: Optional[datetime] = None, respect_window: bool = True,
+                       clock: Optional[Callable[[], datetime]] = None) -> dict:
+        """执行一轮预生成，返回本轮统计；clock 为时间来源（时间窗口检查和指标时间都用它），
+        未指定时传入 now 则固定为 now，否则为当前时间"""
+        if SchedulePrefetchService._running:
+            return {"started": False, "reason": "预生成正在进行中"}
+
+        SchedulePrefetchService._running = True
+        metrics = SchedulePrefetchService.metrics
+        run_stats = {"started": True, "scanned": 0, "generated": 0, "skipped_unchanged": 0, "failed": 0, "completed": False}
+
+        if clock is None:
+            clock = (lambda: now) if now is not None else datetime.now
+
+        try:
+            now = clock()
+            start_date = now.date()
+            end_date = start_date + timedelta(days=current_settings.SCHEDULE_PREFETCH_DAYS_AHEAD)
+            target_dates = db.get_pending_dates(start_date, end_date)
+
+            metrics["runs_started"] += 1
+            metrics["last_run_started_at"] = now.isoformat()
+            metrics["current_run_total"] = len(target_dates)
+            metrics["current_run_processed"] = 0
+
+            rate = max(current_settings.SCHEDULE_PREFETCH_RATE_PER_MINUTE, 0.001)
+            interval = 60.0 / rate
+
+            print(f"🌙 开始日程预生成: {len(target_dates)} 个日期 ({start_date} ~ {end_date})")
+
+            for target_date in target_dates:
+                if respect_window and not SchedulePrefetchService.in_window(clock()):
+                    print("⏸️ 已离开预生成时间窗口，停止本轮预生成")
+                    metrics["runs_interrupted"] += 1
+                    return run_stats
+
+                date_str = target_date.isoformat()
+                run_stats["scanned"] += 1
+                metrics["dates_scanned"] += 1
+
+                # 任务版本未变化则跳过
+                current_version = AIService.get_date_task_version(target_date)
+                existing_schedule = db.get_day_schedule(date_str)
+                if existing_schedule and existing_schedule.task_version == current_version:
+                    run_stats["skipped_unchanged"] += 1
+                    metrics["dates_skipped_unchanged"] += 1
+                    metrics["current_run_processed"] += 1
+                    continue
+
+                job_id = str(uuid.uuid4())
+                db.create_ai_job(AIJob(
+                    job_id=job_id,
+                    status=AIJobStatus.PENDING,
+                    created_at=clock()
+                ))
+                await AIService.process_day_schedule(job_id, date_str)
+
+                job = db.get_ai_job(job_id)
+                if job and job.status == AIJobStatus.COMPLETED:
+                    run_stats["generated"] += 1
+                    metrics["dates_generated"] += 1
+                else:
+                    run_stats["failed"] += 1
+                    metrics["dates_failed"] += 1
+                    print(f"❌ 预生成 {date_str} 失败: {job.error if job else '作业未找到'}")
+                metrics["current_run_processed"] += 1
+
+                # 按配置速率限流
+                await asyncio.sleep(interval)
+
+            run_stats["completed"] = True
+            metrics["runs_completed"] += 1
+            metrics["last_run_finished_at"] = clock().isoformat()
+            print(f"✅ 日程预生成完成: 生成 {run_stats['generated']} 个，跳过 {run_stats['skipped_unchanged']} 个，失败 {run_stats['failed']} 个")
+            return run_stats
+        finally:
+            SchedulePrefetchService._running = False
+
+    @staticmethod
+    async def run_forever():
+        """周期性检查时间窗口，每个窗口内完整执行一轮预生成"""
+        while True:
+            try:
+                now = datetime.now()
+                if current_settings.SCHEDULE_PREFETCH_ENABLED and SchedulePrefetchService.in_window(now):
+                    last_finished = SchedulePrefetchService.metrics["last_run_finished_at"]
+                    # 同一个时间窗口内只完整执行一次
+                    already_done = (
+                        last_finished is not None
+                        and now - datetime.fromisoformat(last_finished) < SchedulePrefetchService._window_length()
+                    )
+                    if not already_done:
+                        await SchedulePrefetchService.run_once(clock=datetime.now)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"日程预生成出错: {e}")
+
+            await asyncio.sleep(current_settings.SCHEDULE_PREFETCH_CHECK_INTERVAL)
+
+    @staticmethod
+    def get_metrics() -> dict:
+        """获取预生成指标"""
+        return {
+            **SchedulePrefetchService.metrics,
+            "running": SchedulePrefetchService._running,
+            "enabled": current_settings.SCHEDULE_PREFETCH_ENABLED,
+            "window": f"{current_settings.SCHEDULE_PREFETCH_WINDOW_START}-{current_settings.SCHEDULE_PREFETCH_WINDOW_END}",
+            "rate_per_minute": current_settings.SCHEDULE_PREFETCH_RATE_PER_MINUTE,
+            "days_ahead": current_settings.SCHEDULE_PREFETCH_DAYS_AHEAD,
+        }
@@ -1,18 +1,20 @@
 """
 标签服务模块 - 基于任务属性动态计算标签
 """
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 
+from recurrence import is_recurring_master, occurs_on
+
 class TagService:
     # 定义所有可能的标签
     AVAILABLE_TAGS = ["今日", "明日", "重要", "已完成", "已过期"]
     
     @staticmethod
-    def get_task_tags(task) -> List[str]:
-        """根据任务属性动态计算标签"""
+    def get_task_tags(task, now: Optional[datetime] = None) -> List[str]:
+        """根据任务属性动态计算标签（批量计算时由调用方传入 now，避免逐任务取时间）"""
         tags = []
-        now = datetime.now()
+        now = now or datetime.now()
         today = now.date()
         tomorrow = today + timedelta(days=1)
         
@@ -21,8 +23,13 @@ class TagService:
             tags.append("已完成")
             return tags  # 已完成的任务只显示这一个标签
         
-        # 时间相关标签
-        if task.due_date:
+        # 时间相关标签（重复任务按今天/明天是否有实例计算，不会过期）
+        if is_recurring_master(task):
+            if occurs_on(task, today):
+                tags.append("今日")
+            elif occurs_on(task, tomorrow):
+                tags.append("明日")
+        elif task.due_date:
             due_date = task.due_date.date()
             
             # 已过期 - 优先级高于今日/明日
@@ -0,0 +1,67 @@
+"""
+任务记录模块 - 内存数据库中的紧凑任务表示
+TaskRecord 与 models.Task 字段相同，但使用 __slots__（没有逐实例 __dict__ 和 pydantic 的校验状态），
+优先级、状态等取值有限的字段驻留为共享对象。
+返回单个任务的服务方法用 to_task() 转换为独立的 models.Task；列表接口直接编码记录（见 task_serializer），不经过 pydantic
+"""
+import sys
+
+from pydantic import BaseModel
+
+from models import Task
+
+TASK_FIELDS = tuple(Task.model_fields)
+
+# 各字段的默认值（可变默认值在创建记录时复制）
+_DEFAULTS = {name: field.get_default(call_default_factory=True) for name, field in Task.model_fields.items()}
+_MUTABLE_DEFAULTS = tuple(name for name, value in _DEFAULTS.items() if isinstance(value, (list, dict, set)))
+
+
+def _intern(value):
+    """取值有限的字符串字段驻留为共享对象"""
+    return sys.intern(value) if type(value) is str else value
+
+
+class TaskRecord:
+    """紧凑的任务记录（可读写属性与 models.Task 一致）"""
+
+    __slots__ = TASK_FIELDS
+
+    def __init__(self, **values):
+        for name in TASK_FIELDS:
+            if name in values:
+                setattr(self, name, values[name])
+            elif name in _MUTABLE_DEFAULTS:
+                setattr(self, name, type(_DEFAULTS[name])(_DEFAULTS[name]))
+            else:
+                setattr(self, name, _DEFAULTS[name])
+        self.priority = _intern(self.priority)
+
+    @classmethod
+    def from_task(cls, task: Task) -> "TaskRecord":
+        """由 models.Task 创建记录（共享字段值，不复制）"""
+        record = cls.__new__(cls)
+        for name in TASK_FIELDS:
+            setattr(record, name, getattr(task, name))
+        record.priority = _intern(record.priority)
+        return record
+
+    def to_task(self) -> Task:
+        """转换为 models.Task（字段已校验，不再重复校验）；列表和嵌套模型复制一份，修改返回的 Task 不影响存储的记录"""
+        values = {}
+        for name in TASK_FIELDS:
+            value = getattr(self, name)
+            if isinstance(value, list):
+                value = list(value)
+            elif isinstance(value, BaseModel):
+                value = value.model_copy(deep=True)
+            values[name] = value
+        return Task.model_construct(**values)
+
+    def __repr__(self) -> str:
+        return f"TaskRecord(id={self.id!r}, name={self.name!r})"
+
+
+def to_record(task) -> TaskRecord:
+    """写入数据库前转换为紧凑记录（已经是记录时原样返回）"""
+    return task if isinstance(task, TaskRecord) else TaskRecord.from_task(task)
@@ -0,0 +1,117 @@
+"""
+任务序列化模块 - 任务列表的快速 JSON 编码
+按 Task 字段预先生成编码器，逐任务缓存编码后的字节（任务写入时失效），
+列表响应只需拼接字节，不再逐请求做 response_model 校验
+"""
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Dict, Iterable, List
+
+from pydantic import BaseModel
+
+from models import Task
+from indexes import TaskIndex
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时退回标准库
+    orjson = None
+
+
+def _json_default(value):
+    """标准库 json 无法直接编码的类型"""
+    if isinstance(value, datetime) or isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, BaseModel):
+        return value.dict()
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def _orjson_default(value):
+    """orjson 无法直接编码的类型（datetime/date/Enum 由 orjson 原生处理）"""
+    if isinstance(value, BaseModel):
+        return value.dict()
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def dumps(value) -> bytes:
+    """编码为 JSON 字节"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_orjson_default)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+# 按 Task 模型字段顺序预先生成的字段列表
+TASK_FIELDS = tuple(Task.model_fields)
+
+
+def task_to_dict(task, fields=TASK_FIELDS) -> dict:
+    """取出任务的字段（不经过 pydantic 校验）"""
+    return {field: getattr(task, field) for field in fields}
+
+
+def parse_fields(fields: str = None):
+    """解析字段投影参数（逗号分隔），始终包含 id；未指定时返回 None 表示全部字段"""
+    if not fields:
+        return None
+
+    selected = ["id"]
+    for field in fields.split(","):
+        field = field.strip()
+        if not field or field in selected:
+            continue
+        if field not in TASK_FIELDS:
+            raise ValueError(f"不支持的字段: {field}")
+        selected.append(field)
+    return tuple(selected)
+
+
+class EncodedTaskCache(TaskIndex):
+    """逐任务缓存编码后的 JSON 字节；作为数据库索引注册，任务写入或删除时自动失效"""
+
+    def __init__(self):
+        self._cache: Dict[str, bytes] = {}
+
+    def add(self, task) -> None:
+        """写入时不预先编码，首次读取时再编码"""
+
+    def add_many(self, tasks) -> None:
+        """写入时不预先编码，首次读取时再编码"""
+
+    def discard(self, task_id: str) -> None:
+        self._cache.pop(task_id, None)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def encode(self, task) -> bytes:
+        """获取任务的 JSON 字节（命中缓存时直接返回）；重复任务的实例与重复任务同ID，不走缓存"""
+        if task.occurrence_date is not None:
+            return dumps(task_to_dict(task))
+        encoded = self._cache.get(task.id)
+        if encoded is None:
+            encoded = dumps(task_to_dict(task))
+            if task.id is not None:
+                self._cache[task.id] = encoded
+        return encoded
+
+    def encode_many(self, tasks: Iterable, fields=None) -> bytes:
+        """把任务列表编码为 JSON 数组字节；指定字段投影时只编码这些字段（不走缓存）"""
+        if fields is not None:
+            return dumps([task_to_dict(task, fields) for task in tasks])
+
+        encode = self.encode
+        return b"[" + b",".join([encode(task) for task in tasks]) + b"]"
+
+    def encode_calendar(self, calendar_data: Dict[str, Dict[str, List]], fields=None) -> bytes:
+        """编码日历数据：{日期: {"due": [任务], "scheduled": [任务]}}"""
+        days = []
+        for date_str, groups in calendar_data.items():
+            encoded_groups = b",".join(
+                dumps(name) + b":" + self.encode_many(tasks, fields) for name, tasks in groups.items()
+            )
+            days.append(dumps(date_str) + b":{" + encoded_groups + b"}")
+        return b"{" + b",".join(days) + b"}"
@@ -1,19 +1,37 @@
 """
 任务服务模块 - 简化标签系统后的版本
 """
+import base64
+import codecs
+import csv
+import json
+import time
 import uuid
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
 from datetime import datetime, date, timedelta
 
-from models import Task, TaskCreate, TaskUpdate, TaskStatus
+from pydantic import ValidationError
+
+from models import Task, TaskCreate, TaskUpdate, TaskStatus, TaskFilter, TaskBulkUpdate, TaskBulkDelete
 from database import db
+from config import current_settings
 from tag_service import TagService
+from ai_service import AIService
+from indexes import PRIORITY_RANK, DayCountIndex, parse_sort_spec, format_sort_spec
+from recurrence import is_recurring_master, occurs_on, prune_exceptions
+from task_serializer import dumps, task_to_dict
+from task_record import TaskRecord
+from analytics import ENGINE as ANALYTICS_ENGINE, OVERDUE_BUCKET_EDGES, bucket_label
+
+DEFAULT_SORT = "created_at"
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_REPORTED_ERRORS = 100
 
 class TaskService:
     @staticmethod
-    def create_task(task_data: TaskCreate) -> Task:
-        """创建新任务"""
-        new_task = Task(
+    def _build_task(task_data: TaskCreate) -> TaskRecord:
+        """根据创建请求构建任务记录（字段已由 TaskCreate 校验，直接构建紧凑记录）"""
+        return TaskRecord(
             id=str(uuid.uuid4()),
             name=task_data.name,
             description=task_data.description,
@@ -22,51 +40,397 @@ class TaskService:
             priority=task_data.priority,
             estimated_hours=task_data.estimated_hours,
             scheduled_date=task_data.scheduled_date,
+            recurrence=task_data.recurrence,
+            depends_on=TaskService._check_dependencies(None, task_data.depends_on),
         )
-        
-        return db.create_task(new_task)
+
+    @staticmethod
+    def _check_dependencies(task_id: Optional[str], depends_on: List[str]) -> List[str]:
+        """校验前置任务（必须存在、不能依赖自身、不能成环），返回去重后的前置任务ID"""
+        depends_on = list(dict.fromkeys(depends_on))
+        _, missing = db.get_tasks(depends_on)
+        missing = [task_id for task_id in missing if not db.is_archived(task_id)]  # 已归档的前置任务视为已完成
+        if missing:
+            raise ValueError(f"依赖的任务不存在: {missing[0]}")
+        if task_id is not None:
+            TaskService._check_dependency_graph(task_id, depends_on)
+        return depends_on
+
+    @staticmethod
+    def _check_dependency_graph(task_id: str, depends_on: List[str]) -> None:
+        """校验任务改为依赖 depends_on 后不依赖自身、不成环"""
+        if task_id in depends_on:
+            raise ValueError("任务不能依赖自身")
+        cycle = db.find_dependency_cycle(task_id, depends_on)
+        if cycle:
+            raise ValueError(f"依赖关系成环: {' -> '.join(cycle + cycle[:1])}")
+
+    @staticmethod
+    def create_task(task_data: TaskCreate) -> Task:
+        """创建新任务"""
+        return db.create_task(TaskService._build_task(task_data)).to_task()
+
+    @staticmethod
+    def create_tasks(tasks_data: List[TaskCreate]) -> List[Task]:
+        """批量创建任务（原子写入）"""
+        return [record.to_task() for record in TaskService._create_records(tasks_data)]
+
+    @staticmethod
+    def _create_records(tasks_data: List[TaskCreate]) -> List[TaskRecord]:
+        """批量创建任务，返回数据库中的任务记录（不转换为 Task，供内部批量写入使用）"""
+        return db.create_tasks([TaskService._build_task(task_data) for task_data in tasks_data])
+
+    @staticmethod
+    def get_ready_tasks(limit: Optional[int] = None) -> List[TaskRecord]:
+        """获取可开始的任务（前置任务都已完成），按截止时间升序"""
+        return db.get_ready_tasks(limit)
 
     @staticmethod
     def get_task(task_id: str) -> Optional[Task]:
         """获取单个任务"""
-        return db.get_task(task_id)
+        record = db.get_task(task_id)
+        return record.to_task() if record else None
 
     @staticmethod
-    def get_all_tasks() -> List[Task]:
+    def get_tasks(task_ids: List[str]) -> Tuple[List[TaskRecord], List[str]]:
+        """按ID批量获取任务，返回 (找到的任务, 不存在的任务ID)"""
+        return db.get_tasks(task_ids)
+
+    @staticmethod
+    def get_all_tasks() -> List[TaskRecord]:
         """获取所有任务"""
         return db.get_all_tasks()
 
     @staticmethod
-    def get_tasks_by_tags(tags: List[str]) -> List[Task]:
+    def _encode_cursor(sort_spec, entry: tuple) -> str:
+        """把分页位置编码为游标"""
+        key, task_id = entry
+        payload = json.dumps([format_sort_spec(sort_spec), list(key), task_id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(sort_spec, cursor: str) -> tuple:
+        """解析游标，游标必须与当前排序规则一致"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            sort_name, key, task_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (ValueError, TypeError):
+            raise ValueError("游标格式错误")
+        if sort_name != format_sort_spec(sort_spec):
+            raise ValueError("游标与排序规则不一致")
+        # 排序键为每个排序字段的 (缺失标记, 数值)，篡改的游标不能进入索引比较
+        if (not isinstance(key, list) or len(key) != 2 * len(sort_spec) or not isinstance(task_id, str)
+                or not all(isinstance(part, (int, float)) and not isinstance(part, bool) for part in key)):
+            raise ValueError("游标格式错误")
+        return tuple(key), task_id
+
+    @staticmethod
+    def query_tasks(task_filter: TaskFilter, sort: Optional[str] = None, limit: Optional[int] = None,
+                    cursor: Optional[str] = None) -> Tuple[List[TaskRecord], Optional[str]]:
+        """筛选、排序并分页查询任务，返回 (任务列表, 下一页游标)"""
+        sort_spec = parse_sort_spec(sort or DEFAULT_SORT)
+        after = TaskService._decode_cursor(sort_spec, cursor) if cursor else None
+
+        tasks, last_entry = db.query_tasks(
+            sort_spec,
+            None if task_filter.is_empty() else task_filter,
+            limit,
+            after
+        )
+        next_cursor = TaskService._encode_cursor(sort_spec, last_entry) if last_entry else None
+        return tasks, next_cursor
+
+    @staticmethod
+    def get_tasks_due_between(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                              limit: Optional[int] = None) -> List[TaskRecord]:
+        """获取截止时间在指定范围内的未完成任务（按截止时间升序）"""
+        return db.get_tasks_due_between(start, end, limit)
+
+    @staticmethod
+    def get_next_up_tasks(k: int = 10) -> List[TaskRecord]:
+        """按紧急度（优先级 + 距截止时间）获取最紧急的 k 个未完成任务"""
+        lead_seconds = {
+            "high": current_settings.URGENCY_LEAD_HOURS_HIGH * 3600,
+            "medium": current_settings.URGENCY_LEAD_HOURS_MEDIUM * 3600,
+            "low": current_settings.URGENCY_LEAD_HOURS_LOW * 3600,
+        }
+        return [task for task, _ in db.get_most_urgent_tasks(k, lead_seconds)]
+
+    @staticmethod
+    def search_tasks(query: str, limit: int = 20) -> Tuple[List[TaskRecord], int, bool]:
+        """全文检索任务（按相关度降序），返回 (任务列表, 命中总数, 总数是否精确)"""
+        matches, total, exact = db.search_tasks(query, limit)
+        return [task for task, _ in matches], total, exact
+
+    @staticmethod
+    def export_tasks(export_format: str = "ndjson", chunk_size: int = 256):
+        """流式导出所有任务，按块产出 NDJSON 行或 JSON 数组片段，内存占用与任务总数无关
+        （直接编码，不写入逐任务的字节缓存）"""
+        if export_format == "json":
+            yield b"["
+
+        lines = []
+        first = True
+        for task in db.iter_tasks():
+            encoded = dumps(task_to_dict(task))
+            if export_format == "json":
+                lines.append(encoded if first else b"," + encoded)
+            else:
+                lines.append(encoded + b"\n")
+            first = False
+
+            if len(lines) >= chunk_size:
+                yield b"".join(lines)
+                lines = []
+
+        if lines:
+            yield b"".join(lines)
+        if export_format == "json":
+            yield b"]"
+
+    @staticmethod
+    async def _iter_lines(chunks: AsyncIterator[bytes]):
+        """把字节流增量解码并切分为行"""
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        pending = ""
+        async for chunk in chunks:
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line.rstrip("\r")
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            yield pending.rstrip("\r")
+
+    @staticmethod
+    async def _iter_import_rows(chunks: AsyncIterator[bytes], import_format: str):
+        """逐行解析导入数据，产出 (行号, 行数据或解析错误)"""
+        header = None
+        record, record_line = "", 0
+        line_no = 0
+        async for line in TaskService._iter_lines(chunks):
+            line_no += 1
+            if import_format == "jsonl":
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                    if not isinstance(row, dict):
+                        raise ValueError("每行必须是JSON对象")
+                    yield line_no, row
+                except ValueError as e:
+                    yield line_no, e
+                continue
+
+            # CSV：引号内可能包含换行，引号未闭合时继续拼接下一行
+            record = f"{record}\n{line}" if record else line
+            record_line = record_line or line_no
+            if record.count('"') % 2:
+                continue
+            current, current_line = record, record_line
+            record, record_line = "", 0
+
+            if not current.strip():
+                continue
+            try:
+                values = next(csv.reader([current]))
+            except csv.Error as e:
+                yield current_line, e
+                continue
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            if len(values) != len(header):
+                yield current_line, ValueError(f"列数不匹配：期望{len(header)}列，实际{len(values)}列")
+                continue
+            yield current_line, {name: value for name, value in zip(header, values) if value != ""}
+
+        if record:
+            yield record_line, ValueError("CSV引号未闭合")
+
+    @staticmethod
+    async def import_tasks(chunks: AsyncIterator[bytes], import_format: str = "jsonl") -> dict:
+        """流式批量导入任务：逐行解析校验，按块批量写入，单行错误不中断导入"""
+        started = time.perf_counter()
+        total_rows = imported = failed = 0
+        errors = []
+        batch = []
+
+        def record_error(line_no: int, error: Exception):
+            nonlocal failed
+            failed += 1
+            if len(errors) >= IMPORT_MAX_REPORTED_ERRORS:
+                return
+            if isinstance(error, ValidationError):
+                message = "; ".join(
+                    f"{'.'.join(str(loc) for loc in item['loc'])}: {item['msg']}" for item in error.errors()
+                )
+            else:
+                message = str(error)
+            errors.append({"line": line_no, "error": message})
+
+        async for line_no, row in TaskService._iter_import_rows(chunks, import_format):
+            total_rows += 1
+            if isinstance(row, Exception):
+                record_error(line_no, row)
+                continue
+            try:
+                task_data = TaskCreate(**row)
+                TaskService._check_dependencies(None, task_data.depends_on)
+                batch.append(task_data)
+            except ValueError as e:  # 包括 pydantic 的 ValidationError
+                record_error(line_no, e)
+                continue
+
+            if len(batch) >= IMPORT_CHUNK_SIZE:
+                imported += len(TaskService._create_records(batch))
+                batch = []
+
+        if batch:
+            imported += len(TaskService._create_records(batch))
+
+        elapsed = time.perf_counter() - started
+        return {
+            "format": import_format,
+            "total_rows": total_rows,
+            "imported": imported,
+            "failed": failed,
+            "errors": errors,
+            "errors_truncated": failed > len(errors),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(total_rows / elapsed, 1) if elapsed > 0 else None,
+        }
+
+    @staticmethod
+    def get_tasks_by_tags(tags: List[str]) -> List[TaskRecord]:
         """根据标签筛选任务"""
         all_tasks = db.get_all_tasks()
         return TagService.get_tasks_by_tags(all_tasks, tags)
 
     @staticmethod
-    def get_tasks_by_tag(tag: str) -> List[Task]:
+    def get_tasks_by_tag(tag: str) -> List[TaskRecord]:
         """根据单个标签获取任务"""
         all_tasks = db.get_all_tasks()
         return TagService.get_tasks_by_tag(all_tasks, tag)
 
     @staticmethod
-    def update_task(task_id: str, task_update: TaskUpdate) -> Optional[Task]:
-        """更新任务"""
-        task = db.get_task(task_id)
-        if not task:
-            return None
-
-        # 应用更新
-        update_data = task_update.dict(exclude_unset=True)
+    def _apply_update(task: Task, update_data: dict):
+        """把更新字段应用到任务上"""
         for field, value in update_data.items():
             setattr(task, field, value)
 
         # 如果完成状态发生变化，更新相关状态
         if task.completed:
             task.status = TaskStatus.COMPLETED
+            if task.completed_at is None:
+                task.completed_at = datetime.now()
         else:
             task.status = TaskStatus.PENDING
+            task.completed_at = None
+
+    @staticmethod
+    def update_task(task_id: str, task_update: TaskUpdate) -> Optional[Task]:
+        """更新任务"""
+        task = db.get_task(task_id)
+        if not task:
+            return None
+
+        update_data = task_update.dict(exclude_unset=True)
+        if "depends_on" in update_data:
+            update_data["depends_on"] = TaskService._check_dependencies(task_id, update_data["depends_on"] or [])
+
+        # 应用更新
+        TaskService._apply_update(task, update_data)
+
+        updated = db.update_task(task_id, task)
+        return updated.to_task() if updated else None
+
+    @staticmethod
+    def complete_occurrence(task_id: str, occurrence_date: date) -> Optional[Task]:
+        """完成重复任务在指定日期的实例：记入例外日期，该日不再展开实例"""
+        task = db.get_task(task_id)
+        if not task:
+            return None
+        if not is_recurring_master(task):
+            raise ValueError("该任务不是重复任务")
+        if not occurs_on(task, occurrence_date):
+            raise ValueError("该日期没有待完成的重复任务实例")
 
-        return db.update_task(task_id, task)
+        task.recurrence.exceptions.add(occurrence_date)
+        prune_exceptions(task)
+        updated = db.update_task(task_id, task)
+        return updated.to_task() if updated else None
+
+    @staticmethod
+    def get_archived_tasks(offset: int = 0, limit: int = 50) -> Tuple[int, List[bytes]]:
+        """按归档时间倒序分页获取归档任务（JSON 字节），返回 (归档总数, 本页任务)"""
+        return db.get_archived_page(offset, limit)
+
+    @staticmethod
+    def restore_archived_task(task_id: str) -> Optional[Task]:
+        """把归档任务恢复到热存储，并重新标记为未完成"""
+        return db.restore_archived_task(task_id, lambda task: TaskService._apply_update(task, {"completed": False}))
+
+    @staticmethod
+    def _select_task_ids(ids: Optional[List[str]], task_filter: Optional[TaskFilter]) -> List[str]:
+        """批量操作的目标任务：ID列表、筛选条件或二者交集"""
+        if ids is None and (task_filter is None or task_filter.is_empty()):
+            raise ValueError("必须提供任务ID列表或非空的筛选条件")
+
+        if task_filter is None or task_filter.is_empty():
+            return list(dict.fromkeys(ids))
+
+        matched, _ = db.query_tasks(parse_sort_spec(DEFAULT_SORT), task_filter)
+        if ids is None:
+            return [task.id for task in matched]
+
+        matched_ids = {task.id for task in matched}
+        return [task_id for task_id in dict.fromkeys(ids) if task_id in matched_ids]
+
+    @staticmethod
+    def bulk_update_tasks(request: TaskBulkUpdate) -> dict:
+        """批量更新任务，一次存储操作，返回逐个任务的结果；
+        前置任务不存在时整批拒绝，个别任务依赖自身或成环时只跳过这些任务（状态为 invalid）"""
+        task_ids = TaskService._select_task_ids(request.ids, request.filter)
+        update_data = request.update.dict(exclude_unset=True)
+        invalid = {}
+        if "depends_on" in update_data:
+            depends_on = TaskService._check_dependencies(None, update_data["depends_on"] or [])
+            update_data["depends_on"] = depends_on
+            for task_id in task_ids:
+                try:
+                    TaskService._check_dependency_graph(task_id, depends_on)
+                except ValueError as e:
+                    invalid[task_id] = str(e)
+
+        results = db.update_tasks([task_id for task_id in task_ids if task_id not in invalid],
+                                  lambda task: TaskService._apply_update(task, update_data))
+        updated = sum(1 for task in results.values() if task is not None)
+        return {
+            "matched": len(task_ids),
+            "updated": updated,
+            "invalid": len(invalid),
+            "results": [
+                {"id": task_id, "status": "invalid", "detail": invalid[task_id]} if task_id in invalid
+                else {"id": task_id, "status": "updated" if results[task_id] is not None else "not_found"}
+                for task_id in task_ids
+            ],
+        }
+
+    @staticmethod
+    def bulk_delete_tasks(request: TaskBulkDelete) -> dict:
+        """批量删除任务，一次存储操作，返回逐个任务的结果"""
+        task_ids = TaskService._select_task_ids(request.ids, request.filter)
+
+        results = db.delete_tasks(task_ids)
+        return {
+            "matched": len(task_ids),
+            "deleted": sum(1 for deleted in results.values() if deleted),
+            "results": [
+                {"id": task_id, "status": "deleted" if deleted else "not_found"}
+                for task_id, deleted in results.items()
+            ],
+        }
 
     @staticmethod
     def delete_task(task_id: str) -> bool:
@@ -75,9 +439,12 @@ class TaskService:
 
     @staticmethod
     def get_calendar_tasks(year: int, month: int) -> dict:
-        """获取指定月份的任务日历数据"""
+        """获取指定月份的任务日历数据（按日期索引取当月的未完成任务，重复任务按当月展开实例）"""
         calendar_data = {}
-        tasks = db.get_all_tasks()
+        first_day = date(year, month, 1)
+        last_day = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+        tasks = db.get_tasks_between(first_day, last_day)
+        tasks.extend(db.get_occurrences_between(first_day, last_day))
         
         for task in tasks:
             if task.completed:
@@ -103,35 +470,127 @@ class TaskService:
         return calendar_data
 
     @staticmethod
-    def get_task_stats() -> dict:
-        """获取任务统计信息"""
-        tasks = db.get_all_tasks()
-        completed = sum(1 for t in tasks if t.completed)
+    def get_calendar_counts(start: date, end: date) -> dict:
+        """获取日期范围内每天未完成任务的计数（截止/计划，按 low/medium/high 优先级），只返回有任务的日期；
+        重复任务按范围展开实例后计入"""
+        day_counts = db.get_day_counts(start, end)
+        for occurrence in db.get_occurrences_between(start, end):
+            counts = day_counts.setdefault(occurrence.occurrence_date, [0] * 6)
+            rank = PRIORITY_RANK.get(occurrence.priority, 1)
+            if occurrence.due_date:
+                counts[rank] += 1
+            if occurrence.scheduled_date:
+                counts[3 + rank] += 1
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "priorities": list(DayCountIndex.PRIORITIES),
+            "days": {
+                day.isoformat(): {"due": day_counts[day][:3], "scheduled": day_counts[day][3:]}
+                for day in sorted(day_counts)
+            },
+        }
+
+    @staticmethod
+    def _summarize_tasks(tasks: List[Task], now: datetime) -> Tuple[dict, dict]:
+        """一次遍历计算统计信息并按标签分组任务，返回 (统计信息, 标签 -> 任务列表)"""
+        today = now.date()
+        completed = due_today = overdue = 0
+        by_priority = {"high": 0, "medium": 0, "low": 0}
+        by_status = {status.value: 0 for status in TaskStatus}
+        tasks_by_tag = {tag: [] for tag in TagService.AVAILABLE_TAGS}
         
-        # 计算今日到期任务
-        today = date.today()
-        due_today = sum(1 for t in tasks 
-                        if t.due_date and t.due_date.date() == today and not t.completed)
+        for task in tasks:
+            by_status[task.status.value] += 1
+            for tag in TagService.get_task_tags(task, now):
+                tasks_by_tag[tag].append(task)
+            
+            if task.completed:
+                completed += 1
+                continue
+            
+            if task.priority in by_priority:
+                by_priority[task.priority] += 1
+            if is_recurring_master(task):
+                # 重复任务只看今天是否有实例，不会过期
+                if occurs_on(task, today):
+                    due_today += 1
+            elif task.due_date:
+                due_date = task.due_date.date()
+                if due_date == today:
+                    due_today += 1
+                elif due_date < today:
+                    overdue += 1
         
-        # 计算逾期任务
-        overdue = sum(1 for t in tasks 
-                      if t.due_date and t.due_date.date() < today and not t.completed)
-
-        return {
+        stats = {
             "total": len(tasks),
             "completed": completed,
             "pending": len(tasks) - completed,
             "due_today": due_today,
             "overdue": overdue,
-            "by_priority": {
-                "high": sum(1 for t in tasks if t.priority == "high" and not t.completed),
-                "medium": sum(1 for t in tasks if t.priority == "medium" and not t.completed),
-                "low": sum(1 for t in tasks if t.priority == "low" and not t.completed),
-            },
-            "by_status": {
-                "pending": sum(1 for t in tasks if t.status == TaskStatus.PENDING),
-                "in_progress": sum(1 for t in tasks if t.status == TaskStatus.IN_PROGRESS),
-                "completed": sum(1 for t in tasks if t.status == TaskStatus.COMPLETED),
-            },
-            "by_tags": TagService.get_tag_stats(tasks)
-        }
\ No newline at end of file
+            "by_priority": by_priority,
+            "by_status": by_status,
+            "by_tags": {tag: len(tagged) for tag, tagged in tasks_by_tag.items()},
+            "archived": db.get_archive_counts()["total"],
+        }
+        return stats, tasks_by_tag
+
+    @staticmethod
+    def get_completion_rates(start: date, end: date) -> dict:
+        """截止日期在范围内的任务（含归档）每周的完成率，总体和按优先级"""
+        weeks = {}
+        for week_start, priority, total, completed in db.get_completion_by_week(start, end):
+            week = weeks.setdefault(week_start, {"week_start": week_start.isoformat(), "total": 0, "completed": 0,
+                                                 "by_priority": {}})
+            week["total"] += total
+            week["completed"] += completed
+            week["by_priority"][priority] = {"total": total, "completed": completed,
+                                             "rate": round(completed / total, 4)}
+        for week in weeks.values():
+            week["rate"] = round(week["completed"] / week["total"], 4)
+        return {"start": start.isoformat(), "end": end.isoformat(), "engine": ANALYTICS_ENGINE,
+                "weeks": list(weeks.values())}
+
+    @staticmethod
+    def get_daily_load(start: date, end: date) -> dict:
+        """未完成任务每天的负载（按计划日期，没有时按截止日期）：任务数、预计工时、未估计工时的任务数"""
+        days = [
+            {"date": day.isoformat(), "tasks": tasks, "hours": round(hours, 2), "unestimated": unestimated}
+            for day, tasks, hours, unestimated in db.get_load_by_day(start, end)
+        ]
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "total_hours": round(sum(day["hours"] for day in days), 2),
+            "engine": ANALYTICS_ENGINE,
+            "days": days,
+        }
+
+    @staticmethod
+    def get_overdue_aging() -> dict:
+        """逾期未完成任务按逾期天数分段：任务数、按优先级的任务数、预计工时"""
+        buckets = []
+        for bucket, (count, by_priority, hours) in enumerate(db.get_overdue_aging(datetime.now())):
+            min_days, max_days, label = bucket_label(OVERDUE_BUCKET_EDGES, bucket)
+            buckets.append({"label": label, "min_days": min_days, "max_days": max_days, "count": count,
+                            "hours": round(hours, 2), "by_priority": by_priority})
+        return {"total": sum(bucket["count"] for bucket in buckets), "engine": ANALYTICS_ENGINE, "buckets": buckets}
+
+    @staticmethod
+    def get_task_stats() -> dict:
+        """获取任务统计信息"""
+        stats, _ = TaskService._summarize_tasks(db.get_all_tasks(), datetime.now())
+        return stats
+
+    @staticmethod
+    def get_dashboard() -> dict:
+        """首页数据：统计、标签、今日和重要任务、今日日程，只遍历一次任务"""
+        now = datetime.now()
+        stats, tasks_by_tag = TaskService._summarize_tasks(db.get_all_tasks(), now)
+        return {
+            "stats": stats,
+            "tags": TagService.get_available_tags(),
+            "today_tasks": tasks_by_tag["今日"],
+            "important_tasks": tasks_by_tag["重要"],
+            "schedule": AIService.get_schedule_status(now.date()),
+        }
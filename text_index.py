@@ -0,0 +1,328 @@
+"""
+文本索引模块 - 面向中文的 n-gram 分词和倒排索引
+"""
+import heapq
+import math
+import re
+import sys
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import islice
+from operator import itemgetter
+from typing import Dict, FrozenSet, List, Set, Tuple
+
+from indexes import TaskIndex
+
+# 中日韩统一表意文字及兼容区
+_CJK_RANGES = "㐀-䶿一-鿿豈-﫿"
+_TOKEN_PATTERN = re.compile(rf"[{_CJK_RANGES}]+|[a-z0-9]+")
+_CJK_PATTERN = re.compile(rf"[{_CJK_RANGES}]")
+
+# AI规划任务名称的前缀："项目主题 Step1：..."
+_STEP_PREFIX_PATTERN = re.compile(r"^.*?Step\d+[：:]\s*")
+
+
+def tokenize(text: str) -> List[str]:
+    """分词：中文按字符二元组切分（单字成词时保留单字），英文数字按单词切分"""
+    tokens = []
+    if not text:
+        return tokens
+
+    for run in _TOKEN_PATTERN.findall(text.lower()):
+        if _CJK_PATTERN.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def strip_step_prefix(name: str) -> str:
+    """去掉AI规划任务名称中的"主题 StepN："前缀"""
+    return _STEP_PREFIX_PATTERN.sub("", name or "", count=1)
+
+
+class NgramIndex(TaskIndex):
+    """未完成任务的 n-gram 倒排索引，用于检测近似重复的任务"""
+
+    def __init__(self, max_posting_scan: int = 2000, max_candidates: int = 20):
+        self.max_posting_scan = max_posting_scan
+        self.max_candidates = max_candidates
+        self._postings: Dict[str, Set[str]] = {}
+        self._task_tokens: Dict[str, FrozenSet[str]] = {}
+
+    @staticmethod
+    def task_tokens(name: str, description: str = "") -> FrozenSet[str]:
+        """任务名称（去掉步骤前缀）和描述的 n-gram 集合"""
+        text = f"{strip_step_prefix(name)} {description or ''}"
+        return frozenset(sys.intern(token) for token in tokenize(text))
+
+    def add(self, task) -> None:
+        """加入索引（已完成的任务不参与去重）"""
+        if task.completed:
+            return
+
+        tokens = self.task_tokens(task.name, task.description)
+        if not tokens:
+            return
+
+        self._task_tokens[task.id] = tokens
+        for token in tokens:
+            self._postings.setdefault(token, set()).add(task.id)
+
+    def discard(self, task_id: str) -> None:
+        """移出索引"""
+        tokens = self._task_tokens.pop(task_id, ())
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.discard(task_id)
+            if not posting:
+                del self._postings[token]
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._postings.clear()
+        self._task_tokens.clear()
+
+    def find_similar(self, name: str, description: str = "", threshold: float = 0.6,
+                     limit: int = 5) -> List[Tuple[str, float]]:
+        """查找相似度（Jaccard）不低于阈值的任务，按相似度降序返回 (任务ID, 相似度)"""
+        tokens = self.task_tokens(name, description)
+        if not tokens:
+            return []
+
+        # 先用倒排表统计重叠的 n-gram 数量筛选候选，再精确计算 Jaccard；
+        # 过长的倒排表来自高频 n-gram，区分度低，跳过
+        overlaps = Counter()
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting and len(posting) <= self.max_posting_scan:
+                overlaps.update(posting)
+
+        results = []
+        for task_id, _ in heapq.nlargest(self.max_candidates, overlaps.items(), key=itemgetter(1)):
+            other = self._task_tokens[task_id]
+            similarity = len(tokens & other) / len(tokens | other)
+            if similarity >= threshold:
+                results.append((task_id, similarity))
+
+        results.sort(key=itemgetter(1), reverse=True)
+        return results[:limit]
+
+
+def parse_query(query: str) -> List[Tuple[str, bool]]:
+    """解析搜索词，返回 (词项, 是否前缀匹配)；以 * 结尾的词按前缀匹配，
+    单个汉字（索引中只有二元组）也按前缀匹配"""
+    terms = {}
+    for part in (query or "").split():
+        is_prefix = part.endswith("*")
+        tokens = tokenize(part.rstrip("*"))
+        for position, token in enumerate(tokens):
+            prefix = (is_prefix and position == len(tokens) - 1) or (len(token) == 1 and _CJK_PATTERN.match(token))
+            terms[token] = terms.get(token, False) or bool(prefix)
+    return list(terms.items())
+
+
+class SearchIndex(TaskIndex):
+    """任务名称和描述的全文检索倒排索引：记录词频，BM25 排序，有序词表支持前缀查询"""
+
+    NAME_WEIGHT = 2  # 名称中的词项按两倍词频计
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_prefix_expansions: int = 64,
+                 max_scored_candidates: int = 1000, max_exact_intersection: int = 4096,
+                 max_scanned_candidates: int = 20000):
+        self.k1 = k1
+        self.b = b
+        self.max_prefix_expansions = max_prefix_expansions
+        self.max_scored_candidates = max_scored_candidates  # 最多打分的命中数
+        self.max_exact_intersection = max_exact_intersection  # 最短倒排表不超过该长度时精确求交集
+        self.max_scanned_candidates = max_scanned_candidates  # 分块校验时最多扫描的任务数
+        self.scan_chunk_size = 1024
+        self._postings: Dict[str, Dict[str, int]] = {}  # 词项 -> {任务ID: 词频}
+        self._vocabulary: List[str] = []  # 有序词表
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    @classmethod
+    def document_terms(cls, task) -> Counter:
+        """任务的词项和词频"""
+        terms = Counter()
+        for token in tokenize(task.name):
+            terms[token] += cls.NAME_WEIGHT
+        terms.update(tokenize(task.description))
+        return terms
+
+    def _add_document(self, task, new_terms: List[str]) -> None:
+        """写入倒排表，新出现的词项追加到 new_terms"""
+        terms = self.document_terms(task)
+        if not terms:
+            return
+
+        postings = self._postings
+        for term, frequency in terms.items():
+            posting = postings.get(term)
+            if posting is None:
+                term = sys.intern(term)
+                posting = postings[term] = {}
+                new_terms.append(term)
+            posting[task.id] = frequency
+
+        length = sum(terms.values())
+        self._doc_terms[task.id] = tuple(terms)
+        self._doc_lengths[task.id] = length
+        self._total_length += length
+
+    def add(self, task) -> None:
+        """加入索引"""
+        new_terms = []
+        self._add_document(task, new_terms)
+        for term in new_terms:
+            insort(self._vocabulary, term)
+
+    def add_many(self, tasks) -> None:
+        """批量加入：新词项一次并入有序词表"""
+        new_terms = []
+        for task in tasks:
+            self._add_document(task, new_terms)
+        if len(new_terms) < 32:
+            for term in new_terms:
+                insort(self._vocabulary, term)
+        else:
+            new_terms.sort()
+            self._vocabulary = sorted(self._vocabulary + new_terms)
+
+    def discard(self, task_id: str) -> None:
+        """移出索引"""
+        terms = self._doc_terms.pop(task_id, None)
+        if terms is None:
+            return
+
+        self._total_length -= self._doc_lengths.pop(task_id)
+        for term in terms:
+            posting = self._postings[term]
+            del posting[task_id]
+            if not posting:
+                del self._postings[term]
+                position = bisect_left(self._vocabulary, term)
+                del self._vocabulary[position]
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._postings.clear()
+        self._vocabulary.clear()
+        self._doc_terms.clear()
+        self._doc_lengths.clear()
+        self._total_length = 0
+
+    def _term_postings(self, term: str, is_prefix: bool) -> List[Dict[str, int]]:
+        """词项对应的倒排表；前缀匹配时为有序词表中以该前缀开头的词项（最多展开 max_prefix_expansions 个）"""
+        if not is_prefix:
+            posting = self._postings.get(term)
+            return [posting] if posting else []
+
+        vocabulary = self._vocabulary
+        position = bisect_left(vocabulary, term)
+        end = min(len(vocabulary), position + self.max_prefix_expansions)
+        postings = []
+        while position < end and vocabulary[position].startswith(term):
+            postings.append(self._postings[vocabulary[position]])
+            position += 1
+        return postings
+
+    @staticmethod
+    def _iter_newest(postings: List[Dict[str, int]]):
+        """按加入顺序倒序（新任务优先）遍历一组倒排表的任务ID（去重）"""
+        if len(postings) == 1:
+            return reversed(postings[0])
+        return iter(dict.fromkeys(task_id for posting in postings for task_id in reversed(posting)))
+
+    def _intersect(self, groups) -> Tuple[List[str], int, bool]:
+        """求同时命中所有词项的任务，返回 (待打分的任务ID, 命中总数, 总数是否精确)"""
+        driver_size, driver = groups[0]
+        others = [postings for _, postings in groups[1:]]
+        max_scored = self.max_scored_candidates
+
+        if driver_size <= self.max_exact_intersection:
+            # 最短的倒排表不大：集合运算求精确交集
+            candidates = driver[0].keys() if len(driver) == 1 else set().union(*driver)
+            for postings in others:
+                keys = postings[0].keys() if len(postings) == 1 else set().union(*postings)
+                candidates = candidates & keys
+                if not candidates:
+                    return [], 0, True
+            total = len(candidates)
+            if total <= max_scored:
+                return list(candidates), total, True
+            newest = (task_id for task_id in self._iter_newest(driver) if task_id in candidates)
+            return list(islice(newest, max_scored)), total, True
+
+        # 最短的倒排表也很大：新任务优先分块校验其余词项，凑够打分数量或扫描上限即停止，按命中率估算总数
+        candidates = []
+        scanned = 0
+        exhausted = False
+        newest = self._iter_newest(driver)
+        while len(candidates) < max_scored and scanned < self.max_scanned_candidates:
+            chunk = list(islice(newest, self.scan_chunk_size))
+            scanned += len(chunk)
+            hits = chunk
+            for postings in others:
+                if len(postings) == 1:
+                    posting = postings[0]
+                    hits = [task_id for task_id in hits if task_id in posting]
+                else:
+                    hits = [task_id for task_id in hits if any(task_id in posting for posting in postings)]
+                if not hits:
+                    break
+            candidates.extend(hits)
+            if len(chunk) < self.scan_chunk_size:
+                exhausted = True
+                break
+
+        if exhausted:
+            return candidates[:max_scored], len(candidates), True
+        return candidates[:max_scored], round(len(candidates) / scanned * driver_size), False
+
+    def search(self, query: str, limit: int = 20) -> Tuple[List[Tuple[str, float]], int, bool]:
+        """搜索同时包含所有词项的任务，按 BM25 得分降序返回 (任务ID, 得分)、命中总数和总数是否精确；
+        从最短的倒排表开始求交集，命中过多时只对最新加入的任务打分"""
+        groups = []
+        for term, is_prefix in parse_query(query):
+            postings = self._term_postings(term, is_prefix)
+            if not postings:
+                return [], 0, True
+            groups.append((sum(len(posting) for posting in postings), postings))
+        if not groups:
+            return [], 0, True
+
+        groups.sort(key=itemgetter(0))
+        candidates, total, exact = self._intersect(groups)
+        if not candidates:
+            return [], total, exact
+
+        doc_count = len(self._doc_lengths)
+        k1, b = self.k1, self.b
+        length_factor = k1 * b * doc_count / self._total_length
+        norms = [k1 * (1 - b) + length_factor * length for length in map(self._doc_lengths.__getitem__, candidates)]
+
+        # 按词项逐列计算 BM25（前缀词项的文档频率取展开词项之和，为上界）
+        scores = [0.0] * len(candidates)
+        for size, postings in groups:
+            weight = math.log(1 + max(doc_count - size + 0.5, 0.5) / (size + 0.5)) * (k1 + 1)
+            if len(postings) == 1:
+                frequencies = map(postings[0].__getitem__, candidates)
+            else:
+                frequencies = [sum(posting.get(task_id, 0) for posting in postings) for task_id in candidates]
+            scores = [score + weight * frequency / (frequency + norm)
+                      for score, frequency, norm in zip(scores, frequencies, norms)]
+
+        scored = zip(scores, candidates)
+        top = heapq.nlargest(limit, scored)
+        return [(task_id, score) for score, task_id in top], total, exact
@@ -0,0 +1,131 @@
+"""
+时间段索引模块 - 日程安排中已占用时间段的区间索引
+时间统一用当天的整数分钟（0-1440）表示，"HH:MM" 只在边界解析和格式化
+"""
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def parse_hhmm(value: str) -> int:
+    """解析 "HH:MM" 为当天的分钟数（允许 "24:00" 表示一天结束）"""
+    try:
+        hour_text, minute_text = value.strip().split(":")
+        hour, minute = int(hour_text), int(minute_text)
+    except (AttributeError, ValueError):
+        raise ValueError(f"时间格式错误，请使用HH:MM格式: {value}")
+
+    if not 0 <= minute < 60 or not 0 <= hour <= 24 or (hour == 24 and minute):
+        raise ValueError(f"时间超出范围: {value}")
+    return hour * 60 + minute
+
+
+def format_hhmm(minutes: int) -> str:
+    """把当天的分钟数格式化为 "HH:MM" """
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class DaySlots:
+    """单日已占用时间段：按开始时间排序的区间数组，以及合并后的忙碌区间（互不重叠）"""
+
+    def __init__(self, intervals: Iterable[Tuple[int, int, str]]):
+        self.intervals: List[Tuple[int, int, str]] = sorted(
+            (start, end, task_id) for start, end, task_id in intervals if end > start
+        )
+        self.starts = [start for start, _, _ in self.intervals]
+
+        # 按开始时间排序后的区间上建最大结束时间的线段树（数组形式，叶子在 [size, 2*size)），
+        # 查询时跳过最大结束时间不超过查询开始的整棵子树，个别很长的区间不会让查询退化为线性扫描
+        size = 1
+        while size < len(self.intervals):
+            size *= 2
+        self._size = size
+        max_ends = [-1] * (2 * size)
+        for position, (_, end, _) in enumerate(self.intervals):
+            max_ends[size + position] = end
+        for node in range(size - 1, 0, -1):
+            max_ends[node] = max(max_ends[2 * node], max_ends[2 * node + 1])
+        self._max_ends = max_ends
+
+        busy_starts, busy_ends = [], []
+        for start, end, _ in self.intervals:
+            if busy_ends and start <= busy_ends[-1]:
+                busy_ends[-1] = max(busy_ends[-1], end)
+            else:
+                busy_starts.append(start)
+                busy_ends.append(end)
+        self.busy_starts = busy_starts
+        self.busy_ends = busy_ends
+
+    def conflicts(self, start: int, end: int) -> List[Tuple[int, int, str]]:
+        """与 [start, end) 重叠的已安排区间（按开始时间排序）：开始时间早于 end 的前缀中结束时间晚于 start 的区间，
+        沿线段树只进入最大结束时间晚于 start 的子树，O((k + 1) log n)，k 为冲突数"""
+        stop = bisect_left(self.starts, end)
+        if not stop:
+            return []
+
+        size, max_ends = self._size, self._max_ends
+        found = []
+        stack = [(1, 0, size)]  # (节点, 覆盖的区间下标范围 [low, high))
+        while stack:
+            node, low, high = stack.pop()
+            if low >= stop or max_ends[node] <= start:
+                continue
+            if node >= size:
+                found.append(self.intervals[low])
+                continue
+            middle = (low + high) // 2
+            stack.append((2 * node + 1, middle, high))
+            stack.append((2 * node, low, middle))
+        return found
+
+    def free_slots(self, duration: int, window_start: int, window_end: int,
+                   limit: Optional[int] = None) -> List[Tuple[int, int]]:
+        """时间窗口内不短于 duration 分钟的空闲时间段（按时间先后）；
+        二分定位窗口内第一个忙碌区间后逐个检查窗口内的间隙，O(log n + m)，m 为窗口内的忙碌区间数（达到 limit 即停止）"""
+        slots = []
+        # 第一个可能与窗口重叠的忙碌区间
+        position = bisect_right(self.busy_ends, window_start)
+        cursor = window_start
+        while cursor < window_end:
+            if position < len(self.busy_starts):
+                gap_end = min(self.busy_starts[position], window_end)
+            else:
+                gap_end = window_end
+            if gap_end - cursor >= duration:
+                slots.append((cursor, gap_end))
+                if limit is not None and len(slots) >= limit:
+                    break
+            if position >= len(self.busy_starts):
+                break
+            cursor = max(cursor, self.busy_ends[position])
+            position += 1
+        return slots
+
+
+class ScheduleSlotIndex:
+    """按日期维护已保存日程安排的占用时间段（日程安排整体写入或删除时重建当天的区间）"""
+
+    def __init__(self):
+        self._days: Dict[str, DaySlots] = {}  # key: "YYYY-MM-DD"
+
+    def set_day(self, date_str: str, schedule_items) -> None:
+        """用当天的日程条目重建区间（时间格式错误的条目跳过）"""
+        intervals = []
+        for item in schedule_items:
+            try:
+                intervals.append((parse_hhmm(item.start_time), parse_hhmm(item.end_time), item.task_id))
+            except ValueError:
+                continue
+        self._days[date_str] = DaySlots(intervals)
+
+    def remove_day(self, date_str: str) -> None:
+        self._days.pop(date_str, None)
+
+    def clear(self) -> None:
+        self._days.clear()
+
+    def get_day(self, date_str: str) -> DaySlots:
+        """当天的占用区间（没有安排时为空）"""
+        return self._days.get(date_str) or DaySlots(())